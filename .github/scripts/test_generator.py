@@ -6,6 +6,7 @@ Script untuk menggunakan Gemini API untuk generate test cases
 import os
 import sys
 import json
+import random
 import time
 import subprocess
 import ast
@@ -285,8 +286,8 @@ Return ONLY Python test code, no additional explanations."""
                 else:
                     logger.error(f"No response from Gemini for {file_info['filepath']}")
                     if attempt < max_retries - 1:
-                        delay = base_delay * (2 ** attempt)
-                        logger.info(f"Retrying in {delay}s...")
+                        delay = random.uniform(0, base_delay * (2 ** attempt))  # full jitter
+                        logger.info(f"Retrying in {delay:.1f}s...")
                         time.sleep(delay)
                         continue
                     return None
@@ -294,8 +295,8 @@ Return ONLY Python test code, no additional explanations."""
             except Exception as e:
                 logger.error(f"Error generating test for {file_info['filepath']} (attempt {attempt + 1}): {e}")
                 if attempt < max_retries - 1:
-                    delay = base_delay * (2 ** attempt)
-                    logger.info(f"Retrying in {delay}s...")
+                    delay = random.uniform(0, base_delay * (2 ** attempt))  # full jitter
+                    logger.info(f"Retrying in {delay:.1f}s...")
                     time.sleep(delay)
                     continue
                 return None
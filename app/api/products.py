@@ -1,98 +1,221 @@
-from fastapi import APIRouter, HTTPException
-from app.services.product_data_service import ProductDataService
-from app.models.product import ProductResponse
-from typing import List, Optional
+from fastapi import APIRouter, HTTPException, Depends, Query, Response
+from app.services.product_data_service import get_product_service
+from app.services.sort_index import SORT_PATTERN
+from app.models.product import ProductResponse, BatchSearchRequest, SpecFilters
+from app.utils.fast_json import FastJSONResponse, ProductJSONCache
+from app.utils.http_cache import ConditionalGet, catalog_conditional
+from app.utils.projection import FIELDS_DESCRIPTION, FIELDS_PATTERN, PRODUCT_VIEWS, parse_fields
+from typing import Dict, List, Optional
 
 router = APIRouter()
-product_service = ProductDataService()
+product_service = get_product_service()
+# Fragmen JSON produk per versi katalog; body respons disusun dari bytes yang sudah jadi
+product_json = ProductJSONCache()
+
+def _catalog_cache(route: str):
+    """ETag (versi katalog + query) dan Cache-Control route; 304 jika If-None-Match cocok"""
+    return Depends(catalog_conditional(route, lambda: product_service.catalog_version))
+
+def _products_body(products: List[Dict], fields: Optional[str] = None, **extra) -> Response:
+    array = product_json.array(products, product_service.catalog_version, fields=parse_fields(fields))
+    return Response(content=product_json.envelope("products", array, **extra), media_type="application/json")
+
+def warm_product_views() -> int:
+    """Siapkan fragmen JSON view ringkas (fields=list/card) untuk semua produk katalog saat ini"""
+    return product_json.precompute(
+        product_service.local_service.products, product_service.catalog_version, PRODUCT_VIEWS.values()
+    )
+
+# Respons dikirim sebagai Response mentah dari fragmen JSON, jadi response_model hanya untuk
+# schema OpenAPI (tanpa validasi ulang); item proyeksi fields= dijelaskan di deskripsi query
+PRODUCT_LIST_FIELDS_DESCRIPTION = f"{FIELDS_DESCRIPTION}. With fields= each item only contains the requested fields"
 
 @router.get("/", response_model=List[ProductResponse])
 async def get_products(
     limit: Optional[int] = 20,
     category: Optional[str] = None,
-    search: Optional[str] = None
+    search: Optional[str] = None,
+    sort: Optional[str] = Query(default=None, pattern=SORT_PATTERN, description="e.g. price, -rating, -sold,price"),
+    fields: Optional[str] = Query(default=None, pattern=FIELDS_PATTERN, description=PRODUCT_LIST_FIELDS_DESCRIPTION),
+    spec_filters: SpecFilters = Depends(),
+    cache: ConditionalGet = _catalog_cache("products")
 ):
     """Get products from local data source"""
+    if cache.not_modified:
+        return cache.not_modified_response()
     try:
         products = await product_service.get_products(
             limit=limit,
             category=category,
-            search=search
+            search=search,
+            spec_filters=spec_filters.active() or None,
+            sort=sort
         )
-        return products
+        # Tanpa fields=, fragmen berisi field ProductResponse; dengan fields=, bentuk respons
+        # mengikuti proyeksi (fragmen view ringkas sudah disiapkan saat startup)
+        selected = parse_fields(fields)
+        model = ProductResponse if selected is None else None
+        body = product_json.array(products, product_service.catalog_version, model, selected)
+        return cache.apply(Response(content=body, media_type="application/json"))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/categories")
-async def get_categories():
+async def get_categories(cache: ConditionalGet = _catalog_cache("categories")):
     """Get available product categories"""
+    if cache.not_modified:
+        return cache.not_modified_response()
     try:
         categories = await product_service.get_categories()
-        return {"categories": categories}
+        return cache.apply(FastJSONResponse({"categories": categories}))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/search")
-async def search_products(query: str, limit: Optional[int] = 10):
+async def search_products(
+    query: str,
+    limit: Optional[int] = 10,
+    sort: Optional[str] = Query(default=None, pattern=SORT_PATTERN),
+    fields: Optional[str] = Query(default=None, pattern=FIELDS_PATTERN, description=FIELDS_DESCRIPTION),
+    spec_filters: SpecFilters = Depends(),
+    cache: ConditionalGet = _catalog_cache("search")
+):
     """Search products by query"""
+    if cache.not_modified:
+        return cache.not_modified_response()
+    try:
+        products = await product_service.search_products(query, limit, spec_filters.active() or None, sort)
+        return cache.apply(_products_body(products, fields, query=query, source="local"))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/search/batch")
+async def batch_search_products(request: BatchSearchRequest):
+    """Run several searches in one request (e.g. one per carousel)"""
     try:
-        products = await product_service.search_products(query, limit)
-        return {"products": products, "query": query, "source": "local"}
+        specs = [spec.model_dump() for spec in request.searches]
+        results = await product_service.batch_search(specs)
+        return {
+            "results": [
+                {**spec, "products": products, "count": len(products)}
+                for spec, products in zip(specs, results)
+            ],
+            "source": "local"
+        }
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/top-rated")
-async def get_top_rated_products(limit: Optional[int] = 10):
+async def get_top_rated_products(
+    limit: Optional[int] = 10,
+    fields: Optional[str] = Query(default=None, pattern=FIELDS_PATTERN, description=FIELDS_DESCRIPTION),
+    cache: ConditionalGet = _catalog_cache("top_rated")
+):
     """Get top rated products"""
+    if cache.not_modified:
+        return cache.not_modified_response()
     try:
         products = await product_service.get_top_rated_products(limit)
-        return {"products": products, "source": "local"}
+        return cache.apply(_products_body(products, fields, source="local"))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/best-selling")
-async def get_best_selling_products(limit: Optional[int] = 10):
+async def get_best_selling_products(
+    limit: Optional[int] = 10,
+    fields: Optional[str] = Query(default=None, pattern=FIELDS_PATTERN, description=FIELDS_DESCRIPTION),
+    cache: ConditionalGet = _catalog_cache("best_selling")
+):
     """Get best selling products"""
+    if cache.not_modified:
+        return cache.not_modified_response()
     try:
         products = await product_service.get_best_selling_products(limit)
-        return {"products": products, "source": "local"}
+        return cache.apply(_products_body(products, fields, source="local"))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/brands")
-async def get_brands():
+async def get_brands(cache: ConditionalGet = _catalog_cache("brands")):
     """Get available product brands"""
+    if cache.not_modified:
+        return cache.not_modified_response()
     try:
         brands = product_service.get_brands()
-        return {"brands": brands, "source": "local"}
+        return cache.apply(FastJSONResponse({"brands": brands, "source": "local"}))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/category/{category}")
-async def get_products_by_category(category: str, limit: Optional[int] = 20):
+async def get_products_by_category(
+    category: str,
+    limit: Optional[int] = 20,
+    fields: Optional[str] = Query(default=None, pattern=FIELDS_PATTERN, description=FIELDS_DESCRIPTION),
+    cache: ConditionalGet = _catalog_cache("category")
+):
     """Get products by category"""
+    if cache.not_modified:
+        return cache.not_modified_response()
     try:
-        products = product_service.get_products_by_category(category, limit)
-        return {"products": products, "category": category, "source": "local"}
+        products = await product_service.get_products_by_category(category, limit)
+        return cache.apply(_products_body(products, fields, category=category, source="local"))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/brand/{brand}")
-async def get_products_by_brand(brand: str, limit: Optional[int] = 20):
+async def get_products_by_brand(
+    brand: str,
+    limit: Optional[int] = 20,
+    fields: Optional[str] = Query(default=None, pattern=FIELDS_PATTERN, description=FIELDS_DESCRIPTION),
+    cache: ConditionalGet = _catalog_cache("brand")
+):
     """Get products by brand"""
+    if cache.not_modified:
+        return cache.not_modified_response()
+    try:
+        products = await product_service.get_products_by_brand(brand, limit)
+        return cache.apply(_products_body(products, fields, brand=brand, source="local"))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/{product_id}/similar")
+async def get_similar_products(
+    product_id: str,
+    limit: int = Query(default=5, ge=1, le=10),
+    fields: Optional[str] = Query(default=None, pattern=FIELDS_PATTERN, description=FIELDS_DESCRIPTION),
+    cache: ConditionalGet = _catalog_cache("similar")
+):
+    """Get products similar to the given product"""
+    if cache.not_modified:
+        return cache.not_modified_response()
     try:
-        products = product_service.get_products_by_brand(brand, limit)
-        return {"products": products, "brand": brand, "source": "local"}
+        products = product_service.get_similar_products(product_id, limit)
+        if products is None:
+            raise HTTPException(status_code=404, detail="Product not found")
+        return cache.apply(_products_body(products, fields, product_id=product_id, source="local"))
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/{product_id}")
-async def get_product_details(product_id: str):
+async def get_product_details(
+    product_id: str,
+    fields: Optional[str] = Query(default=None, pattern=FIELDS_PATTERN, description=FIELDS_DESCRIPTION),
+    cache: ConditionalGet = _catalog_cache("product")
+):
     """Get product details by ID"""
+    if cache.not_modified:
+        return cache.not_modified_response()
     try:
         product = product_service.get_product_details(product_id)
         if product:
-            return {"product": product, "source": "local"}
+            body = product_json.envelope(
+                "product",
+                product_json.fragment(product, product_service.catalog_version, fields=parse_fields(fields)),
+                source="local"
+            )
+            return cache.apply(Response(content=body, media_type="application/json"))
         else:
             raise HTTPException(status_code=404, detail="Product not found")
     except HTTPException:
@@ -1,92 +1,171 @@
+import json
 import logging
-from typing import List, Dict
-from fastapi import APIRouter, HTTPException
-from pydantic import BaseModel
-from app.services.product_data_service import ProductDataService
+from contextlib import aclosing
+from typing import List, Dict, Optional
+from fastapi import APIRouter, HTTPException, Depends, Query
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field
+from app.models.product import SpecFilters
+from app.services.sort_index import SORT_PATTERN
+from app.services.product_data_service import get_product_service
 from app.services.ai_service import AIService
-import re
+from app.services.warmup_service import WarmupService
+from app.services.ask_job_service import AskJobService, JobQueueFull
+from app.utils.config import get_settings
+from app.utils.projection import FIELDS_DESCRIPTION, FIELDS_PATTERN, parse_fields, project
 
 # Setup logging
 logger = logging.getLogger(__name__)
 
 router = APIRouter()
-product_service = ProductDataService()
+product_service = get_product_service()
 ai_service = AIService()
 
+SUGGESTED_QUESTIONS = [
+    "Apa produk terbaik untuk gaming?",
+    "Rekomendasi laptop untuk kerja",
+    "Smartphone dengan kamera terbaik",
+    "Headphone wireless dengan kualitas bagus",
+    "Produk untuk rumah tangga",
+    "Gadget untuk produktivitas",
+    "Tablet untuk kreativitas",
+    "Smartwatch untuk olahraga"
+]
+
+# Arahkan autocomplete ke pertanyaan yang sudah umum ditanyakan
+product_service.add_popular_queries(SUGGESTED_QUESTIONS)
+
+# Pertanyaan saran dijawab lebih dulu agar klik pertama tidak membayar latency LLM
+warmup_service = WarmupService(
+    ai_service,
+    SUGGESTED_QUESTIONS,
+    top_n=get_settings().WARMUP_TOP_N,
+    concurrency=get_settings().WARMUP_CONCURRENCY,
+    interval_seconds=get_settings().WARMUP_INTERVAL_SECONDS
+)
+
+# Ask asinkron: jawaban LLM dikerjakan worker pool terbatas, hasil diambil lewat polling
+ask_job_service = AskJobService(
+    ai_service,
+    workers=get_settings().ASK_JOB_WORKERS,
+    max_pending=get_settings().ASK_JOB_MAX_PENDING,
+    result_ttl_seconds=get_settings().ASK_JOB_RESULT_TTL_SECONDS
+)
+
 class QueryRequest(BaseModel):
     question: str
+    session_id: Optional[str] = Field(default=None, max_length=128)
 
 class QueryResponse(BaseModel):
     answer: str
     products: List[dict]
     question: str
     note: str
+    product_ids: List[str] = []
+
+class AskJobResponse(BaseModel):
+    job_id: str
+    status: str
+    question: str
+    products: List[dict]
+    note: str
+    answer: Optional[str] = None
+    error: Optional[str] = None
+    product_ids: List[str] = []
 
 @router.post("/ask", response_model=QueryResponse)
 async def ask_question(request: QueryRequest):
-    """Ask a question about products and get recommendations"""
+    """
+    Ask a question about products and get recommendations.
+    `products` are the products the answer recommends, resolved by id from the catalog
+    (no second retrieval).
+    """
     try:
-        # Get AI response
-        ai_response = await ai_service.get_response(request.question)
-        
-        # Get relevant products and fallback message
-        # Ekstrak kategori dan max_price dari pertanyaan (sederhana)
-        category = None
-        max_price = None
-        
-        # Deteksi kategori dengan lebih lengkap
-        question_lower = request.question.lower()
-        category_mapping = {
-            'laptop': ['laptop', 'notebook', 'komputer'],
-            'smartphone': ['smartphone', 'hp', 'handphone', 'phone', 'telepon', 'ponsel'],
-            'tablet': ['tablet', 'ipad'],
-            'headphone': ['headphone', 'earphone', 'headset', 'audio'],
-            'kamera': ['kamera', 'camera', 'fotografi'],
-            'audio': ['audio', 'speaker', 'sound'],
-            'tv': ['tv', 'televisi'],
-            'drone': ['drone', 'quadcopter'],
-            'jam': ['jam', 'watch', 'smartwatch']
-        }
-        
-        for cat, keywords in category_mapping.items():
-            if any(keyword in question_lower for keyword in keywords):
-                category = cat
-                break
-        
-        # Deteksi budget
-        price_match = re.search(r'(\d+)\s*juta', question_lower)
-        if price_match:
-            max_price = int(price_match.group(1)) * 1000000
-        elif 'budget' in question_lower or 'murah' in question_lower:
-            max_price = 5000000
-            
-        products, fallback_message = await product_service.smart_search_products(
-            keyword=request.question, category=category, max_price=max_price, limit=5
-        )
-        
+        result = await ai_service.get_structured_response(request.question, session_id=request.session_id)
+        products = product_service.get_products_by_ids(result["product_ids"])
         return QueryResponse(
-            answer=ai_response,
+            answer=result["answer"],
             products=products,
             question=request.question,
-            note=fallback_message
+            note=result["note"],
+            product_ids=result["product_ids"]
         )
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+def _sse_event(event: str, data: Dict) -> str:
+    """Format one server-sent event"""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+@router.post("/ask/stream")
+async def ask_question_stream(request: QueryRequest):
+    """
+    Streaming variant of /ask (server-sent events).
+    Emits `products` as soon as retrieval finishes, then `token` events as the
+    model generates text, then `done`.
+    """
+    async def event_stream():
+        try:
+            products, fallback_message = await ai_service.retrieve_products(request.question, request.session_id)
+            yield _sse_event("products", {
+                "products": products,
+                "question": request.question,
+                "note": fallback_message
+            })
+            answer = ai_service.stream_response(request.question, products, fallback_message, request.session_id)
+            # aclosing: saat klien putus, stream jawaban ditutup segera sehingga guard LLM langsung dilepas
+            async with aclosing(answer):
+                async for text in answer:
+                    yield _sse_event("token", {"text": text})
+            yield _sse_event("done", {})
+        except Exception as e:
+            logger.error(f"Error streaming answer: {str(e)}")
+            yield _sse_event("error", {"detail": "Error processing question"})
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@router.post("/ask/jobs", response_model=AskJobResponse, status_code=202)
+async def submit_ask_job(request: QueryRequest):
+    """
+    Asynchronous variant of /ask.
+    Returns a job id and the retrieved products immediately; poll
+    `GET /ask/jobs/{job_id}` for the answer. Once done, `products` and
+    `product_ids` are the recommended products, exactly as in /ask.
+    """
+    try:
+        return await ask_job_service.submit(request.question, request.session_id)
+    except JobQueueFull as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error submitting ask job: {str(e)}")
+        raise HTTPException(status_code=500, detail="Error submitting question")
+
+@router.get("/ask/jobs/{job_id}", response_model=AskJobResponse)
+async def get_ask_job(job_id: str, wait: float = Query(default=0, ge=0, le=30)):
+    """Get an ask job; `wait` long-polls up to that many seconds for the answer"""
+    job = await ask_job_service.wait(job_id, wait)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found or expired")
+    return job
+
 @router.get("/suggestions")
 async def get_suggestions():
     """Get suggested questions"""
-    suggestions = [
-        "Apa produk terbaik untuk gaming?",
-        "Rekomendasi laptop untuk kerja",
-        "Smartphone dengan kamera terbaik",
-        "Headphone wireless dengan kualitas bagus",
-        "Produk untuk rumah tangga",
-        "Gadget untuk produktivitas",
-        "Tablet untuk kreativitas",
-        "Smartwatch untuk olahraga"
-    ]
-    return {"suggestions": suggestions}
+    return {"suggestions": SUGGESTED_QUESTIONS}
+
+@router.get("/autocomplete")
+async def autocomplete(q: str, limit: int = Query(default=8, ge=1, le=20)):
+    """Get ranked completions for a partial question or product name"""
+    try:
+        completions = product_service.get_completions(q, limit)
+        return {"completions": completions, "query": q, "source": "local"}
+    except Exception as e:
+        logger.error(f"Error getting completions: {str(e)}")
+        raise HTTPException(status_code=500, detail="Error getting completions")
 
 @router.get("/categories")
 async def get_categories():
@@ -109,12 +188,19 @@ async def get_brands():
         raise HTTPException(status_code=500, detail="Error getting brands")
 
 @router.get("/products/search")
-async def search_products(keyword: str, limit: int = 10):
+async def search_products(
+    keyword: str,
+    limit: int = 10,
+    sort: Optional[str] = Query(default=None, pattern=SORT_PATTERN),
+    fields: Optional[str] = Query(default=None, pattern=FIELDS_PATTERN, description=FIELDS_DESCRIPTION),
+    spec_filters: SpecFilters = Depends()
+):
     """Search products directly"""
     try:
-        products = await product_service.search_products(keyword, limit)
+        products = await product_service.search_products(keyword, limit, spec_filters.active() or None, sort)
+        selected = parse_fields(fields)
         return {
-            "products": products,
+            "products": [project(p, selected) for p in products],
             "count": len(products),
             "keyword": keyword,
             "source": "local"
@@ -127,7 +213,7 @@ async def search_products(keyword: str, limit: int = 10):
 async def get_products_by_category(category: str):
     """Get products by category"""
     try:
-        products = product_service.get_products_by_category(category, limit=20)
+        products = await product_service.get_products_by_category(category, limit=20)
         return {
             "products": products,
             "count": len(products),
@@ -142,7 +228,7 @@ async def get_products_by_category(category: str):
 async def get_products_by_brand(brand: str):
     """Get products by brand"""
     try:
-        products = product_service.get_products_by_brand(brand, limit=20)
+        products = await product_service.get_products_by_brand(brand, limit=20)
         return {
             "products": products,
             "count": len(products),
@@ -196,6 +282,20 @@ async def get_product_details(product_id: str):
         logger.error(f"Error getting product details: {str(e)}")
         raise HTTPException(status_code=500, detail="Error getting product details")
 
+@router.get("/metrics")
+async def get_ai_metrics():
+    """Get LLM circuit breaker, concurrency, cache and warm-up metrics"""
+    try:
+        return {
+            **ai_service.get_metrics(),
+            "warmup": warmup_service.last_run,
+            "ask_jobs": ask_job_service.stats(),
+            "catalog_executor": product_service.executor.snapshot()
+        }
+    except Exception as e:
+        logger.error(f"Error getting AI metrics: {str(e)}")
+        raise HTTPException(status_code=500, detail="Error getting AI metrics")
+
 @router.get("/test-connection")
 async def test_connection():
     """Test connection to local data source"""
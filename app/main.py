@@ -1,12 +1,31 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 from app.api import products, queries
+from app.services.catalog_executor import get_catalog_executor
 from app.utils.config import settings
+from app.utils.compression import CompressionMiddleware
+from app.utils.fast_json import FastJSONResponse
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Fragmen JSON view ringkas (fields=list/card) disiapkan sekali per versi katalog
+    products.warm_product_views()
+    # Warm-up cache jawaban saat startup (dan berkala) tanpa menahan startup server
+    if settings.WARMUP_ENABLED:
+        queries.warmup_service.start()
+    yield
+    await queries.warmup_service.stop()
+    await queries.ask_job_service.stop()
+    get_catalog_executor().shutdown()
 
 app = FastAPI(
     title="Product Assistant",
     description="Smart product recommendation system",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan,
+    default_response_class=FastJSONResponse
 )
 
 app.add_middleware(
@@ -17,6 +36,16 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+if settings.COMPRESSION_ENABLED:
+    app.add_middleware(
+        CompressionMiddleware,
+        minimum_size=settings.COMPRESSION_MINIMUM_SIZE,
+        gzip_level=settings.COMPRESSION_GZIP_LEVEL,
+        brotli_quality=settings.COMPRESSION_BROTLI_QUALITY,
+        exclude_paths=settings.COMPRESSION_EXCLUDE_PATHS,
+        cache_size=settings.COMPRESSION_CACHE_SIZE
+    )
+
 app.include_router(products.router, prefix="/api/products", tags=["products"])
 app.include_router(queries.router, prefix="/api/queries", tags=["queries"])
 
@@ -26,4 +55,11 @@ async def root():
 
 @app.get("/health")
 async def health_check():
-    return {"status": "healthy", "version": "1.0.0"} 
\ No newline at end of file
+    return {"status": "healthy", "version": "1.0.0"}
+
+@app.get("/ready")
+async def readiness_check():
+    """Readiness probe; optionally waits for the first answer cache warm-up"""
+    if settings.WARMUP_ENABLED and settings.WARMUP_GATE_READINESS and not queries.warmup_service.ready:
+        return JSONResponse(status_code=503, content={"status": "warming_up"})
+    return {"status": "ready", "warmup": queries.warmup_service.last_run}
@@ -40,4 +40,32 @@ class QueryResponse(BaseModel):
     answer: str
     products: List[dict]
     question: str
-    note: Optional[str] = None 
\ No newline at end of file
+    note: Optional[str] = None
+
+class SpecFilters(BaseModel):
+    """Range filters on numeric attributes parsed from product specifications"""
+    min_storage_gb: Optional[float] = Field(default=None, ge=0)
+    max_storage_gb: Optional[float] = Field(default=None, ge=0)
+    min_ram_gb: Optional[float] = Field(default=None, ge=0)
+    max_ram_gb: Optional[float] = Field(default=None, ge=0)
+    min_battery_mah: Optional[float] = Field(default=None, ge=0)
+    max_battery_mah: Optional[float] = Field(default=None, ge=0)
+    min_screen_inch: Optional[float] = Field(default=None, ge=0)
+    max_screen_inch: Optional[float] = Field(default=None, ge=0)
+    min_weight_g: Optional[float] = Field(default=None, ge=0)
+    max_weight_g: Optional[float] = Field(default=None, ge=0)
+
+    def active(self) -> Dict:
+        return self.model_dump(include=set(SpecFilters.model_fields), exclude_none=True)
+
+class SearchSpec(SpecFilters):
+    id: Optional[str] = Field(default=None, description="Client key echoed back in the result")
+    query: Optional[str] = None
+    category: Optional[str] = None
+    brand: Optional[str] = None
+    min_price: Optional[int] = None
+    max_price: Optional[int] = None
+    limit: int = Field(default=10, ge=1, le=100)
+
+class BatchSearchRequest(BaseModel):
+    searches: List[SearchSpec] = Field(..., min_length=1, max_length=20)
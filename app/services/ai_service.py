@@ -1,95 +1,503 @@
+import asyncio
+import json
 import logging
+import re
+import time
+from contextlib import aclosing
+from typing import AsyncIterator, Dict, List, Optional, Tuple
 from google import genai
+from pydantic import BaseModel
 from app.utils.config import get_settings
-from app.services.product_data_service import ProductDataService
+from app.services.product_data_service import get_product_service
+from app.services.request_coalescer import SingleFlight
+from app.services.prompt_builder import PromptBuilder, estimate_tokens
+from app.services.model_router import ModelRouter
+from app.services.warmup_service import QueryStats
+from app.services.session_service import SessionStore, is_follow_up, refine_candidates
+from app.services.llm_provider import create_provider
+from app.services.genai_client import connection_stats, get_shared_client
+from app.services.circuit_breaker import AdaptiveConcurrencyLimiter, CircuitBreaker, LLMUnavailableError
+from app.services.rate_limiter import BACKGROUND, INTERACTIVE, PriorityTokenBucket
+from app.services.retry_policy import RetryPolicy
+from app.utils.cache import TTLCache
 
 # Setup logging
 logger = logging.getLogger(__name__)
 
+FALLBACK_ANSWER = "Maaf, saya sedang mengalami kesulitan untuk memberikan rekomendasi. Silakan coba lagi nanti."
+LOCAL_ANSWER_NOTE = "Rekomendasi AI belum tersedia saat ini, berikut ringkasan produk dari katalog kami."
+
+class StructuredAnswer(BaseModel):
+    """Skema output JSON model: teks jawaban + id produk yang direkomendasikan (urut)"""
+    answer: str
+    product_ids: List[str]
+
 class AIService:
     def __init__(self):
         """Initialize AI service with Google AI API"""
         try:
             settings = get_settings()
-            # Use the new Google AI client
-            self.client = genai.Client(api_key=settings.GOOGLE_API_KEY)
-            self.product_service = ProductDataService()
+            # Use the new Google AI client, dipakai bersama per proses (tidak dibuat jika memakai provider fake)
+            self.client = get_shared_client(settings, genai.Client) if settings.LLM_PROVIDER == "gemini" else None
+            self.llm = create_provider(settings, self.client)
+            self.product_service = get_product_service()
+            self.single_flight = SingleFlight()
+            self.deadline_seconds = settings.LLM_DEADLINE_SECONDS
+            self.answer_cache = TTLCache(
+                max_size=settings.ANSWER_CACHE_SIZE,
+                ttl_seconds=settings.ANSWER_CACHE_TTL_SECONDS
+            )
+            self.prompt_builder = PromptBuilder(
+                token_budget=settings.PROMPT_TOKEN_BUDGET,
+                description_chars=settings.PROMPT_DESCRIPTION_CHARS
+            )
+            self.circuit_breaker = CircuitBreaker(
+                failure_rate_threshold=settings.CIRCUIT_FAILURE_RATE_THRESHOLD,
+                slow_call_seconds=settings.CIRCUIT_SLOW_CALL_SECONDS,
+                slow_call_rate_threshold=settings.CIRCUIT_SLOW_CALL_RATE_THRESHOLD,
+                window_size=settings.CIRCUIT_WINDOW_SIZE,
+                min_calls=settings.CIRCUIT_MIN_CALLS,
+                open_seconds=settings.CIRCUIT_OPEN_SECONDS,
+                half_open_probes=settings.CIRCUIT_HALF_OPEN_PROBES
+            )
+            self.concurrency_limiter = AdaptiveConcurrencyLimiter(
+                initial_limit=settings.LLM_CONCURRENCY_INITIAL,
+                min_limit=settings.LLM_CONCURRENCY_MIN,
+                max_limit=settings.LLM_CONCURRENCY_MAX,
+                latency_target_seconds=settings.LLM_LATENCY_TARGET_SECONDS
+            )
+            self.sessions = SessionStore(
+                max_sessions=settings.SESSION_MAX_SESSIONS,
+                ttl_seconds=settings.SESSION_TTL_SECONDS,
+                max_turns=settings.SESSION_MAX_TURNS
+            )
+            self.session_candidates = settings.SESSION_CANDIDATES
+            self.query_stats = QueryStats(max_entries=settings.QUERY_STATS_MAX_ENTRIES)
+            self.model_router = ModelRouter(
+                fast_model=settings.LLM_FAST_MODEL,
+                strong_model=settings.LLM_STRONG_MODEL,
+                max_simple_words=settings.MODEL_ROUTING_MAX_SIMPLE_WORDS,
+                enabled=settings.MODEL_ROUTING_ENABLED
+            )
+            self.rate_limiter = PriorityTokenBucket(
+                rate_per_second=settings.LLM_RATE_LIMIT_PER_SECOND,
+                burst=settings.LLM_RATE_LIMIT_BURST,
+                max_queue=settings.LLM_RATE_LIMIT_MAX_QUEUE,
+                max_wait_seconds=settings.LLM_RATE_LIMIT_MAX_WAIT_SECONDS
+            )
+            self.retry_policy = RetryPolicy(
+                max_attempts=settings.LLM_RETRY_MAX_ATTEMPTS,
+                base_delay_seconds=settings.LLM_RETRY_BASE_DELAY_SECONDS,
+                max_delay_seconds=settings.LLM_RETRY_MAX_DELAY_SECONDS,
+                budget_ratio=settings.LLM_RETRY_BUDGET_RATIO,
+                budget_min_tokens=settings.LLM_RETRY_BUDGET_MIN_TOKENS,
+                hedge_enabled=settings.LLM_HEDGE_ENABLED,
+                hedge_percentile=settings.LLM_HEDGE_PERCENTILE,
+                hedge_min_samples=settings.LLM_HEDGE_MIN_SAMPLES
+            )
             logger.info("Successfully initialized AI service with Google AI client")
         except Exception as e:
             logger.error(f"Error initializing AI service: {str(e)}")
             raise
 
-    async def get_response(self, question: str) -> str:
-        """Get AI response with product context and fallback message"""
-        try:
-            logger.info(f"Getting AI response for question: {question}")
+    def extract_intent(self, question: str) -> Dict:
+        """Ekstrak kategori dan max_price dari pertanyaan (sederhana)"""
+        category = None
+        max_price = None
+        
+        # Deteksi kategori dengan lebih lengkap (sama dengan API endpoint)
+        question_lower = question.lower()
+        category_mapping = {
+            'laptop': ['laptop', 'notebook', 'komputer'],
+            'smartphone': ['smartphone', 'hp', 'handphone', 'phone', 'telepon', 'ponsel'],
+            'tablet': ['tablet', 'ipad'],
+            'headphone': ['headphone', 'earphone', 'headset', 'audio'],
+            'kamera': ['kamera', 'camera', 'fotografi'],
+            'audio': ['audio', 'speaker', 'sound'],
+            'tv': ['tv', 'televisi'],
+            'drone': ['drone', 'quadcopter'],
+            'jam': ['jam', 'watch', 'smartwatch']
+        }
+        
+        for cat, keywords in category_mapping.items():
+            if any(keyword in question_lower for keyword in keywords):
+                category = cat
+                break
+        
+        # Deteksi budget
+        price_match = re.search(r'(\d+)\s*juta', question_lower)
+        if price_match:
+            max_price = int(price_match.group(1)) * 1000000
+        elif 'budget' in question_lower or 'murah' in question_lower:
+            max_price = 5000000
+        
+        return {"category": category, "max_price": max_price}
 
-            # Ekstrak kategori dan max_price dari pertanyaan (sederhana)
-            import re
-            category = None
-            max_price = None
-            
-            # Deteksi kategori dengan lebih lengkap (sama dengan API endpoint)
-            question_lower = question.lower()
-            category_mapping = {
-                'laptop': ['laptop', 'notebook', 'komputer'],
-                'smartphone': ['smartphone', 'hp', 'handphone', 'phone', 'telepon', 'ponsel'],
-                'tablet': ['tablet', 'ipad'],
-                'headphone': ['headphone', 'earphone', 'headset', 'audio'],
-                'kamera': ['kamera', 'camera', 'fotografi'],
-                'audio': ['audio', 'speaker', 'sound'],
-                'tv': ['tv', 'televisi'],
-                'drone': ['drone', 'quadcopter'],
-                'jam': ['jam', 'watch', 'smartwatch']
-            }
-            
-            for cat, keywords in category_mapping.items():
-                if any(keyword in question_lower for keyword in keywords):
-                    category = cat
-                    break
-            
-            # Deteksi budget
-            price_match = re.search(r'(\d+)\s*juta', question_lower)
-            if price_match:
-                max_price = int(price_match.group(1)) * 1000000
-            elif 'budget' in question_lower or 'murah' in question_lower:
-                max_price = 5000000
+    async def retrieve_products(self, question: str, session_id: Optional[str] = None) -> Tuple[List[Dict], str]:
+        """
+        Cari produk relevan untuk pertanyaan. Return: (list produk, pesan fallback)
+        Dengan session_id, pertanyaan lanjutan ("yang lebih murah?") menyaring kandidat
+        giliran sebelumnya lewat id index tanpa scan katalog, dan intent yang tidak
+        disebut (mis. kategori) diwarisi dari giliran sebelumnya.
+        """
+        intent = self.extract_intent(question)
+        if not session_id:
+            return await self.product_service.smart_search_products(
+                keyword=question, category=intent["category"], max_price=intent["max_price"], limit=5
+            )
 
-            # Gunakan smart_search_products
-            products, fallback_message = await self.product_service.smart_search_products(
-                keyword=question, category=category, max_price=max_price, limit=5
+        session = self.sessions.get(session_id)
+        candidates, fallback_message = [], ''
+        if session and is_follow_up(question, intent, session):
+            previous = [self.product_service.get_product_details(pid) for pid in session["candidate_ids"]]
+            shown = [self.product_service.get_product_details(pid) for pid in session["shown_ids"]]
+            candidates, fallback_message = refine_candidates(
+                question, [p for p in previous if p], [p for p in shown if p]
+            )
+            intent = {**session["intent"], **{k: v for k, v in intent.items() if v}}
+            if candidates:
+                logger.info(f"Refined {len(candidates)} session candidates for follow-up question")
+        elif session and not intent["category"]:
+            intent["category"] = session["intent"].get("category")
+
+        if not candidates:
+            candidates, fallback_message = await self.product_service.smart_search_products(
+                keyword=question, category=intent["category"], max_price=intent["max_price"],
+                limit=self.session_candidates
             )
+        products = candidates[:5]
+        self.sessions.record_retrieval(session_id, question, intent, candidates, products)
+        return products, fallback_message
 
-            # Build context
-            context = f"Question: {question}\n\n"
-            context += f"{fallback_message}\n\n"
-            if products:
-                context += "Relevant Products:\n"
-                for i, product in enumerate(products, 1):
-                    context += f"{i}. {product.get('name', 'Unknown')}\n"
-                    context += f"   Price: Rp {product.get('price', 0):,.0f}\n"
-                    context += f"   Brand: {product.get('brand', 'Unknown')}\n"
-                    context += f"   Category: {product.get('category', 'Unknown')}\n"
-                    context += f"   Rating: {product.get('specifications', {}).get('rating', 0)}/5\n"
-                    context += f"   Description: {product.get('description', 'No description')[:200]}...\n\n"
-            else:
-                context += "No specific products found, but I can provide general recommendations.\n\n"
+    def build_prompt(
+        self,
+        question: str,
+        products: List[Dict],
+        fallback_message: str,
+        history: Optional[List[str]] = None,
+        structured: bool = False
+    ) -> str:
+        """Susun prompt LLM dari pertanyaan, ringkasan percakapan, dan produk hasil retrieval, dalam batas token"""
+        return self.prompt_builder.build(question, products, fallback_message, history, structured)
 
-            # Create prompt
-            prompt = f"""You are a helpful product assistant. Based on the following context, provide a helpful and informative response:\n\n{context}\n\nPlease provide a clear and concise answer that helps the user understand the products and make an informed decision. Focus on being helpful and natural in your response."""
+    def question_key(self, question: str) -> Tuple[str, str]:
+        """Key pertanyaan ter-normalisasi + versi katalog (untuk coalescing/cache)"""
+        normalized = " ".join(re.sub(r"[^\w\s]", " ", question.lower()).split())
+        return normalized, self.product_service.catalog_version
 
-            # Generate response using new API format
-            response = self.client.models.generate_content(
-                model="gemini-2.5-flash",
-                contents=prompt
+    def build_local_answer(self, products: List[Dict], fallback_message: str) -> str:
+        """Jawaban deterministik tanpa LLM, disusun dari produk hasil retrieval"""
+        lines = [LOCAL_ANSWER_NOTE]
+        if fallback_message:
+            lines.append(fallback_message)
+        for i, product in enumerate(products, 1):
+            lines.append(
+                f"{i}. {product.get('name', 'Unknown')} ({product.get('brand', 'Unknown')}) - "
+                f"Rp {product.get('price', 0):,.0f}, rating {product.get('specifications', {}).get('rating', 0)}/5"
             )
+        return "\n".join(lines)
+
+    def _enter_llm_guard(self):
+        """Cek circuit breaker lalu ambil slot concurrency; raise LLMUnavailableError jika ditolak"""
+        self.circuit_breaker.before_call()
+        try:
+            self.concurrency_limiter.acquire()
+        except LLMUnavailableError:
+            self.circuit_breaker.release()
+            raise
+
+    def _cancel_llm_guard(self):
+        self.concurrency_limiter.cancel()
+        self.circuit_breaker.release()
+
+    async def _acquire_llm(self, priority: int = INTERACTIVE) -> float:
+        """
+        Circuit breaker open -> gagal cepat tanpa antri. Selain itu token rate limit (menunggu di
+        antrian berprioritas) dulu, baru guard, sehingga slot concurrency dan probe half-open hanya
+        dipegang oleh panggilan yang benar-benar berjalan.
+        Return: waktu mulai panggilan (latency tidak termasuk waktu antri)
+        """
+        self.circuit_breaker.check()
+        await self.rate_limiter.acquire(priority)
+        self._enter_llm_guard()
+        return time.monotonic()
+
+    def _acquire_llm_blocking(self, priority: int = BACKGROUND) -> float:
+        """Versi sync dari _acquire_llm untuk pemanggil non-async"""
+        self.circuit_breaker.check()
+        self.rate_limiter.acquire_blocking(priority)
+        self._enter_llm_guard()
+        return time.monotonic()
+
+    def _exit_llm_guard(self, started: float, success: bool, model: str, prompt: str, output: str = ''):
+        latency = time.monotonic() - started
+        self.concurrency_limiter.release(success, latency)
+        self.circuit_breaker.record(success, latency)
+        self.model_router.record(model, latency, estimate_tokens(prompt), estimate_tokens(output), success)
+
+    async def _call_llm(self, model: str, contents: str, priority: int = INTERACTIVE, response_schema=None):
+        """
+        Panggilan LLM dengan retry policy bersama (backoff + jitter, retry budget);
+        permintaan interaktif boleh di-hedge. Setiap attempt melewati guard sendiri.
+        """
+        return await self.retry_policy.run(
+            lambda: self._call_llm_once(model, contents, priority, response_schema),
+            hedge=priority == INTERACTIVE
+        )
+
+    async def _call_llm_once(self, model: str, contents: str, priority: int = INTERACTIVE, response_schema=None):
+        """Panggilan generate (di thread) yang dilindungi circuit breaker, limit concurrency, dan rate limit"""
+        started = await self._acquire_llm(priority)
+        call = asyncio.ensure_future(asyncio.to_thread(self.llm.generate, model, contents, response_schema))
+        call.add_done_callback(lambda task: self._finish_llm_call(task, started, model, contents))
+        # Thread tidak bisa dibatalkan: jika attempt ini dibatalkan (hedge yang kalah), hanya await-nya
+        # yang berhenti; guard tetap dipegang sampai generate benar-benar selesai
+        return await asyncio.shield(call)
+
+    def _finish_llm_call(self, task: asyncio.Future, started: float, model: str, contents: str):
+        """Done-callback panggilan generate di thread: lepas guard dan catat hasil saat panggilan selesai"""
+        if task.cancelled():
+            self._cancel_llm_guard()
+        elif task.exception() is not None:
+            self._exit_llm_guard(started, False, model, contents)
+        else:
+            self._exit_llm_guard(started, True, model, contents, task.result().text or '')
+
+    def _call_llm_once_blocking(self, model: str, contents: str):
+        """Versi sync dari _call_llm_once (prioritas background) untuk pemanggil non-async"""
+        started = self._acquire_llm_blocking(BACKGROUND)
+        try:
+            response = self.llm.generate(model, contents)
+        except Exception:
+            self._exit_llm_guard(started, False, model, contents)
+            raise
+        self._exit_llm_guard(started, True, model, contents, response.text or '')
+        return response
+
+    def get_metrics(self) -> Dict:
+        """Status circuit breaker, limit concurrency, rate limit, retry, koneksi HTTP, coalescing, dan cache jawaban"""
+        return {
+            "circuit_breaker": self.circuit_breaker.snapshot(),
+            "concurrency": self.concurrency_limiter.snapshot(),
+            "rate_limiter": self.rate_limiter.snapshot(),
+            "retry": self.retry_policy.snapshot(),
+            "models": self.model_router.snapshot(),
+            "http": connection_stats.snapshot(),
+            "single_flight": {
+                "calls": self.single_flight.calls,
+                "coalesced": self.single_flight.coalesced,
+                "in_flight": self.single_flight.in_flight()
+            },
+            "answer_cache": {"size": len(self.answer_cache)},
+            "sessions": {"active": len(self.sessions)}
+        }
+
+    async def get_response(
+        self,
+        question: str,
+        priority: int = INTERACTIVE,
+        record: bool = True,
+        session_id: Optional[str] = None,
+        retrieved: Optional[Tuple[List[Dict], str]] = None
+    ) -> str:
+        """Get AI response text (lihat get_structured_response)"""
+        result = await self.get_structured_response(question, priority, record, session_id, retrieved)
+        return result["answer"]
+
+    async def get_structured_response(
+        self,
+        question: str,
+        priority: int = INTERACTIVE,
+        record: bool = True,
+        session_id: Optional[str] = None,
+        retrieved: Optional[Tuple[List[Dict], str]] = None
+    ) -> Dict:
+        """
+        Get AI response with product context and fallback message.
+        Return: {"answer", "product_ids", "note"}; product_ids adalah id produk yang
+        direkomendasikan (urut), sudah divalidasi terhadap id index katalog.
+        Jawaban yang sudah ada di cache langsung dikembalikan; pertanyaan identik
+        yang sedang diproses berbagi satu panggilan LLM.
+        record=False untuk pemanggil internal (warm-up) agar tidak dihitung di statistik pertanyaan.
+        Dengan session_id, jawaban bergantung pada percakapan sehingga tidak memakai cache/coalescing.
+        retrieved berisi hasil retrieve_products yang sudah dijalankan pemanggil (tidak di-retrieve ulang).
+        """
+        if session_id:
+            if record:
+                self.query_stats.record(self.question_key(question), question)
+            if retrieved is None:
+                retrieved = await self.retrieve_products(question, session_id)
+            history = self.sessions.history_lines(session_id)
+            result = await self._generate_answer(question, None, priority, retrieved, history)
+            self.sessions.record_answer(session_id, result["answer"])
+            return result
+
+        key = self.question_key(question)
+        if record:
+            self.query_stats.record(key, question)
+        cached = self.answer_cache.get(key)
+        if cached is not None:
+            logger.info("Returning cached AI response")
+            return cached
+        return await self.single_flight.do(key, lambda: self._generate_answer(question, key, priority, retrieved))
+
+    def parse_structured_answer(self, text: str, products: List[Dict], fallback_message: str) -> Dict:
+        """
+        Parse output JSON model. product_ids yang tidak ada di katalog dibuang; jika output
+        bukan JSON atau tidak ada id yang valid, pakai teks apa adanya dan produk hasil retrieval.
+        """
+        answer, product_ids = (text or '').strip(), []
+        try:
+            data = json.loads(re.sub(r"^```(?:json)?\s*|\s*```$", "", answer))
+            if isinstance(data, dict) and isinstance(data.get("answer"), str):
+                answer = data["answer"].strip()
+                product_ids = [str(pid) for pid in data.get("product_ids") or [] if isinstance(pid, (str, int))]
+        except ValueError:
+            logger.warning("AI response is not valid JSON, using raw text")
+
+        valid_ids = []
+        for pid in product_ids:
+            if pid not in valid_ids and self.product_service.get_product_details(pid) is not None:
+                valid_ids.append(pid)
+        if not valid_ids:
+            valid_ids = [p.get('id') for p in products if p.get('id')]
+        return {"answer": answer, "product_ids": valid_ids, "note": fallback_message}
+
+    def _local_result(self, products: List[Dict], fallback_message: str) -> Dict:
+        return {
+            "answer": self.build_local_answer(products, fallback_message),
+            "product_ids": [p.get('id') for p in products if p.get('id')],
+            "note": fallback_message
+        }
+
+    async def _generate_answer(
+        self,
+        question: str,
+        key: Optional[Tuple[str, str]],
+        priority: int = INTERACTIVE,
+        retrieved: Optional[Tuple[List[Dict], str]] = None,
+        history: Optional[List[str]] = None
+    ) -> Dict:
+        """
+        Retrieval + prompt + satu panggilan LLM (output JSON) dengan deadline.
+        Jika LLM belum menjawab saat deadline, kembalikan jawaban lokal; hasil LLM
+        yang datang terlambat disimpan ke cache untuk pertanyaan yang sama berikutnya.
+        Jika circuit breaker open atau limit concurrency penuh, langsung pakai jawaban lokal.
+        key=None berarti jawaban tidak disimpan ke cache.
+        """
+        products, fallback_message = [], ''
+        try:
+            logger.info(f"Getting AI response for question: {question}")
+            started = time.monotonic()
+
+            # Gunakan smart_search_products
+            products, fallback_message = retrieved if retrieved is not None else await self.retrieve_products(question)
+            prompt = self.build_prompt(question, products, fallback_message, history, structured=True)
+
+            # Generate response using new API format (di thread agar deadline bisa ditegakkan)
+            model = self.model_router.choose(question, self.extract_intent(question), products, fallback_message)
+            llm_task = asyncio.ensure_future(self._call_llm(
+                model=model, contents=prompt, priority=priority, response_schema=StructuredAnswer
+            ))
+            # Task yang ditinggal (deadline/cancel) tetap diamati sampai selesai agar errornya terambil
+            def finish_late(task: asyncio.Future):
+                self._store_late_answer(key, task, products, fallback_message)
+
+            remaining = max(self.deadline_seconds - (time.monotonic() - started), 0)
+            try:
+                response = await asyncio.wait_for(asyncio.shield(llm_task), timeout=remaining)
+            except LLMUnavailableError as e:
+                logger.warning(f"Skipping AI call ({str(e)}), returning local answer")
+                return self._local_result(products, fallback_message)
+            except asyncio.TimeoutError:
+                logger.warning(f"AI response missed the {self.deadline_seconds}s deadline, returning local answer")
+                llm_task.add_done_callback(finish_late)
+                return self._local_result(products, fallback_message)
+            except asyncio.CancelledError:
+                llm_task.add_done_callback(finish_late)
+                raise
             
             logger.info("Successfully generated AI response")
-            return response.text
+            result = self.parse_structured_answer(response.text, products, fallback_message)
+            if key is not None:
+                self.answer_cache.set(key, result)
+            return result
         
         except Exception as e:
             logger.error(f"Error generating AI response: {str(e)}")
-            return "Maaf, saya sedang mengalami kesulitan untuk memberikan rekomendasi. Silakan coba lagi nanti."
+            return {
+                "answer": FALLBACK_ANSWER,
+                "product_ids": [p.get('id') for p in products if p.get('id')],
+                "note": fallback_message
+            }
+
+    def _store_late_answer(
+        self, key: Optional[Tuple[str, str]], task: asyncio.Future, products: List[Dict], fallback_message: str
+    ):
+        """
+        Done-callback panggilan LLM yang ditinggal: selalu mengambil exception task, lalu
+        menyimpan jawaban yang datang setelah deadline ke cache jika ada key (bukan jalur sesi).
+        """
+        if task.cancelled() or task.exception() is not None:
+            logger.warning("Late AI response failed, nothing cached")
+            return
+        if key is None:
+            return
+        self.answer_cache.set(key, self.parse_structured_answer(task.result().text, products, fallback_message))
+        logger.info("Cached late AI response")
+
+    async def stream_response(
+        self, question: str, products: List[Dict], fallback_message: str, session_id: Optional[str] = None
+    ) -> AsyncIterator[str]:
+        """
+        Stream jawaban AI per potongan teks untuk produk yang sudah di-retrieve.
+        Jika model gagal sebelum mengirim teks apa pun, kirim pesan fallback.
+        """
+        sent_any = False
+        history = self.sessions.history_lines(session_id) if session_id else None
+        prompt = self.build_prompt(question, products, fallback_message, history)
+        model = self.model_router.choose(question, self.extract_intent(question), products, fallback_message)
+        streamed = []
+        try:
+            attempts = self.retry_policy.stream(lambda: self._stream_llm_once(model, prompt))
+            async with aclosing(attempts) as chunks:
+                async for chunk in chunks:
+                    if chunk.text:
+                        sent_any = True
+                        streamed.append(chunk.text)
+                        yield chunk.text
+        except LLMUnavailableError as e:
+            logger.warning(f"Skipping AI stream ({str(e)}), returning local answer")
+            yield self.build_local_answer(products, fallback_message)
+            return
+        except Exception as e:
+            logger.error(f"Error streaming AI response: {str(e)}")
+            if not sent_any:
+                yield FALLBACK_ANSWER
+            return
+
+        logger.info("Successfully streamed AI response")
+        if session_id:
+            self.sessions.record_answer(session_id, "".join(streamed))
+
+    async def _stream_llm_once(self, model: str, prompt: str) -> AsyncIterator:
+        """Satu attempt streaming dengan guard sendiri (rate limit, circuit breaker, limit concurrency)"""
+        started = await self._acquire_llm(INTERACTIVE)
+        streamed = []
+        try:
+            async with aclosing(self.llm.generate_stream(model, prompt)) as chunks:
+                async for chunk in chunks:
+                    if chunk.text:
+                        streamed.append(chunk.text)
+                    yield chunk
+        except (asyncio.CancelledError, GeneratorExit):
+            # Klien memutus SSE sebelum selesai: bukan kegagalan model, lepas guard tanpa mencatat sampel
+            self._cancel_llm_guard()
+            raise
+        except Exception:
+            self._exit_llm_guard(started, False, model, prompt, "".join(streamed))
+            raise
+        self._exit_llm_guard(started, True, model, prompt, "".join(streamed))
 
     def generate_response(self, context: str) -> str:
         """Generate response using Google AI (legacy method)"""
@@ -103,11 +511,9 @@ class AIService:
 
 Please provide a clear and concise answer that helps the user understand the products and make an informed decision."""
 
-            # Generate response using new API format
-            response = self.client.models.generate_content(
-                model="gemini-2.0-flash",
-                contents=prompt
-            )
+            # Generate response using new API format (prioritas background, ditolak cepat jika kuota penuh)
+            model = self.model_router.fast_model
+            response = self.retry_policy.run_blocking(lambda: self._call_llm_once_blocking(model, prompt))
             
             logger.info("Successfully generated AI response")
             return response.text
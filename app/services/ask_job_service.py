@@ -0,0 +1,126 @@
+import asyncio
+import logging
+import uuid
+from typing import Dict, List, Optional
+
+from app.utils.cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+PENDING = "pending"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+
+class JobQueueFull(Exception):
+    """Antrian job ask sudah penuh"""
+
+
+class AskJobService:
+    """
+    Mode ask asinkron: submit langsung mengembalikan job id beserta produk hasil retrieval,
+    jawaban LLM (beserta produk rekomendasi, seperti /ask) dikerjakan oleh pool worker dengan jumlah terbatas lalu disimpan di
+    TTLCache sampai diambil lewat polling / long-polling. Concurrency HTTP jadi tidak
+    terikat dengan concurrency LLM.
+    """
+
+    def __init__(self, ai_service, workers: int = 4, max_pending: int = 100, result_ttl_seconds: float = 600, max_jobs: int = 1000):
+        self.ai_service = ai_service
+        self.workers = workers
+        self.max_pending = max_pending
+        self.jobs = TTLCache(max_size=max_jobs, ttl_seconds=result_ttl_seconds)
+        self._events: Dict[str, asyncio.Event] = {}
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def _ensure_workers(self):
+        # Worker dibuat saat submit pertama agar terikat ke event loop yang sedang berjalan
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop = loop
+            self._queue = asyncio.Queue()
+            self._tasks = []
+        self._tasks = [task for task in self._tasks if not task.done()]
+        while len(self._tasks) < self.workers:
+            self._tasks.append(asyncio.ensure_future(self._worker()))
+
+    async def submit(self, question: str, session_id: Optional[str] = None) -> Dict:
+        """Buat job baru; raise JobQueueFull jika antrian penuh"""
+        self._ensure_workers()
+        if self._queue.qsize() >= self.max_pending:
+            raise JobQueueFull(f"{self.max_pending} ask jobs already pending")
+        products, fallback_message = await self.ai_service.retrieve_products(question, session_id)
+        job = {
+            "job_id": uuid.uuid4().hex,
+            "status": PENDING,
+            "question": question,
+            "products": products,
+            "note": fallback_message,
+            "answer": None,
+            "product_ids": [],
+            "error": None,
+            "session_id": session_id,
+        }
+        self.jobs.set(job["job_id"], job)
+        self._events[job["job_id"]] = asyncio.Event()
+        self._queue.put_nowait(job["job_id"])
+        return job
+
+    async def _worker(self):
+        while True:
+            job_id = await self._queue.get()
+            try:
+                job = self.jobs.get(job_id)
+                if job is None:
+                    continue
+                job["status"] = RUNNING
+                try:
+                    # Jawaban dibangun dari produk yang sudah di-retrieve saat submit (tanpa retrieval ulang)
+                    result = await self.ai_service.get_structured_response(
+                        job["question"], session_id=job["session_id"], retrieved=(job["products"], job["note"])
+                    )
+                    # Sama seperti /ask: produk = rekomendasi model, di-resolve dari katalog berdasarkan id
+                    job["answer"] = result["answer"]
+                    job["product_ids"] = result["product_ids"]
+                    job["products"] = self.ai_service.product_service.get_products_by_ids(result["product_ids"])
+                    job["note"] = result["note"]
+                    job["status"] = DONE
+                except Exception as e:
+                    logger.error(f"Ask job {job_id} failed: {str(e)}")
+                    job["status"] = FAILED
+                    job["error"] = "Error processing question"
+                # Simpan ulang agar TTL dihitung dari waktu selesai
+                self.jobs.set(job_id, job)
+            finally:
+                event = self._events.pop(job_id, None)
+                if event is not None:
+                    event.set()
+                self._queue.task_done()
+
+    def get(self, job_id: str) -> Optional[Dict]:
+        return self.jobs.get(job_id)
+
+    async def wait(self, job_id: str, timeout: float) -> Optional[Dict]:
+        """Long-poll: tunggu job selesai paling lama timeout detik, lalu kembalikan status terbaru"""
+        event = self._events.get(job_id)
+        if event is not None and timeout > 0:
+            try:
+                await asyncio.wait_for(event.wait(), timeout=timeout)
+            except asyncio.TimeoutError:
+                pass
+        return self.get(job_id)
+
+    def stats(self) -> Dict:
+        return {
+            "workers": len([task for task in self._tasks if not task.done()]),
+            "pending": self._queue.qsize() if self._queue else 0,
+            "stored": len(self.jobs),
+        }
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
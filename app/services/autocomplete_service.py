@@ -0,0 +1,68 @@
+import heapq
+import logging
+import re
+from bisect import bisect_left
+from typing import Dict, List, Tuple
+
+logger = logging.getLogger(__name__)
+
+WORD_START = re.compile(r"(?:^|[\s\-/(])(?=\w)")
+# Batas atas rentang prefix di sorted array: prefix + karakter terbesar
+PREFIX_END = chr(0x10FFFF)
+
+
+class CompletionIndex:
+    """
+    Index autocomplete berbasis sorted array.
+    Setiap istilah diindeks pada awal setiap katanya, sehingga "pro" cocok dengan
+    "iPhone 15 Pro". Lookup = bisect kedua ujung rentang prefix, lalu seluruh rentang
+    diranking (top-k dengan heap), tanpa menyentuh katalog.
+    """
+
+    def __init__(self):
+        self._terms: Dict[str, Tuple[str, str, float]] = {}
+        self._keys: List[str] = []
+        self._entries: List[Tuple[str, str, str, float]] = []
+
+    def add(self, text: str, kind: str, weight: float = 1.0):
+        """Tambah istilah; istilah yang sama disimpan sekali dengan bobot tertinggi"""
+        text = (text or '').strip()
+        if not text:
+            return
+        normalized = text.lower()
+        existing = self._terms.get(normalized)
+        if existing is None or weight > existing[2]:
+            self._terms[normalized] = (text, kind, weight)
+
+    def build(self):
+        """Susun ulang sorted array dari semua istilah yang terdaftar"""
+        entries = []
+        for normalized, (text, kind, weight) in self._terms.items():
+            starts = {m.end() for m in WORD_START.finditer(normalized)}
+            for start in starts:
+                entries.append((normalized[start:], text, kind, weight))
+        entries.sort(key=lambda entry: entry[0])
+        self._entries = entries
+        self._keys = [entry[0] for entry in entries]
+        logger.info(f"Built completion index with {len(self._terms)} terms")
+
+    def complete(self, prefix: str, limit: int = 8) -> List[Dict]:
+        """Return istilah dengan prefix tertentu, diurutkan berdasarkan bobot lalu panjang"""
+        prefix = (prefix or '').strip().lower()
+        if not prefix or limit <= 0:
+            return []
+
+        matches = {}
+        start = bisect_left(self._keys, prefix)
+        end = bisect_left(self._keys, prefix + PREFIX_END, lo=start)
+        for _, text, kind, weight in self._entries[start:end]:
+            # Cocok di awal istilah lebih relevan daripada di tengah
+            score = weight + (1.0 if text.lower().startswith(prefix) else 0.0)
+            if score > matches.get(text, (None, -1.0))[1]:
+                matches[text] = (kind, score)
+
+        ranked = heapq.nsmallest(limit, matches.items(), key=lambda item: (-item[1][1], len(item[0]), item[0]))
+        return [{"text": text, "type": kind} for text, (kind, _) in ranked]
+
+    def __len__(self):
+        return len(self._terms)
@@ -0,0 +1,106 @@
+import asyncio
+import logging
+import multiprocessing
+import threading
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from functools import lru_cache
+from typing import Dict, List, Optional
+
+from app.services.local_product_service import LocalProductService
+from app.utils.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+EXECUTOR_MODES = ("thread", "process")
+
+# Worker process dibuat dengan spawn, bukan fork: server sudah menjalankan banyak thread
+# (event loop, default executor, AI service) sehingga fork bisa mewarisi lock yang sedang
+# dipegang thread lain dan deadlock (serta DeprecationWarning di Python 3.12+)
+WORKER_START_METHOD = "spawn"
+
+# LocalProductService milik worker process, dibangun sekali oleh initializer
+_worker_service: Optional[LocalProductService] = None
+
+
+def _init_worker(products: List[Dict]):
+    global _worker_service
+    _worker_service = LocalProductService(products=products)
+
+
+def _run_in_worker(method: str, args: tuple):
+    return getattr(_worker_service, method)(*args)
+
+
+class CatalogExecutor:
+    """
+    Kebijakan eksekusi pekerjaan katalog: lookup ber-index yang murah (id, permutasi
+    sort, daftar brand/kategori) dipanggil inline oleh ProductDataService, sedangkan
+    scan/filter berat dijalankan lewat run() di pool khusus dengan jumlah worker terbatas,
+    sehingga tidak memblok event loop maupun default executor.
+    mode="process" memakai ProcessPoolExecutor (bebas GIL) dengan start method spawn; setiap
+    worker membangun LocalProductService sekali dari snapshot produk di initializer. Pool
+    melayani katalog yang dipakai saat pool dibuat.
+    Satu instance per proses (get_catalog_executor), sehingga jumlah worker benar-benar terbatas.
+    """
+
+    def __init__(self, mode: str = "thread", max_workers: int = 4):
+        if mode not in EXECUTOR_MODES:
+            raise ValueError(f"Unknown catalog executor mode: {mode}")
+        self.mode = mode
+        self.max_workers = max_workers
+        self._pool: Optional[Executor] = None
+        self._lock = threading.Lock()
+        self.submitted = 0
+        self.in_flight = 0
+
+    def _get_pool(self, local_service) -> Executor:
+        with self._lock:
+            if self._pool is None:
+                if self.mode == "process":
+                    self._pool = ProcessPoolExecutor(
+                        max_workers=self.max_workers,
+                        mp_context=multiprocessing.get_context(WORKER_START_METHOD),
+                        initializer=_init_worker,
+                        initargs=(local_service.products,),
+                    )
+                else:
+                    self._pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="catalog")
+                logger.info(f"Started catalog {self.mode} pool with {self.max_workers} workers")
+            return self._pool
+
+    async def run(self, local_service, method: str, *args):
+        """Jalankan local_service.<method>(*args) di pool (di process pool: milik worker)"""
+        pool = self._get_pool(local_service)
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            self.submitted += 1
+            self.in_flight += 1
+        try:
+            if self.mode == "process":
+                return await loop.run_in_executor(pool, _run_in_worker, method, args)
+            return await loop.run_in_executor(pool, getattr(local_service, method), *args)
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            return {
+                "mode": self.mode,
+                "workers": self.max_workers,
+                "submitted": self.submitted,
+                "in_flight": self.in_flight,
+            }
+
+    def shutdown(self):
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+
+@lru_cache()
+def get_catalog_executor() -> CatalogExecutor:
+    """CatalogExecutor bersama per proses; di-shutdown sekali oleh lifespan aplikasi"""
+    settings = get_settings()
+    return CatalogExecutor(mode=settings.CATALOG_EXECUTOR_MODE, max_workers=settings.CATALOG_EXECUTOR_WORKERS)
@@ -0,0 +1,184 @@
+import logging
+import threading
+import time
+from collections import deque
+from typing import Dict
+
+logger = logging.getLogger(__name__)
+
+
+class LLMUnavailableError(Exception):
+    """Panggilan LLM ditolak secara lokal (tanpa menghubungi backend)"""
+
+
+class CircuitOpenError(LLMUnavailableError):
+    """Circuit breaker sedang open"""
+
+
+class ConcurrencyLimitExceeded(LLMUnavailableError):
+    """Batas concurrency adaptif sedang penuh"""
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker berbasis sliding window atas N panggilan terakhir.
+    CLOSED -> OPEN jika rasio error atau rasio panggilan lambat melewati threshold.
+    OPEN -> HALF_OPEN setelah open_seconds; beberapa probe diizinkan lewat,
+    jika semuanya sukses kembali CLOSED, jika ada yang gagal kembali OPEN.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(
+        self,
+        failure_rate_threshold: float = 0.5,
+        slow_call_seconds: float = 10.0,
+        slow_call_rate_threshold: float = 0.8,
+        window_size: int = 20,
+        min_calls: int = 5,
+        open_seconds: float = 30.0,
+        half_open_probes: int = 2,
+    ):
+        self.failure_rate_threshold = failure_rate_threshold
+        self.slow_call_seconds = slow_call_seconds
+        self.slow_call_rate_threshold = slow_call_rate_threshold
+        self.min_calls = min_calls
+        self.open_seconds = open_seconds
+        self.half_open_probes = half_open_probes
+        self.state = self.CLOSED
+        self._window = deque(maxlen=window_size)
+        self._opened_at = 0.0
+        self._probes_in_flight = 0
+        self._probe_successes = 0
+        self._rejected = 0
+        self._lock = threading.Lock()
+
+    def before_call(self):
+        """Raise CircuitOpenError jika panggilan tidak boleh dilakukan"""
+        with self._lock:
+            if self.state == self.OPEN:
+                if time.monotonic() - self._opened_at < self.open_seconds:
+                    self._rejected += 1
+                    raise CircuitOpenError("LLM circuit breaker is open")
+                self._transition(self.HALF_OPEN)
+            if self.state == self.HALF_OPEN:
+                if self._probes_in_flight >= self.half_open_probes:
+                    self._rejected += 1
+                    raise CircuitOpenError("LLM circuit breaker is half-open, probes in flight")
+                self._probes_in_flight += 1
+
+    def check(self):
+        """
+        Cek tanpa mengambil izin (state tidak berubah): raise CircuitOpenError jika panggilan
+        saat ini pasti ditolak, agar pemanggil gagal cepat sebelum menunggu sumber daya lain
+        """
+        with self._lock:
+            now = time.monotonic()
+            if self.state == self.OPEN and now - self._opened_at < self.open_seconds:
+                self._rejected += 1
+                raise CircuitOpenError("LLM circuit breaker is open")
+            if self.state == self.HALF_OPEN and self._probes_in_flight >= self.half_open_probes:
+                self._rejected += 1
+                raise CircuitOpenError("LLM circuit breaker is half-open, probes in flight")
+
+    def record(self, success: bool, latency: float):
+        """Catat hasil panggilan yang sudah diizinkan oleh before_call"""
+        slow = latency >= self.slow_call_seconds
+        with self._lock:
+            if self.state == self.HALF_OPEN:
+                self._probes_in_flight = max(self._probes_in_flight - 1, 0)
+                if not success or slow:
+                    self._transition(self.OPEN)
+                    return
+                self._probe_successes += 1
+                if self._probe_successes >= self.half_open_probes:
+                    self._transition(self.CLOSED)
+                return
+
+            self._window.append((success, slow))
+            if self.state == self.CLOSED and len(self._window) >= self.min_calls:
+                failure_rate = sum(1 for ok, _ in self._window if not ok) / len(self._window)
+                slow_rate = sum(1 for _, was_slow in self._window if was_slow) / len(self._window)
+                if failure_rate >= self.failure_rate_threshold or slow_rate >= self.slow_call_rate_threshold:
+                    logger.warning(f"Opening LLM circuit: failure_rate={failure_rate:.2f}, slow_rate={slow_rate:.2f}")
+                    self._transition(self.OPEN)
+
+    def release(self):
+        """Kembalikan izin dari before_call untuk panggilan yang akhirnya tidak dilakukan"""
+        with self._lock:
+            if self.state == self.HALF_OPEN:
+                self._probes_in_flight = max(self._probes_in_flight - 1, 0)
+
+    def _transition(self, state: str):
+        logger.info(f"LLM circuit breaker: {self.state} -> {state}")
+        self.state = state
+        self._probes_in_flight = 0
+        self._probe_successes = 0
+        if state == self.OPEN:
+            self._opened_at = time.monotonic()
+        if state == self.CLOSED:
+            self._window.clear()
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            calls = len(self._window)
+            return {
+                "state": self.state,
+                "window_calls": calls,
+                "failure_rate": round(sum(1 for ok, _ in self._window if not ok) / calls, 3) if calls else 0.0,
+                "slow_rate": round(sum(1 for _, slow in self._window if slow) / calls, 3) if calls else 0.0,
+                "rejected": self._rejected,
+            }
+
+
+class AdaptiveConcurrencyLimiter:
+    """
+    Batas jumlah panggilan LLM paralel dengan AIMD:
+    setiap sukses di bawah latency target menaikkan limit sebesar 1/limit
+    (~+1 per satu "putaran" penuh), error atau panggilan lambat mengalikan limit
+    dengan decrease_factor. Permintaan di atas limit langsung ditolak.
+    """
+
+    def __init__(
+        self,
+        initial_limit: int = 8,
+        min_limit: int = 1,
+        max_limit: int = 64,
+        latency_target_seconds: float = 5.0,
+        decrease_factor: float = 0.5,
+    ):
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.latency_target_seconds = latency_target_seconds
+        self.decrease_factor = decrease_factor
+        self.limit = float(initial_limit)
+        self.in_flight = 0
+        self._rejected = 0
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Raise ConcurrencyLimitExceeded jika limit penuh"""
+        with self._lock:
+            if self.in_flight >= int(self.limit):
+                self._rejected += 1
+                raise ConcurrencyLimitExceeded(f"LLM concurrency limit {int(self.limit)} reached")
+            self.in_flight += 1
+
+    def release(self, success: bool, latency: float):
+        with self._lock:
+            self.in_flight = max(self.in_flight - 1, 0)
+            if success and latency <= self.latency_target_seconds:
+                self.limit = min(self.limit + 1 / self.limit, float(self.max_limit))
+            else:
+                self.limit = max(self.limit * self.decrease_factor, float(self.min_limit))
+
+    def cancel(self):
+        """Kembalikan slot tanpa mengubah limit (panggilan tidak jadi dilakukan)"""
+        with self._lock:
+            self.in_flight = max(self.in_flight - 1, 0)
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            return {"limit": int(self.limit), "in_flight": self.in_flight, "rejected": self._rejected}
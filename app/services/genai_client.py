@@ -0,0 +1,119 @@
+import importlib.util
+import logging
+import threading
+from collections import Counter
+from typing import Callable, Dict, Tuple
+
+import httpx
+from google.genai import types
+
+logger = logging.getLogger(__name__)
+
+HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+
+
+class ConnectionStats:
+    """
+    Statistik reuse koneksi HTTP ke Gemini, dihitung dari event hook httpx dan
+    trace extension httpcore: setiap request, koneksi TCP baru, dan TLS handshake.
+    Request yang tidak membuka koneksi baru berarti memakai ulang koneksi keep-alive.
+    """
+
+    def __init__(self):
+        self.requests = 0
+        self.connections_opened = 0
+        self.tls_handshakes = 0
+        self.http_versions = Counter()
+        self._lock = threading.Lock()
+
+    def _trace(self, event_name: str, info: Dict):
+        if event_name == "connection.connect_tcp.complete":
+            with self._lock:
+                self.connections_opened += 1
+        elif event_name == "connection.start_tls.complete":
+            with self._lock:
+                self.tls_handshakes += 1
+
+    async def _atrace(self, event_name: str, info: Dict):
+        self._trace(event_name, info)
+
+    def on_request(self, request: httpx.Request):
+        with self._lock:
+            self.requests += 1
+        request.extensions["trace"] = self._trace
+
+    async def on_request_async(self, request: httpx.Request):
+        with self._lock:
+            self.requests += 1
+        request.extensions["trace"] = self._atrace
+
+    def on_response(self, response: httpx.Response):
+        with self._lock:
+            self.http_versions[response.http_version] += 1
+
+    async def on_response_async(self, response: httpx.Response):
+        self.on_response(response)
+
+    def event_hooks(self, asynchronous: bool = False) -> Dict:
+        if asynchronous:
+            return {"request": [self.on_request_async], "response": [self.on_response_async]}
+        return {"request": [self.on_request], "response": [self.on_response]}
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            reused = max(self.requests - self.connections_opened, 0)
+            return {
+                "requests": self.requests,
+                "connections_opened": self.connections_opened,
+                "connections_reused": reused,
+                "reuse_ratio": round(reused / self.requests, 3) if self.requests else 0.0,
+                "tls_handshakes": self.tls_handshakes,
+                "http_versions": dict(self.http_versions),
+            }
+
+
+connection_stats = ConnectionStats()
+
+
+def build_client_args(settings, stats: ConnectionStats = connection_stats, asynchronous: bool = False) -> Dict:
+    """Argumen httpx.Client/AsyncClient: pool koneksi, keep-alive, HTTP/2 (jika h2 terpasang), hook statistik"""
+    http2 = settings.LLM_HTTP2_ENABLED and HTTP2_AVAILABLE
+    if settings.LLM_HTTP2_ENABLED and not HTTP2_AVAILABLE:
+        logger.info("h2 is not installed, using HTTP/1.1 for the Gemini client")
+    return {
+        "limits": httpx.Limits(
+            max_connections=settings.LLM_HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.LLM_HTTP_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=settings.LLM_HTTP_KEEPALIVE_EXPIRY_SECONDS,
+        ),
+        "http2": http2,
+        "event_hooks": stats.event_hooks(asynchronous),
+    }
+
+
+def build_http_options(settings, stats: ConnectionStats = connection_stats) -> types.HttpOptions:
+    """HttpOptions genai; timeout per request dalam milidetik (menimpa timeout httpx client)"""
+    return types.HttpOptions(
+        timeout=int(settings.LLM_HTTP_TIMEOUT_SECONDS * 1000),
+        client_args=build_client_args(settings, stats),
+        async_client_args=build_client_args(settings, stats, asynchronous=True),
+    )
+
+
+_shared_clients: Dict[Tuple[Callable, str], object] = {}
+_shared_lock = threading.Lock()
+
+
+def get_shared_client(settings, client_factory: Callable):
+    """
+    Satu genai.Client per proses (per factory + API key), sehingga pool koneksi
+    httpx-nya dipakai bersama semua AIService dan koneksi TLS tetap hidup antar panggilan.
+    """
+    key = (client_factory, settings.GOOGLE_API_KEY)
+    with _shared_lock:
+        client = _shared_clients.get(key)
+        if client is None:
+            client = client_factory(api_key=settings.GOOGLE_API_KEY, http_options=build_http_options(settings))
+            _shared_clients[key] = client
+            logger.info("Created shared Gemini client with pooled HTTP transport")
+        return client
@@ -0,0 +1,173 @@
+import asyncio
+import json
+import logging
+import math
+import random
+import re
+import threading
+import time
+from typing import AsyncIterator, Optional
+
+from google.genai import errors
+
+logger = logging.getLogger(__name__)
+
+LATENCY_DISTRIBUTIONS = ("fixed", "uniform", "normal", "lognormal")
+
+
+class LLMText:
+    """Respons/potongan stream minimal dengan atribut .text (sama seperti respons genai)"""
+
+    def __init__(self, text: str):
+        self.text = text
+
+
+class LLMProvider:
+    """
+    Antarmuka backend LLM yang dipakai AIService.
+    generate() bersifat blocking (dipanggil lewat asyncio.to_thread), dengan
+    response_schema (model Pydantic) untuk meminta output JSON terstruktur;
+    generate_stream() adalah async iterator potongan teks.
+    """
+
+    name = "base"
+
+    def generate(self, model: str, contents: str, response_schema=None):
+        raise NotImplementedError
+
+    async def generate_stream(self, model: str, contents: str) -> AsyncIterator:
+        raise NotImplementedError
+        yield
+
+
+class GeminiProvider(LLMProvider):
+    """Provider Google Gemini melalui genai.Client"""
+
+    name = "gemini"
+
+    def __init__(self, client):
+        self.client = client
+
+    def generate(self, model: str, contents: str, response_schema=None):
+        if response_schema is None:
+            return self.client.models.generate_content(model=model, contents=contents)
+        return self.client.models.generate_content(
+            model=model,
+            contents=contents,
+            config={"response_mime_type": "application/json", "response_schema": response_schema}
+        )
+
+    async def generate_stream(self, model: str, contents: str) -> AsyncIterator:
+        stream = await self.client.aio.models.generate_content_stream(model=model, contents=contents)
+        async for chunk in stream:
+            yield chunk
+
+
+class FakeLLMProvider(LLMProvider):
+    """
+    Provider lokal untuk load test dan benchmark tanpa memanggil Gemini.
+    Latency diambil dari distribusi yang bisa dikonfigurasi, sebagian panggilan
+    bisa dibuat gagal (503) atau terkena rate limit (429) dengan error genai asli.
+    Dengan seed yang sama, urutan latency dan error bisa direproduksi.
+    """
+
+    name = "fake"
+
+    def __init__(
+        self,
+        latency_distribution: str = "lognormal",
+        latency_mean_seconds: float = 0.8,
+        latency_stddev_seconds: float = 0.3,
+        error_rate: float = 0.0,
+        rate_limit_rate: float = 0.0,
+        stream_chunk_delay_seconds: float = 0.02,
+        seed: Optional[int] = None,
+    ):
+        if latency_distribution not in LATENCY_DISTRIBUTIONS:
+            raise ValueError(f"Unknown latency distribution: {latency_distribution}")
+        self.latency_distribution = latency_distribution
+        self.latency_mean_seconds = latency_mean_seconds
+        self.latency_stddev_seconds = latency_stddev_seconds
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.stream_chunk_delay_seconds = stream_chunk_delay_seconds
+        self.calls = 0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def sample_latency(self) -> float:
+        mean, stddev = self.latency_mean_seconds, self.latency_stddev_seconds
+        with self._lock:
+            if self.latency_distribution == "fixed" or mean <= 0:
+                latency = mean
+            elif self.latency_distribution == "uniform":
+                latency = self._random.uniform(mean - stddev, mean + stddev)
+            elif self.latency_distribution == "normal":
+                latency = self._random.gauss(mean, stddev)
+            else:
+                # Parameter lognormal dipilih agar mean dan stddev hasilnya sesuai konfigurasi
+                sigma = math.sqrt(math.log(1 + (stddev / mean) ** 2))
+                latency = self._random.lognormvariate(math.log(mean) - sigma ** 2 / 2, sigma)
+        return max(latency, 0.0)
+
+    def _next_outcome(self) -> Optional[errors.APIError]:
+        with self._lock:
+            self.calls += 1
+            roll = self._random.random()
+        if roll < self.rate_limit_rate:
+            return errors.ClientError(429, {"error": {
+                "code": 429, "status": "RESOURCE_EXHAUSTED", "message": "Fake provider rate limit"}})
+        if roll < self.rate_limit_rate + self.error_rate:
+            return errors.ServerError(503, {"error": {
+                "code": 503, "status": "UNAVAILABLE", "message": "Fake provider unavailable"}})
+        return None
+
+    def _answer(self, model: str, contents: str) -> str:
+        """Jawaban deterministik yang menyebut produk dari prompt"""
+        products = re.findall(r"^\d+\. (?:\[[^\]]*\] )?([^|\n]+)", contents, flags=re.MULTILINE)
+        lines = [f"[{model} simulasi] Berikut rekomendasi berdasarkan katalog:"]
+        lines.extend(f"- {name.strip()}" for name in products[:3])
+        if not products:
+            lines.append("Belum ada produk yang cocok, coba perjelas kebutuhan Anda.")
+        return "\n".join(lines)
+
+    def generate(self, model: str, contents: str, response_schema=None):
+        latency = self.sample_latency()
+        error = self._next_outcome()
+        time.sleep(latency)
+        if error is not None:
+            raise error
+        answer = self._answer(model, contents)
+        if response_schema is not None:
+            product_ids = re.findall(r"^\d+\. \[([^\]]+)\]", contents, flags=re.MULTILINE)
+            return LLMText(json.dumps({"answer": answer, "product_ids": product_ids[:3]}, ensure_ascii=False))
+        return LLMText(answer)
+
+    async def generate_stream(self, model: str, contents: str) -> AsyncIterator:
+        latency = self.sample_latency()
+        error = self._next_outcome()
+        await asyncio.sleep(latency)
+        if error is not None:
+            raise error
+        for word in re.split(r"(?<=\s)", self._answer(model, contents)):
+            if self.stream_chunk_delay_seconds:
+                await asyncio.sleep(self.stream_chunk_delay_seconds)
+            yield LLMText(word)
+
+
+def create_provider(settings, client=None) -> LLMProvider:
+    """Buat provider LLM sesuai Settings.LLM_PROVIDER"""
+    if settings.LLM_PROVIDER == "gemini":
+        return GeminiProvider(client)
+    if settings.LLM_PROVIDER == "fake":
+        logger.warning("Using fake LLM provider, answers are simulated")
+        return FakeLLMProvider(
+            latency_distribution=settings.FAKE_LLM_LATENCY_DISTRIBUTION,
+            latency_mean_seconds=settings.FAKE_LLM_LATENCY_MEAN_SECONDS,
+            latency_stddev_seconds=settings.FAKE_LLM_LATENCY_STDDEV_SECONDS,
+            error_rate=settings.FAKE_LLM_ERROR_RATE,
+            rate_limit_rate=settings.FAKE_LLM_RATE_LIMIT_RATE,
+            stream_chunk_delay_seconds=settings.FAKE_LLM_STREAM_CHUNK_DELAY_SECONDS,
+            seed=settings.FAKE_LLM_SEED,
+        )
+    raise ValueError(f"Unknown LLM provider: {settings.LLM_PROVIDER}")
@@ -1,8 +1,14 @@
 import logging
+import hashlib
 import json
-import random
 from typing import List, Dict, Optional
 from pathlib import Path
+import numpy as np
+from app.services.semantic_search_service import SemanticSearchIndex
+from app.services.autocomplete_service import CompletionIndex
+from app.services.spec_index import SpecIndex
+from app.services.sort_index import SortIndex
+from app.services.similarity_index import SimilarProductsIndex
 
 logger = logging.getLogger(__name__)
 
@@ -11,8 +17,21 @@ class LocalProductService:
     Service untuk data produk lokal yang reliable dan tidak bergantung pada API eksternal
     """
     
-    def __init__(self):
-        self.products = self._load_local_products()
+    def __init__(self, products: Optional[List[Dict]] = None):
+        # products diberikan untuk membangun ulang index dari snapshot katalog (mis. di worker process)
+        self.products = products if products is not None else self._load_local_products()
+        # Berubah setiap kali isi katalog berubah; dipakai sebagai bagian dari cache key
+        self.catalog_version = hashlib.sha1(
+            json.dumps(self.products, sort_keys=True, default=str).encode('utf-8')
+        ).hexdigest()[:12]
+        self.semantic_index = SemanticSearchIndex(self.products)
+        self.completion_index = self._build_completion_index()
+        self.spec_index = SpecIndex(self.products)
+        self.sort_index = SortIndex(self.products)
+        self.similar_index = SimilarProductsIndex(self.products, self.semantic_index)
+        self.id_index = {product.get('id'): i for i, product in enumerate(self.products)}
+        self._categories = sorted({product.get('category', '') for product in self.products})
+        self._brands = sorted({product.get('brand', '') for product in self.products})
         logger.info(f"Loaded {len(self.products)} local products from JSON file")
     
     def _load_local_products(self) -> List[Dict]:
@@ -53,7 +72,7 @@ class LocalProductService:
                                 "description": product.get('description', ''),
                                 "specifications": {
                                     "rating": product.get('rating', 0),
-                                    "sold": random.randint(100, 2000),  # Add random sold count
+                                    "sold": self._sold_count(product.get('id', '')),
                                     "stock": product.get('stock_count', 0),
                                     "condition": "Baru",
                                     "shop_location": "Indonesia",
@@ -82,6 +101,23 @@ class LocalProductService:
             logger.error(f"Error loading products from JSON file: {str(e)}")
             return self._get_fallback_products()
     
+    @staticmethod
+    def _sold_count(product_id: str) -> int:
+        """Jumlah terjual simulasi (100-2000), deterministik per id agar versi katalog stabil antar restart"""
+        digest = hashlib.sha1(str(product_id).encode('utf-8')).digest()
+        return 100 + int.from_bytes(digest[:4], 'big') % 1901
+
+    def _build_completion_index(self) -> CompletionIndex:
+        """Bangun index autocomplete dari nama produk, brand dan kategori"""
+        index = CompletionIndex()
+        for product in self.products:
+            rating = product.get('specifications', {}).get('rating', 0) or 0
+            index.add(product.get('name', ''), 'product', 1.0 + rating / 5)
+            index.add(product.get('brand', ''), 'brand', 2.0)
+            index.add(product.get('category', '').replace('_', ' '), 'category', 2.0)
+        index.build()
+        return index
+
     def _get_fallback_products(self) -> List[Dict]:
         """Fallback products if JSON file cannot be loaded"""
         logger.warning("Using fallback products due to JSON file loading error")
@@ -285,9 +321,10 @@ class LocalProductService:
             }
         ]
     
-    def search_products(self, keyword: str, limit: int = 10) -> List[Dict]:
+    def search_products(self, keyword: str, limit: int = 10, spec_filters: Optional[Dict] = None, sort: Optional[str] = None) -> List[Dict]:
         """
-        Search products berdasarkan keyword
+        Search products berdasarkan keyword, opsional dengan filter rentang spesifikasi
+        dan urutan (misal "-rating,price"); tanpa sort, hasil diurutkan berdasarkan relevansi
         """
         try:
             logger.info(f"Searching products with keyword: {keyword}")
@@ -298,7 +335,13 @@ class LocalProductService:
             # Extract price range from keyword
             max_price = self._extract_price_from_keyword(keyword)
             
-            for product in self.products:
+            # Filter spesifikasi diambil dari index terurut, bukan dari teks spesifikasi
+            allowed = self.spec_index.matching_positions(spec_filters)
+            
+            for position, product in enumerate(self.products):
+                if allowed is not None and position not in allowed:
+                    continue
+                
                 product_price = product.get('price', 0)
                 
                 # Check if product matches price range
@@ -307,34 +350,14 @@ class LocalProductService:
                     continue
                 
                 # Search in name, description, category, brand, and specifications
-                searchable_text = (
-                    product.get('name', '') + ' ' +
-                    product.get('description', '') + ' ' +
-                    product.get('category', '') + ' ' +
-                    product.get('brand', '') + ' ' +
-                    str(product.get('specifications', {}))
-                ).lower()
-                
-                if keyword_lower in searchable_text:
+                if keyword_lower in self._searchable_text(product):
                     filtered_products.append(product)
             
-            # Sort by relevance (exact matches first, then by price if budget search)
-            def relevance_score(product):
-                score = 0
-                if keyword_lower in product.get('name', '').lower():
-                    score += 10
-                if keyword_lower in product.get('brand', '').lower():
-                    score += 5
-                if keyword_lower in product.get('category', '').lower():
-                    score += 3
-                
-                # For budget searches, prefer lower prices
-                if max_price or any(word in keyword_lower for word in ['murah', 'budget', 'hemat', 'terjangkau']):
-                    score += (10000000 - product.get('price', 0)) / 1000000  # Higher score for lower prices
-                
-                return score
-            
-            filtered_products.sort(key=relevance_score, reverse=True)
+            if sort:
+                filtered_products = self.sort_index.sort_products(filtered_products, sort)
+            else:
+                # Sort by relevance (exact matches first, then by price if budget search)
+                filtered_products.sort(key=lambda p: self._relevance_score(p, keyword_lower, max_price), reverse=True)
             
             logger.info(f"Found {len(filtered_products)} products")
             return filtered_products[:limit]
@@ -343,6 +366,95 @@ class LocalProductService:
             logger.error(f"Error searching products: {str(e)}")
             return []
     
+    def _searchable_text(self, product: Dict) -> str:
+        """Teks gabungan (lowercase) yang dipakai untuk pencocokan keyword"""
+        return (
+            product.get('name', '') + ' ' +
+            product.get('description', '') + ' ' +
+            product.get('category', '') + ' ' +
+            product.get('brand', '') + ' ' +
+            str(product.get('specifications', {}))
+        ).lower()
+    
+    def _relevance_score(self, product: Dict, keyword_lower: str, max_price: Optional[int]) -> float:
+        """Skor relevansi: exact match di nama/brand/kategori, lalu harga untuk pencarian budget"""
+        score = 0
+        if keyword_lower in product.get('name', '').lower():
+            score += 10
+        if keyword_lower in product.get('brand', '').lower():
+            score += 5
+        if keyword_lower in product.get('category', '').lower():
+            score += 3
+        
+        # For budget searches, prefer lower prices
+        if max_price or any(word in keyword_lower for word in ['murah', 'budget', 'hemat', 'terjangkau']):
+            score += (10000000 - product.get('price', 0)) / 1000000  # Higher score for lower prices
+        
+        return score
+    
+    def batch_search(self, specs: List[Dict]) -> List[List[Dict]]:
+        """
+        Evaluasi beberapa spesifikasi pencarian sekaligus dalam satu scan katalog.
+        Setiap spec: query, category, brand, min_price, max_price, limit.
+        Keyword dan kombinasi filter yang sama hanya dihitung sekali per batch.
+        """
+        try:
+            logger.info(f"Running batch search with {len(specs)} specs")
+            
+            # 1. Satu scan katalog untuk semua keyword unik
+            keywords = {}
+            for spec in specs:
+                query = (spec.get('query') or '').strip()
+                if query and query.lower() not in keywords:
+                    keywords[query.lower()] = self._extract_price_from_keyword(query)
+            
+            keyword_hits = {keyword: [] for keyword in keywords}
+            if keywords:
+                for product in self.products:
+                    searchable_text = self._searchable_text(product)
+                    for keyword, max_price in keywords.items():
+                        if (max_price and product.get('price', 0) <= max_price) or keyword in searchable_text:
+                            keyword_hits[keyword].append(product)
+                for keyword, hits in keyword_hits.items():
+                    hits.sort(key=lambda p: self._relevance_score(p, keyword, keywords[keyword]), reverse=True)
+            
+            # 2. Filter kategori/brand/harga, di-cache per kombinasi filter
+            filter_cache = {}
+            
+            def candidate_ids(category, brand, min_price, max_price):
+                key = ((category or '').lower(), (brand or '').lower(), min_price, max_price)
+                if key not in filter_cache:
+                    filter_cache[key] = {
+                        id(p) for p in self.products
+                        if (not key[0] or key[0] in p.get('category', '').lower())
+                        and (not key[1] or key[1] in p.get('brand', '').lower())
+                        and (min_price is None or p.get('price', 0) >= min_price)
+                        and (max_price is None or p.get('price', 0) <= max_price)
+                    }
+                return filter_cache[key]
+            
+            results = []
+            for spec in specs:
+                query = (spec.get('query') or '').strip().lower()
+                limit = spec.get('limit', 10)
+                base = keyword_hits[query] if query else self.products
+                if any(spec.get(f) is not None for f in ('category', 'brand', 'min_price', 'max_price')):
+                    allowed = candidate_ids(spec.get('category'), spec.get('brand'), spec.get('min_price'), spec.get('max_price'))
+                    base = [p for p in base if id(p) in allowed]
+                spec_filters = {k: v for k, v in spec.items() if k.startswith(('min_', 'max_')) and k not in ('min_price', 'max_price')}
+                positions = self.spec_index.matching_positions(spec_filters)
+                if positions is not None:
+                    allowed = {id(self.products[i]) for i in positions}
+                    base = [p for p in base if id(p) in allowed]
+                results.append(base[:limit])
+            
+            logger.info(f"Batch search evaluated {len(keywords)} unique keywords, {len(filter_cache)} filter sets")
+            return results
+        
+        except Exception as e:
+            logger.error(f"Error in batch search: {str(e)}")
+            return [[] for _ in specs]
+    
     def _extract_price_from_keyword(self, keyword: str) -> Optional[int]:
         """
         Extract maximum price from keyword
@@ -385,36 +497,60 @@ class LocalProductService:
             logger.error(f"Error extracting price from keyword: {str(e)}")
             return None
     
+    def add_popular_queries(self, queries: List[str], weight: float = 3.0):
+        """
+        Tambahkan pertanyaan populer ke index autocomplete (diprioritaskan di atas istilah katalog)
+        """
+        for query in queries:
+            self.completion_index.add(query, 'query', weight)
+        self.completion_index.build()
+
+    def get_completions(self, prefix: str, limit: int = 8) -> List[Dict]:
+        """
+        Get saran autocomplete berdasarkan prefix
+        """
+        try:
+            return self.completion_index.complete(prefix, limit)
+        except Exception as e:
+            logger.error(f"Error getting completions: {str(e)}")
+            return []
+
     def get_product_details(self, product_id: str) -> Optional[Dict]:
         """
         Get detail produk berdasarkan ID
         """
         try:
-            for product in self.products:
-                if product.get('id') == product_id:
-                    return product
-            return None
+            position = self.id_index.get(product_id)
+            return self.products[position] if position is not None else None
         except Exception as e:
             logger.error(f"Error getting product details: {str(e)}")
             return None
     
+    def get_similar_products(self, product_id: str, limit: int = 5) -> Optional[List[Dict]]:
+        """
+        Get produk serupa dari daftar tetangga yang sudah dihitung saat load.
+        Return None jika produk tidak ditemukan
+        """
+        try:
+            position = self.id_index.get(product_id)
+            if position is None:
+                return None
+            return [self.products[i] for i in self.similar_index.neighbors_of(position, limit)]
+        except Exception as e:
+            logger.error(f"Error getting similar products: {str(e)}")
+            return []
+    
     def get_categories(self) -> List[str]:
         """
-        Get daftar kategori produk
+        Get daftar kategori produk (dihitung saat load)
         """
-        categories = set()
-        for product in self.products:
-            categories.add(product.get('category', ''))
-        return sorted(list(categories))
+        return list(self._categories)
     
     def get_brands(self) -> List[str]:
         """
-        Get daftar brand produk
+        Get daftar brand produk (dihitung saat load)
         """
-        brands = set()
-        for product in self.products:
-            brands.add(product.get('brand', ''))
-        return sorted(list(brands))
+        return list(self._brands)
     
     def get_products_by_category(self, category: str) -> List[Dict]:
         """
@@ -455,12 +591,7 @@ class LocalProductService:
         Get produk dengan rating tertinggi
         """
         try:
-            sorted_products = sorted(
-                self.products, 
-                key=lambda x: x.get('specifications', {}).get('rating', 0), 
-                reverse=True
-            )
-            return sorted_products[:limit]
+            return self.filter_products(sort='-rating', limit=limit)
         except Exception as e:
             logger.error(f"Error getting top rated products: {str(e)}")
             return []
@@ -470,16 +601,43 @@ class LocalProductService:
         try:
             logger.info(f"Getting best selling products, limit: {limit}")
             
-            # Sort berdasarkan sold count
-            sorted_products = sorted(self.products, key=lambda x: x.get('specifications', {}).get('sold', 0), reverse=True)
+            # Urutan berdasarkan sold count sudah dihitung saat load
+            sorted_products = self.filter_products(sort='-sold', limit=limit)
             
-            logger.info(f"Returning {min(limit, len(sorted_products))} best selling products")
-            return sorted_products[:limit]
+            logger.info(f"Returning {len(sorted_products)} best selling products")
+            return sorted_products
             
         except Exception as e:
             logger.error(f"Error getting best selling products: {str(e)}")
             return []
     
+    def filter_products(self, category: Optional[str] = None, spec_filters: Optional[Dict] = None, limit: int = 20, sort: Optional[str] = None) -> List[Dict]:
+        """
+        Get produk berdasarkan kategori dan filter rentang spesifikasi (min_storage_gb, max_weight_g, ...),
+        opsional terurut memakai permutasi yang sudah dihitung saat load
+        """
+        try:
+            allowed = self.spec_index.matching_positions(spec_filters)
+            if sort:
+                positions = self.sort_index.iter_sorted(sort, allowed)
+            elif allowed is not None:
+                positions = sorted(allowed)
+            else:
+                positions = range(len(self.products))
+            category_lower = (category or '').lower()
+            results = []
+            for position in positions:
+                product = self.products[position]
+                if category_lower and category_lower not in product.get('category', '').lower():
+                    continue
+                results.append(product)
+                if len(results) >= limit:
+                    break
+            return results
+        except Exception as e:
+            logger.error(f"Error filtering products: {str(e)}")
+            return []
+    
     def get_products(self, limit: int = 10) -> List[Dict]:
         """Get semua produk"""
         try:
@@ -489,6 +647,26 @@ class LocalProductService:
             logger.error(f"Error getting products: {str(e)}")
             return []
     
+    def semantic_search_products(self, query: str, category: str = None, max_price: int = None, limit: int = 5) -> List[Dict]:
+        """
+        Cari produk berdasarkan kemiripan TF-IDF dengan pertanyaan (offline, tanpa LLM)
+        """
+        try:
+            if not query or not self.products:
+                return []
+            mask = None
+            if category or max_price:
+                mask = np.array([
+                    (not category or category.lower() in p.get('category', '').lower())
+                    and (not max_price or p.get('price', 0) <= max_price)
+                    for p in self.products
+                ])
+            hits = self.semantic_index.search(query, top_k=limit, mask=mask)
+            return [self.products[i] for i, _ in hits]
+        except Exception as e:
+            logger.error(f"Error in semantic search: {str(e)}")
+            return []
+
     def smart_search_products(self, keyword: str = '', category: str = None, max_price: int = None, limit: int = 5):
         """
         Hybrid fallback search: cari produk sesuai kriteria, lalu fallback bertingkat dengan notifikasi.
@@ -502,24 +680,17 @@ class LocalProductService:
         # 1. Jika user minta "terbaik" tanpa kategori spesifik
         if is_best_request and not category:
             # Tampilkan produk terbaik secara umum (top 5 berdasarkan rating)
-            best_products = sorted(self.products, 
-                                 key=lambda x: x.get('specifications', {}).get('rating', 0), 
-                                 reverse=True)
-            return best_products[:limit], "Berikut produk terbaik berdasarkan rating:"
+            return self.filter_products(sort='-rating', limit=limit), "Berikut produk terbaik berdasarkan rating:"
         
         # 2. Jika user minta "terbaik" dengan kategori spesifik
         if is_best_request and category:
-            category_products = [p for p in self.products 
-                               if category.lower() in p.get('category', '').lower()]
+            category_products = self.filter_products(category=category, sort='-rating', limit=limit)
             if category_products:
-                category_products.sort(key=lambda x: x.get('specifications', {}).get('rating', 0), reverse=True)
-                return category_products[:limit], f"Berikut {category} terbaik berdasarkan rating:"
+                return category_products, f"Berikut {category} terbaik berdasarkan rating:"
             else:
                 # Fallback ke produk terbaik secara umum jika kategori tidak ditemukan
-                best_products = sorted(self.products, 
-                                     key=lambda x: x.get('specifications', {}).get('rating', 0), 
-                                     reverse=True)
-                return best_products[:limit], f"Tidak ada produk kategori {category}, berikut produk terbaik secara umum:"
+                best_products = self.filter_products(sort='-rating', limit=limit)
+                return best_products, f"Tidak ada produk kategori {category}, berikut produk terbaik secara umum:"
         
         # 3. Cari produk yang memenuhi semua kriteria (non-terbaik)
         results = [
@@ -531,7 +702,12 @@ class LocalProductService:
         if results:
             return results[:limit], "Berikut produk yang sesuai dengan kriteria Anda."
 
-        # 4. Jika tidak ada, cari produk di kategori yang sama (tanpa filter harga)
+        # 4. Jika tidak ada yang cocok persis, cari produk yang paling mirip secara semantik
+        semantic_results = self.semantic_search_products(keyword, category, max_price, limit)
+        if semantic_results:
+            return semantic_results, "Berikut produk yang paling relevan dengan pertanyaan Anda."
+
+        # 5. Jika tidak ada, cari produk di kategori yang sama (tanpa filter harga)
         if category:
             category_results = [
                 p for p in self.products
@@ -541,7 +717,7 @@ class LocalProductService:
                 category_results.sort(key=lambda x: x.get('price', 0))
                 return category_results[:limit], "Tidak ada produk di bawah budget, berikut produk termurah di kategori tersebut."
 
-        # 5. Jika tetap tidak ada, tampilkan produk lain yang sesuai budget
+        # 6. Jika tetap tidak ada, tampilkan produk lain yang sesuai budget
         if max_price:
             budget_results = [
                 p for p in self.products
@@ -550,6 +726,5 @@ class LocalProductService:
             if budget_results:
                 return budget_results[:limit], "Tidak ada produk di kategori tersebut, berikut produk lain yang sesuai budget Anda."
 
-        # 6. Jika tetap tidak ada, tampilkan produk terpopuler/terlaris
-        popular_results = sorted(self.products, key=lambda x: x.get('specifications', {}).get('sold', 0), reverse=True)
-        return popular_results[:limit], "Tidak ada produk yang sesuai, berikut rekomendasi produk terpopuler." 
\ No newline at end of file
+        # 7. Jika tetap tidak ada, tampilkan produk terpopuler/terlaris
+        return self.filter_products(sort='-sold', limit=limit), "Tidak ada produk yang sesuai, berikut rekomendasi produk terpopuler." 
\ No newline at end of file
@@ -0,0 +1,104 @@
+import logging
+import threading
+from collections import defaultdict
+from typing import Dict, List, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Perkiraan harga USD per 1 juta token (input, output), untuk estimasi biaya saja
+MODEL_PRICING: Dict[str, Tuple[float, float]] = {
+    "gemini-2.0-flash": (0.10, 0.40),
+    "gemini-2.5-flash": (0.30, 2.50),
+}
+
+# Pertanyaan perbandingan atau terbuka butuh model yang lebih kuat
+COMPARATIVE_WORDS = ('bandingkan', 'perbandingan', 'banding', ' vs ', 'versus', 'lebih baik', 'perbedaan', 'bedanya',
+                     'compare', 'difference', 'better than')
+OPEN_ENDED_WORDS = ('kenapa', 'mengapa', 'bagaimana', 'jelaskan', 'apa saja', 'tips', 'saran', ' why ', ' how ', 'explain')
+
+# Penanda pesan retrieval yang berarti hasilnya bukan kecocokan langsung
+WEAK_MATCH_MARKERS = ('Tidak ada', 'paling relevan')
+
+
+class ModelRouter:
+    """
+    Pilih model per request dari intent dan hasil retrieval:
+    lookup sederhana (satu kategori, hasil cocok langsung, pertanyaan pendek) -> model cepat,
+    selain itu (perbandingan, pertanyaan terbuka, hasil fallback) -> model kuat.
+    Keputusan, latency, token, dan estimasi biaya dicatat per model.
+    """
+
+    def __init__(
+        self,
+        fast_model: str = "gemini-2.0-flash",
+        strong_model: str = "gemini-2.5-flash",
+        max_simple_words: int = 12,
+        enabled: bool = True,
+    ):
+        self.fast_model = fast_model
+        self.strong_model = strong_model
+        self.max_simple_words = max_simple_words
+        self.enabled = enabled
+        self._decisions: Dict[str, Dict[str, int]] = defaultdict(lambda: defaultdict(int))
+        self._stats: Dict[str, Dict[str, float]] = defaultdict(lambda: defaultdict(float))
+        self._lock = threading.Lock()
+
+    def classify(self, question: str, intent: Dict, products: List[Dict], fallback_message: str) -> str:
+        """Alasan routing; "simple_lookup" berarti aman memakai model cepat"""
+        question_lower = f" {(question or '').lower()} "
+        if any(word in question_lower for word in COMPARATIVE_WORDS):
+            return "comparative"
+        if any(word in question_lower for word in OPEN_ENDED_WORDS):
+            return "open_ended"
+        if len(question_lower.split()) > self.max_simple_words:
+            return "long_question"
+        if not intent.get("category"):
+            return "no_category"
+        if not products or any(marker in (fallback_message or '') for marker in WEAK_MATCH_MARKERS):
+            return "weak_match"
+        if len({p.get('category', '') for p in products}) > 1:
+            return "multi_category"
+        return "simple_lookup"
+
+    def choose(self, question: str, intent: Dict, products: List[Dict], fallback_message: str) -> str:
+        if not self.enabled:
+            reason = "routing_disabled"
+            model = self.strong_model
+        else:
+            reason = self.classify(question, intent, products, fallback_message)
+            model = self.fast_model if reason == "simple_lookup" else self.strong_model
+        with self._lock:
+            self._decisions[model][reason] += 1
+        logger.info(f"Routed question to {model} ({reason})")
+        return model
+
+    def record(self, model: str, latency: float, input_tokens: int, output_tokens: int, success: bool):
+        """Catat hasil satu panggilan model"""
+        input_price, output_price = MODEL_PRICING.get(model, (0.0, 0.0))
+        with self._lock:
+            stats = self._stats[model]
+            stats["calls"] += 1
+            stats["errors"] += 0 if success else 1
+            stats["latency_seconds"] += latency
+            stats["input_tokens"] += input_tokens
+            stats["output_tokens"] += output_tokens
+            stats["cost_usd"] += (input_tokens * input_price + output_tokens * output_price) / 1_000_000
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            models = set(self._decisions) | set(self._stats)
+            result = {}
+            for model in sorted(models):
+                stats = self._stats.get(model, {})
+                calls = int(stats.get("calls", 0))
+                result[model] = {
+                    "decisions": dict(self._decisions.get(model, {})),
+                    "calls": calls,
+                    "errors": int(stats.get("errors", 0)),
+                    "avg_latency_seconds": round(stats.get("latency_seconds", 0.0) / calls, 4) if calls else 0.0,
+                    "input_tokens": int(stats.get("input_tokens", 0)),
+                    "output_tokens": int(stats.get("output_tokens", 0)),
+                    "estimated_cost_usd": round(stats.get("cost_usd", 0.0), 6),
+                }
+            return result
+
@@ -1,6 +1,8 @@
 import logging
+from functools import lru_cache
 from typing import List, Dict, Optional
 from app.services.local_product_service import LocalProductService
+from app.services.catalog_executor import get_catalog_executor
 
 logger = logging.getLogger(__name__)
 
@@ -12,29 +14,44 @@ class ProductDataService:
     def __init__(self):
         # Use LocalProductService as primary data source
         self.local_service = LocalProductService()
+        # Scan/filter berat lewat pool terbatas bersama; lookup ber-index tetap inline
+        self.executor = get_catalog_executor()
         logger.info("ProductDataService initialized with LocalProductService")
     
-    async def search_products(self, keyword: str, limit: int = 10) -> List[Dict]:
-        """Search products using local data"""
+    @property
+    def catalog_version(self) -> str:
+        """Version of the loaded catalog, for cache and coalescing keys"""
+        return self.local_service.catalog_version
+    
+    async def search_products(self, keyword: str, limit: int = 10, spec_filters: Optional[Dict] = None, sort: Optional[str] = None) -> List[Dict]:
+        """Search products using local data, optionally narrowed by spec range filters and sorted"""
         try:
             logger.info(f"Searching products with keyword: {keyword}")
-            # Use awaitable wrapper for sync method
-            import asyncio
-            loop = asyncio.get_event_loop()
-            products = await loop.run_in_executor(None, self.local_service.search_products, keyword, limit)
+            products = await self.executor.run(self.local_service, "search_products", keyword, limit, spec_filters, sort)
             logger.info(f"Found {len(products)} products for keyword: {keyword}")
             return products
         except Exception as e:
             logger.error(f"Error searching products: {str(e)}")
             return []
     
-    async def get_products(self, limit: int = 20, category: Optional[str] = None, search: Optional[str] = None) -> List[Dict]:
-        """Get products with optional filtering"""
+    async def batch_search(self, specs: List[Dict]) -> List[List[Dict]]:
+        """Evaluate several search specs in one executor hop and one catalog scan"""
+        try:
+            logger.info(f"Batch searching {len(specs)} specs")
+            return await self.executor.run(self.local_service, "batch_search", specs)
+        except Exception as e:
+            logger.error(f"Error in batch search: {str(e)}")
+            return [[] for _ in specs]
+    
+    async def get_products(self, limit: int = 20, category: Optional[str] = None, search: Optional[str] = None, spec_filters: Optional[Dict] = None, sort: Optional[str] = None) -> List[Dict]:
+        """Get products with optional filtering and sorting"""
         try:
             if search:
-                return await self.search_products(search, limit)
+                return await self.search_products(search, limit, spec_filters, sort)
+            elif spec_filters or sort:
+                return await self.executor.run(self.local_service, "filter_products", category, spec_filters, limit, sort)
             elif category:
-                return self.get_products_by_category(category, limit)
+                return await self.get_products_by_category(category, limit)
             else:
                 return self.get_all_products(limit)
         except Exception as e:
@@ -50,7 +67,7 @@ class ProductDataService:
             return []
     
     async def get_top_rated_products(self, limit: int = 10) -> List[Dict]:
-        """Get top rated products"""
+        """Get top rated products (permutasi sort sudah dihitung saat load, inline)"""
         try:
             return self.local_service.get_top_rated_products(limit)
         except Exception as e:
@@ -58,17 +75,18 @@ class ProductDataService:
             return []
     
     async def get_best_selling_products(self, limit: int = 10) -> List[Dict]:
-        """Get best selling products"""
+        """Get best selling products (permutasi sort sudah dihitung saat load, inline)"""
         try:
             return self.local_service.get_best_selling_products(limit)
         except Exception as e:
             logger.error(f"Error getting best selling products: {str(e)}")
             return []
     
-    def get_products_by_category(self, category: str, limit: int = 10) -> List[Dict]:
-        """Get products by category"""
+    async def get_products_by_category(self, category: str, limit: int = 10) -> List[Dict]:
+        """Get products by category (scan katalog, dijalankan di catalog pool)"""
         try:
-            return self.local_service.get_products_by_category(category)[:limit]
+            products = await self.executor.run(self.local_service, "get_products_by_category", category)
+            return products[:limit]
         except Exception as e:
             logger.error(f"Error getting products by category: {str(e)}")
             return []
@@ -89,30 +107,66 @@ class ProductDataService:
             logger.error(f"Error getting product details: {str(e)}")
             return None
     
+    def get_products_by_ids(self, product_ids: List[str]) -> List[Dict]:
+        """Produk untuk daftar id (urutan dipertahankan, id yang tidak ada dilewati); lookup id index, inline"""
+        products = (self.get_product_details(product_id) for product_id in product_ids)
+        return [product for product in products if product]
+    
+    def get_similar_products(self, product_id: str, limit: int = 5) -> Optional[List[Dict]]:
+        """Get precomputed similar products (None if the product does not exist)"""
+        try:
+            return self.local_service.get_similar_products(product_id, limit)
+        except Exception as e:
+            logger.error(f"Error getting similar products: {str(e)}")
+            return []
+    
     def get_brands(self) -> List[str]:
-        """Get available brands"""
+        """Get available brands (dihitung saat load, cukup murah untuk inline)"""
         try:
             return self.local_service.get_brands()
         except Exception as e:
             logger.error(f"Error getting brands: {str(e)}")
             return []
     
-    def get_products_by_brand(self, brand: str, limit: int = 10) -> List[Dict]:
-        """Get products by brand"""
+    async def get_products_by_brand(self, brand: str, limit: int = 10) -> List[Dict]:
+        """Get products by brand (scan katalog, dijalankan di catalog pool)"""
         try:
-            return self.local_service.get_products_by_brand(brand)[:limit]
+            products = await self.executor.run(self.local_service, "get_products_by_brand", brand)
+            return products[:limit]
         except Exception as e:
             logger.error(f"Error getting products by brand: {str(e)}")
             return []
     
+    def get_completions(self, prefix: str, limit: int = 8) -> List[Dict]:
+        """Get autocomplete suggestions (sorted-array lookup, cheap enough to run inline)"""
+        try:
+            return self.local_service.get_completions(prefix, limit)
+        except Exception as e:
+            logger.error(f"Error getting completions: {str(e)}")
+            return []
+
+    def add_popular_queries(self, queries: List[str]):
+        """Register popular queries as autocomplete candidates"""
+        try:
+            self.local_service.add_popular_queries(queries)
+        except Exception as e:
+            logger.error(f"Error adding popular queries: {str(e)}")
+
     async def smart_search_products(self, keyword: str = '', category: str = None, max_price: int = None, limit: int = 5):
         """
         Hybrid fallback search: gunakan LocalProductService.smart_search_products secara async.
         Return: (list produk, pesan)
         """
-        import asyncio
-        loop = asyncio.get_event_loop()
-        products, message = await loop.run_in_executor(
-            None, self.local_service.smart_search_products, keyword, category, max_price, limit
+        products, message = await self.executor.run(
+            self.local_service, "smart_search_products", keyword, category, max_price, limit
         )
-        return products, message 
\ No newline at end of file
+        return products, message 
+
+@lru_cache()
+def get_product_service() -> ProductDataService:
+    """
+    ProductDataService bersama per proses. Router dan AIService memakai instance yang sama,
+    sehingga katalog dimuat dan di-index sekali dan id produk, versi katalog, cache key
+    serta urutan best-selling konsisten di semua endpoint.
+    """
+    return ProductDataService()
@@ -0,0 +1,151 @@
+import logging
+import math
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Template di-bind sekali ke str.format agar tidak perlu disusun ulang per request
+_INSTRUCTION = "You are a helpful product assistant. Based on the following context, provide a helpful and informative response:\n\n"
+_FOOTER = "\nPlease provide a clear and concise answer that helps the user understand the products and make an informed decision. Focus on being helpful and natural in your response."
+_STRUCTURED_FOOTER = _FOOTER + ' Reply as JSON {"answer": str, "product_ids": [ids in brackets, best first]}.'
+_QUESTION = "Question: {question}\n\n".format
+_NOTE = "{note}\n\n".format
+_HISTORY_HEADER = "Previous conversation (summary):\n"
+_HISTORY_LINE = "- {line}\n".format
+_PRODUCTS_HEADER = "Relevant Products:\n"
+_NO_PRODUCTS = "No specific products found, but I can provide general recommendations.\n"
+_PRODUCT_CORE = "{index}. {name} | {brand} | {category} | Rp {price:,.0f} | Rating {rating}/5\n".format
+_PRODUCT_CORE_WITH_ID = "{index}. [{id}] {name} | {brand} | {category} | Rp {price:,.0f} | Rating {rating}/5\n".format
+_SPEC_LINE = "   {label}: {value}\n".format
+_DESCRIPTION_LINE = "   Description: {description}\n".format
+
+# Kata di pertanyaan -> key spesifikasi yang relevan untuk disertakan
+SPEC_KEYWORDS: Dict[str, Tuple[str, ...]] = {
+    'camera': ('kamera', 'camera', 'foto', 'video', 'selfie'),
+    'battery': ('baterai', 'battery', 'tahan lama', 'awet'),
+    'screen': ('layar', 'screen', 'display', 'inch'),
+    'storage': ('storage', 'penyimpanan', 'gb', 'tb'),
+    'memory': ('ram', 'memory', 'multitasking'),
+    'processor': ('prosesor', 'processor', 'chip', 'gaming', 'performa', 'cepat'),
+    'gpu': ('gpu', 'gaming', 'grafis', 'render'),
+    'weight': ('berat', 'ringan', 'weight', 'portable'),
+    'connectivity': ('wifi', 'bluetooth', '5g', 'koneksi'),
+}
+
+
+def estimate_tokens(text: str) -> int:
+    """Perkiraan jumlah token (~4 karakter per token), dibulatkan ke atas"""
+    return math.ceil(len(text) / 4)
+
+
+class PromptBuilder:
+    """
+    Penyusun prompt dengan batas token.
+    Bagian prompt ditambahkan berdasarkan prioritas: instruksi dan pertanyaan,
+    ringkasan inti tiap produk, spesifikasi yang relevan dengan pertanyaan,
+    lalu deskripsi. Bagian yang tidak muat di budget dilewati, sehingga
+    estimate_tokens(prompt) <= budget untuk input apa pun.
+    """
+
+    def __init__(self, token_budget: int = 1200, description_chars: int = 200):
+        self.token_budget = token_budget
+        self.description_chars = description_chars
+        fixed = estimate_tokens(_INSTRUCTION) + estimate_tokens(_STRUCTURED_FOOTER)
+        self.min_budget = fixed + estimate_tokens(_QUESTION(question="") + _NOTE(note="")) + 16
+        if token_budget < self.min_budget:
+            raise ValueError(f"Prompt token budget must be at least {self.min_budget}")
+
+    def relevant_spec_keys(self, question: str) -> List[str]:
+        question_lower = (question or '').lower()
+        return [key for key, words in SPEC_KEYWORDS.items() if any(word in question_lower for word in words)]
+
+    def build(
+        self,
+        question: str,
+        products: List[Dict],
+        fallback_message: str = '',
+        history: Optional[List[str]] = None,
+        structured: bool = False
+    ) -> str:
+        """structured=True: sertakan id produk dan minta jawaban JSON (answer + product_ids)"""
+        footer = _STRUCTURED_FOOTER if structured else _FOOTER
+        product_core = _PRODUCT_CORE_WITH_ID if structured else _PRODUCT_CORE
+        remaining = self.token_budget - estimate_tokens(_INSTRUCTION) - estimate_tokens(footer)
+
+        def fits(text: str) -> bool:
+            nonlocal remaining
+            cost = estimate_tokens(text)
+            if cost > remaining:
+                return False
+            remaining -= cost
+            return True
+
+        # Pertanyaan selalu disertakan, dipotong jika terlalu panjang untuk sisa budget
+        question_text = _QUESTION(question=question)
+        if not fits(question_text):
+            max_chars = max(remaining * 4 - len(_QUESTION(question="")), 0)
+            question_text = _QUESTION(question=question[:max_chars])
+            fits(question_text)
+
+        note_text = _NOTE(note=fallback_message) if fallback_message else ''
+        if note_text and not fits(note_text):
+            note_text = ''
+
+        # Ringkasan percakapan sebelumnya; giliran terbaru didahulukan jika budget terbatas
+        history_text = ''
+        if history and fits(_HISTORY_HEADER + "\n"):
+            kept = []
+            for line in reversed(history):
+                history_line = _HISTORY_LINE(line=line)
+                if not fits(history_line):
+                    break
+                kept.append(history_line)
+            history_text = _HISTORY_HEADER + ''.join(reversed(kept)) + "\n" if kept else ''
+
+        blocks: List[List[str]] = []
+        section_header = ''
+        if not products:
+            section_header = _NO_PRODUCTS if fits(_NO_PRODUCTS) else ''
+        elif fits(_PRODUCTS_HEADER):
+            section_header = _PRODUCTS_HEADER
+            # 1. Ringkasan inti tiap produk, berhenti jika budget habis
+            for index, product in enumerate(products, 1):
+                line = product_core(
+                    index=index,
+                    id=product.get('id', ''),
+                    name=product.get('name', 'Unknown'),
+                    brand=product.get('brand', 'Unknown'),
+                    category=product.get('category', 'Unknown'),
+                    price=product.get('price', 0) or 0,
+                    rating=(product.get('specifications', {}) or {}).get('rating', 0),
+                )
+                if not fits(line):
+                    break
+                blocks.append([line])
+
+            # 2. Spesifikasi yang ditanyakan
+            spec_keys = self.relevant_spec_keys(question)
+            for block, product in zip(blocks, products):
+                specifications = product.get('specifications', {}) or {}
+                for key in spec_keys:
+                    value = specifications.get(key)
+                    if value:
+                        line = _SPEC_LINE(label=key.capitalize(), value=value)
+                        if fits(line):
+                            block.append(line)
+
+            # 3. Deskripsi singkat jika masih ada sisa budget
+            for block, product in zip(blocks, products):
+                description = product.get('description', '')
+                if description:
+                    line = _DESCRIPTION_LINE(description=description[:self.description_chars])
+                    if fits(line):
+                        block.append(line)
+
+        parts = [_INSTRUCTION, question_text, note_text, history_text, section_header]
+        for block in blocks:
+            parts.extend(block)
+        parts.append(footer)
+        prompt = ''.join(parts)
+        logger.info(f"Built prompt: {len(blocks)}/{len(products)} products, ~{estimate_tokens(prompt)} tokens")
+        return prompt
@@ -0,0 +1,122 @@
+import asyncio
+import itertools
+import logging
+import threading
+import time
+from typing import Dict, Iterator, List, Tuple
+
+from app.services.circuit_breaker import LLMUnavailableError
+
+logger = logging.getLogger(__name__)
+
+# Kelas prioritas: nilai lebih kecil dilayani lebih dulu
+INTERACTIVE = 0
+BACKGROUND = 1
+PRIORITY_NAMES = {INTERACTIVE: "interactive", BACKGROUND: "background"}
+
+
+class RateLimitExceeded(LLMUnavailableError):
+    """Antrian rate limit penuh atau perkiraan waktu tunggu melewati batas"""
+
+
+class PriorityTokenBucket:
+    """
+    Token bucket (rate per detik, kapasitas burst) dengan antrian tunggu berprioritas.
+    Token hanya diberikan ke waiter terdepan (prioritas terkecil, lalu urutan datang),
+    sehingga request interaktif selalu didahulukan dari pekerjaan background.
+    Jika antrian penuh atau perkiraan waktu tunggu > max_wait_seconds, pemanggil
+    langsung ditolak dengan RateLimitExceeded (fail fast, tidak menunggu timeout).
+    Bisa dipakai dari coroutine (acquire) maupun dari kode sync (acquire_blocking).
+    """
+
+    def __init__(self, rate_per_second: float = 5.0, burst: int = 10, max_queue: int = 50, max_wait_seconds: float = 2.0):
+        if rate_per_second <= 0:
+            raise ValueError("rate_per_second must be positive")
+        self.rate_per_second = rate_per_second
+        self.burst = burst
+        self.max_queue = max_queue
+        self.max_wait_seconds = max_wait_seconds
+        self._tokens = float(burst)
+        self._updated_at = time.monotonic()
+        self._waiters: List[Tuple[int, int]] = []
+        self._sequence = itertools.count()
+        self._lock = threading.Lock()
+        self._granted = 0
+        self._rejected = 0
+        self._total_wait = 0.0
+        self._max_wait = 0.0
+        self._max_depth = 0
+
+    def _refill(self, now: float):
+        self._tokens = min(self.burst, self._tokens + (now - self._updated_at) * self.rate_per_second)
+        self._updated_at = now
+
+    def _schedule(self, priority: int) -> Iterator[float]:
+        """Generator lama tidur berikutnya; selesai saat token didapat, raise jika ditolak"""
+        started = time.monotonic()
+        with self._lock:
+            self._refill(started)
+            ahead = sum(1 for waiter_priority, _ in self._waiters if waiter_priority <= priority)
+            estimated_wait = (ahead + 1 - self._tokens) / self.rate_per_second
+            if len(self._waiters) >= self.max_queue or estimated_wait > self.max_wait_seconds:
+                self._rejected += 1
+                raise RateLimitExceeded(
+                    f"LLM rate limit saturated ({len(self._waiters)} queued, ~{max(estimated_wait, 0):.1f}s wait)"
+                )
+            ticket = (priority, next(self._sequence))
+            self._waiters.append(ticket)
+            self._max_depth = max(self._max_depth, len(self._waiters))
+
+        deadline = started + self.max_wait_seconds
+        try:
+            while True:
+                with self._lock:
+                    now = time.monotonic()
+                    self._refill(now)
+                    if self._tokens >= 1 and min(self._waiters) == ticket:
+                        self._tokens -= 1
+                        self._waiters.remove(ticket)
+                        ticket = None
+                        waited = now - started
+                        self._granted += 1
+                        self._total_wait += waited
+                        self._max_wait = max(self._max_wait, waited)
+                        return
+                    if now >= deadline:
+                        self._rejected += 1
+                        raise RateLimitExceeded("LLM rate limit wait exceeded")
+                    wait = max((1 - self._tokens) / self.rate_per_second, 0.001)
+                yield min(wait, deadline - now)
+        finally:
+            if ticket is not None:
+                with self._lock:
+                    self._waiters.remove(ticket)
+
+    async def acquire(self, priority: int = INTERACTIVE):
+        schedule = self._schedule(priority)
+        try:
+            for wait in schedule:
+                await asyncio.sleep(wait)
+        finally:
+            schedule.close()
+
+    def acquire_blocking(self, priority: int = BACKGROUND):
+        schedule = self._schedule(priority)
+        try:
+            for wait in schedule:
+                time.sleep(wait)
+        finally:
+            schedule.close()
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            self._refill(time.monotonic())
+            return {
+                "tokens": round(self._tokens, 2),
+                "queue_depth": {name: sum(1 for p, _ in self._waiters if p == priority) for priority, name in PRIORITY_NAMES.items()},
+                "max_queue_depth": self._max_depth,
+                "granted": self._granted,
+                "rejected": self._rejected,
+                "avg_wait_seconds": round(self._total_wait / self._granted, 4) if self._granted else 0.0,
+                "max_wait_seconds": round(self._max_wait, 4),
+            }
@@ -0,0 +1,55 @@
+import asyncio
+import logging
+from typing import Awaitable, Callable, Dict, Hashable, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    """
+    Gabungkan panggilan async identik yang sedang berjalan (single-flight).
+    Pemanggil dengan key yang sama menunggu satu task yang sama. Setiap pemanggil
+    menunggu lewat asyncio.shield, sehingga pembatalan satu pemanggil tidak
+    membatalkan pemanggil lain; task baru dibatalkan jika semua pemanggilnya batal.
+    """
+
+    def __init__(self):
+        self._inflight: Dict[Hashable, asyncio.Task] = {}
+        self._waiters: Dict[Hashable, int] = {}
+        self.calls = 0
+        self.coalesced = 0
+
+    async def do(self, key: Hashable, factory: Callable[[], Awaitable[T]]) -> T:
+        task = self._inflight.get(key)
+        if task is None:
+            self.calls += 1
+            task = asyncio.ensure_future(factory())
+            self._inflight[key] = task
+            self._waiters[key] = 0
+            task.add_done_callback(lambda done, key=key: self._forget(key, done))
+        else:
+            self.coalesced += 1
+            logger.info("Coalesced identical in-flight request")
+
+        self._waiters[key] += 1
+        try:
+            return await asyncio.shield(task)
+        except asyncio.CancelledError:
+            if not task.done() and self._inflight.get(key) is task and self._waiters.get(key) == 1:
+                # Pemanggil terakhir batal: hentikan task dan jangan berikan ke pemanggil baru
+                self._forget(key, task)
+                task.cancel()
+            raise
+        finally:
+            if key in self._waiters and self._inflight.get(key) is task:
+                self._waiters[key] -= 1
+
+    def _forget(self, key: Hashable, task: asyncio.Task):
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+            self._waiters.pop(key, None)
+
+    def in_flight(self) -> int:
+        return len(self._inflight)
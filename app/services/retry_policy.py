@@ -0,0 +1,213 @@
+import asyncio
+import logging
+import math
+import random
+import threading
+import time
+from collections import deque
+from contextlib import aclosing
+from typing import AsyncGenerator, AsyncIterator, Awaitable, Callable, Dict, Optional
+
+import httpx
+from google.genai import errors
+
+logger = logging.getLogger(__name__)
+
+# Status yang layak diulang: rate limit, timeout, dan error server sementara
+RETRYABLE_STATUS_CODES = (408, 429, 500, 502, 503, 504)
+
+
+def is_retryable(error: BaseException) -> bool:
+    """Error sementara dari Gemini/transport. LLMUnavailableError (penolakan lokal) tidak diulang."""
+    if isinstance(error, errors.APIError):
+        return error.code in RETRYABLE_STATUS_CODES
+    return isinstance(error, (httpx.TransportError, TimeoutError, ConnectionError))
+
+
+class RetryPolicy:
+    """
+    Kebijakan retry bersama untuk semua panggilan model:
+    - exponential backoff dengan full jitter (delay acak 0..min(max, base * 2^n))
+    - retry budget: setiap panggilan menambah budget_ratio token, setiap retry/hedge memakai
+      satu token, sehingga saat outage jumlah retry dibatasi sekitar budget_ratio x trafik
+    - hedging opsional: jika attempt pertama belum selesai setelah persentil latency
+      (mis. p95) panggilan sukses terakhir, kirim satu duplikat dan pakai yang selesai duluan
+    """
+
+    def __init__(
+        self,
+        max_attempts: int = 3,
+        base_delay_seconds: float = 0.2,
+        max_delay_seconds: float = 2.0,
+        budget_ratio: float = 0.1,
+        budget_min_tokens: float = 5.0,
+        hedge_enabled: bool = False,
+        hedge_percentile: float = 0.95,
+        hedge_min_samples: int = 20,
+        latency_window: int = 200,
+        seed: Optional[int] = None,
+    ):
+        self.max_attempts = max(1, max_attempts)
+        self.base_delay_seconds = base_delay_seconds
+        self.max_delay_seconds = max_delay_seconds
+        self.budget_ratio = budget_ratio
+        self.budget_min_tokens = budget_min_tokens
+        self.hedge_enabled = hedge_enabled
+        self.hedge_percentile = hedge_percentile
+        self.hedge_min_samples = hedge_min_samples
+        self._tokens = budget_min_tokens
+        self._max_tokens = max(budget_min_tokens, 10.0)
+        self._latencies = deque(maxlen=latency_window)
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.retries = 0
+        self.budget_exhausted = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+
+    def backoff_delay(self, retry: int) -> float:
+        """Delay sebelum retry ke-retry (0-based), full jitter"""
+        cap = min(self.max_delay_seconds, self.base_delay_seconds * (2 ** retry))
+        with self._lock:
+            return self._random.uniform(0, cap)
+
+    def _start_call(self):
+        with self._lock:
+            self.calls += 1
+            self._tokens = min(self._tokens + self.budget_ratio, self._max_tokens)
+
+    def _withdraw(self) -> bool:
+        with self._lock:
+            if self._tokens < 1:
+                self.budget_exhausted += 1
+                return False
+            self._tokens -= 1
+            return True
+
+    def should_retry(self, error: BaseException, attempt: int) -> bool:
+        """attempt = jumlah attempt yang sudah dijalankan; memakai token budget jika True"""
+        if attempt >= self.max_attempts or not is_retryable(error):
+            return False
+        if not self._withdraw():
+            logger.warning("Retry budget exhausted, not retrying LLM call")
+            return False
+        with self._lock:
+            self.retries += 1
+        return True
+
+    def record_latency(self, latency: float):
+        with self._lock:
+            self._latencies.append(latency)
+
+    def hedge_delay(self) -> Optional[float]:
+        """Ambang hedging dari persentil latency sukses; None jika hedging mati/sampel kurang"""
+        if not self.hedge_enabled:
+            return None
+        with self._lock:
+            if len(self._latencies) < self.hedge_min_samples:
+                return None
+            ordered = sorted(self._latencies)
+        index = min(len(ordered) - 1, max(0, math.ceil(self.hedge_percentile * len(ordered)) - 1))
+        return ordered[index]
+
+    async def _attempt(self, call: Callable[[], Awaitable], hedge: bool):
+        """Satu attempt, dengan duplikat (hedge) jika attempt pertama melewati ambang latency"""
+        started = time.monotonic()
+        delay = self.hedge_delay() if hedge else None
+        primary = asyncio.ensure_future(call())
+        tasks = [primary]
+        try:
+            if delay is not None:
+                done, _ = await asyncio.wait(tasks, timeout=delay)
+                if not done and self._withdraw():
+                    with self._lock:
+                        self.hedges += 1
+                    logger.info(f"LLM call slower than {delay:.2f}s, sending hedged request")
+                    tasks.append(asyncio.ensure_future(call()))
+            pending = set(tasks)
+            error = None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is not primary:
+                            with self._lock:
+                                self.hedge_wins += 1
+                        self.record_latency(time.monotonic() - started)
+                        return task.result()
+                    error = error or task.exception()
+            raise error
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+
+    async def run(self, call: Callable[[], Awaitable], hedge: bool = False):
+        """Jalankan call() dengan retry (dan hedging jika hedge=True); raise error terakhir"""
+        self._start_call()
+        attempt = 0
+        while True:
+            attempt += 1
+            try:
+                return await self._attempt(call, hedge)
+            except Exception as e:
+                if not self.should_retry(e, attempt):
+                    raise
+                delay = self.backoff_delay(attempt - 1)
+                logger.warning(f"Retryable LLM error ({str(e)}), retry {attempt} in {delay:.2f}s")
+                await asyncio.sleep(delay)
+
+    async def stream(self, open_stream: Callable[[], AsyncGenerator]) -> AsyncIterator:
+        """
+        Stream dengan retry selama belum ada potongan yang diteruskan ke pemanggil.
+        Setiap attempt adalah generator baru dari open_stream(), ditutup saat selesai atau dibatalkan.
+        """
+        self._start_call()
+        attempt = 0
+        while True:
+            attempt += 1
+            sent = False
+            try:
+                async with aclosing(open_stream()) as chunks:
+                    async for chunk in chunks:
+                        sent = True
+                        yield chunk
+                return
+            except Exception as e:
+                if sent or not self.should_retry(e, attempt):
+                    raise
+                delay = self.backoff_delay(attempt - 1)
+                logger.warning(f"Retryable LLM stream error ({str(e)}), retry {attempt} in {delay:.2f}s")
+                await asyncio.sleep(delay)
+
+    def run_blocking(self, call: Callable):
+        """Versi sync (tanpa hedging) untuk pemanggil non-async"""
+        self._start_call()
+        attempt = 0
+        while True:
+            attempt += 1
+            try:
+                started = time.monotonic()
+                result = call()
+                self.record_latency(time.monotonic() - started)
+                return result
+            except Exception as e:
+                if not self.should_retry(e, attempt):
+                    raise
+                delay = self.backoff_delay(attempt - 1)
+                logger.warning(f"Retryable LLM error ({str(e)}), retry {attempt} in {delay:.2f}s")
+                time.sleep(delay)
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            tokens = self._tokens
+        return {
+            "calls": self.calls,
+            "retries": self.retries,
+            "budget_tokens": round(tokens, 2),
+            "budget_exhausted": self.budget_exhausted,
+            "hedges": self.hedges,
+            "hedge_wins": self.hedge_wins,
+            "hedge_threshold_seconds": self.hedge_delay(),
+        }
@@ -0,0 +1,147 @@
+import logging
+import math
+import re
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+# Kata umum (ID/EN) yang tidak membantu membedakan produk
+STOP_WORDS = {
+    'yang', 'untuk', 'dan', 'dengan', 'buat', 'apa', 'ada', 'di', 'ke', 'dari',
+    'saya', 'aku', 'ini', 'itu', 'mau', 'ingin', 'cari', 'carikan', 'tolong',
+    'rekomendasi', 'rekomendasikan', 'produk', 'yg', 'atau', 'juga', 'bisa',
+    'the', 'for', 'and', 'with', 'a', 'an', 'of', 'to', 'in', 'i', 'need', 'want',
+}
+
+# Bobot field: nama dan kategori lebih penting daripada deskripsi
+FIELD_WEIGHTS = (
+    ('name', 3),
+    ('category', 3),
+    ('brand', 2),
+    ('description', 1),
+)
+
+
+def tokenize(text: str) -> List[str]:
+    """Pecah teks menjadi kata + char trigram (untuk variasi kata seperti game/gaming)"""
+    terms = []
+    for word in TOKEN_PATTERN.findall((text or '').lower()):
+        if word in STOP_WORDS:
+            continue
+        terms.append(word)
+        if len(word) >= 5 and not word.isdigit():
+            padded = f"#{word}#"
+            terms.extend(f"~{padded[i:i + 3]}" for i in range(len(padded) - 2))
+    return terms
+
+
+class SemanticSearchIndex:
+    """
+    Index TF-IDF lokal untuk pencarian produk berbasis kemiripan teks.
+    Berjalan sepenuhnya offline. Vektor disimpan sparse: per produk (term id, bobot)
+    ter-normalisasi, ditambah inverted index per term, sehingga memori sebanding dengan
+    jumlah term yang benar-benar muncul (bukan produk x vocabulary) dan pencarian
+    hanya menyentuh posting list term di query.
+    """
+
+    def __init__(self, products: List[Dict], min_score: float = 0.12):
+        self.min_score = min_score
+        self.size = 0
+        self.vocabulary: Dict[str, int] = {}
+        self.idf = np.zeros(0, dtype=np.float32)
+        # documents[produk] dan postings[term] = (array id, array bobot)
+        self.documents: List[Tuple[np.ndarray, np.ndarray]] = []
+        self.postings: List[Tuple[np.ndarray, np.ndarray]] = []
+        self._build(products)
+
+    def _product_terms(self, product: Dict) -> List[str]:
+        terms = []
+        for field, weight in FIELD_WEIGHTS:
+            value = str(product.get(field, '') or '').replace('_', ' ')
+            terms.extend(tokenize(value) * weight)
+        specifications = product.get('specifications', {}) or {}
+        for key, value in specifications.items():
+            if isinstance(value, str):
+                terms.extend(tokenize(value))
+        return terms
+
+    def _build(self, products: List[Dict]):
+        """Bangun vocabulary, bobot IDF, vektor sparse per produk dan inverted index"""
+        documents = [Counter(self._product_terms(p)) for p in products]
+
+        document_frequency = Counter()
+        for counts in documents:
+            document_frequency.update(counts.keys())
+        terms = sorted(document_frequency)
+        self.vocabulary = {term: i for i, term in enumerate(terms)}
+
+        self.size = len(documents)
+        self.idf = np.array(
+            [math.log((1 + self.size) / (1 + document_frequency[t])) + 1 for t in terms],
+            dtype=np.float32
+        )
+
+        posting_docs: List[List[int]] = [[] for _ in terms]
+        posting_weights: List[List[float]] = [[] for _ in terms]
+        self.documents = []
+        for row, counts in enumerate(documents):
+            ids, weights = self._weigh(counts)
+            self.documents.append((ids, weights))
+            for term_id, weight in zip(ids.tolist(), weights.tolist()):
+                posting_docs[term_id].append(row)
+                posting_weights[term_id].append(weight)
+        self.postings = [
+            (np.array(docs, dtype=np.int32), np.array(weights, dtype=np.float32))
+            for docs, weights in zip(posting_docs, posting_weights)
+        ]
+
+        nonzero = sum(len(ids) for ids, _ in self.documents)
+        logger.info(f"Built semantic index: {self.size} products, {len(self.vocabulary)} terms, {nonzero} non-zero weights")
+
+    def _weigh(self, counts: Counter) -> Tuple[np.ndarray, np.ndarray]:
+        """Counter term (semua ada di vocabulary) -> (term id, bobot TF-IDF ter-normalisasi)"""
+        ids = np.fromiter((self.vocabulary[t] for t in counts), dtype=np.int32, count=len(counts))
+        weights = np.fromiter((1 + math.log(c) for c in counts.values()), dtype=np.float32, count=len(counts))
+        weights *= self.idf[ids]
+        norm = np.linalg.norm(weights)
+        if norm:
+            weights /= norm
+        return ids, weights
+
+    def _scores(self, ids: np.ndarray, weights: np.ndarray) -> np.ndarray:
+        """Cosine similarity vektor sparse terhadap semua produk lewat posting list"""
+        scores = np.zeros(self.size, dtype=np.float32)
+        for term_id, weight in zip(ids.tolist(), weights.tolist()):
+            docs, doc_weights = self.postings[term_id]
+            scores[docs] += weight * doc_weights
+        return scores
+
+    def similarity(self, position: int) -> np.ndarray:
+        """Kemiripan teks produk pada posisi tertentu terhadap semua produk"""
+        return self._scores(*self.documents[position])
+
+    def search(self, query: str, top_k: int = 5, mask: Optional[np.ndarray] = None) -> List[Tuple[int, float]]:
+        """
+        Cari top-k produk dengan cosine similarity tertinggi.
+        `mask` (boolean per produk) membatasi kandidat, misal hasil filter kategori/harga.
+        Return: list (index produk, skor) terurut dari skor tertinggi
+        """
+        if top_k <= 0 or not self.size:
+            return []
+        counts = Counter(t for t in tokenize(query) if t in self.vocabulary)
+        if not counts:
+            return []
+
+        scores = self._scores(*self._weigh(counts))
+        if mask is not None:
+            scores = np.where(mask, scores, -1.0)
+
+        k = min(top_k, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top], kind='stable')]
+        return [(int(i), float(scores[i])) for i in top if scores[i] >= self.min_score]
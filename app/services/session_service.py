@@ -0,0 +1,134 @@
+import logging
+import re
+from typing import Dict, List, Optional, Tuple
+
+from app.utils.cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+# Kata yang menandakan pertanyaan lanjutan atas rekomendasi sebelumnya
+FOLLOW_UP_PREFIXES = ('yang ', 'kalau ', 'gimana ', 'bagaimana dengan ', 'ada yang ', 'ada lagi', 'lainnya',
+                      'how about ', 'what about ', 'any ')
+REFINEMENTS: Dict[str, Tuple[str, ...]] = {
+    'cheaper': ('lebih murah', 'termurah', 'yang murah', 'cheaper', 'cheapest'),
+    'pricier': ('lebih mahal', 'premium', 'high end', 'flagship'),
+    'best_rated': ('rating', 'terbaik', 'lebih bagus', 'paling bagus', 'best'),
+    'best_selling': ('terlaris', 'populer', 'laris', 'popular'),
+}
+REFINEMENT_MESSAGES = {
+    'cheaper': "Berikut pilihan yang lebih murah dari rekomendasi sebelumnya.",
+    'pricier': "Berikut pilihan yang lebih premium dari rekomendasi sebelumnya.",
+    'best_rated': "Berikut rekomendasi sebelumnya dengan rating tertinggi.",
+    'best_selling': "Berikut rekomendasi sebelumnya yang paling laris.",
+    None: "Berikut produk dari rekomendasi sebelumnya yang sesuai permintaan Anda.",
+}
+
+
+def summarize_answer(answer: str, max_chars: int = 160) -> str:
+    """Ringkasan jawaban: kalimat pertama, dipotong max_chars"""
+    text = " ".join((answer or '').split())
+    first = re.split(r"(?<=[.!?])\s", text, maxsplit=1)[0]
+    return first if len(first) <= max_chars else first[:max_chars - 3].rstrip() + "..."
+
+
+def refinement_kind(question: str) -> Optional[str]:
+    question_lower = (question or '').lower()
+    for kind, words in REFINEMENTS.items():
+        if any(word in question_lower for word in words):
+            return kind
+    return None
+
+
+def is_follow_up(question: str, intent: Dict, session: Dict, max_words: int = 8) -> bool:
+    """Pertanyaan pendek tanpa kategori baru yang merujuk ke rekomendasi sebelumnya"""
+    question_lower = (question or '').lower().strip()
+    if not session.get("candidate_ids") or len(question_lower.split()) > max_words:
+        return False
+    if intent.get("category") and intent["category"] != session["intent"].get("category"):
+        return False
+    return refinement_kind(question_lower) is not None or question_lower.startswith(FOLLOW_UP_PREFIXES)
+
+
+def refine_candidates(question: str, candidates: List[Dict], shown: List[Dict]) -> Tuple[List[Dict], str]:
+    """
+    Saring/urutkan ulang kandidat sesi sebelumnya sesuai pertanyaan lanjutan
+    (brand, budget "X juta", lebih murah/mahal, rating, terlaris).
+    Return: (kandidat hasil refine, pesan); list kosong jika tidak ada yang cocok.
+    """
+    question_lower = (question or '').lower()
+    kind = refinement_kind(question_lower)
+    results = list(candidates)
+
+    brands = {p.get('brand', '').lower() for p in results if p.get('brand')}
+    mentioned = {brand for brand in brands if re.search(rf"\b{re.escape(brand)}\b", question_lower)}
+    if mentioned:
+        results = [p for p in results if p.get('brand', '').lower() in mentioned]
+
+    price_match = re.search(r'(\d+)\s*juta', question_lower)
+    if price_match:
+        max_price = int(price_match.group(1)) * 1000000
+        results = [p for p in results if p.get('price', 0) <= max_price]
+
+    reference_price = shown[0].get('price', 0) if shown else None
+    if kind == 'cheaper':
+        if reference_price:
+            results = [p for p in results if p.get('price', 0) < reference_price]
+        results.sort(key=lambda p: p.get('price', 0))
+    elif kind == 'pricier':
+        if reference_price:
+            results = [p for p in results if p.get('price', 0) > reference_price]
+        results.sort(key=lambda p: p.get('price', 0), reverse=True)
+    elif kind == 'best_rated':
+        results.sort(key=lambda p: p.get('specifications', {}).get('rating', 0), reverse=True)
+    elif kind == 'best_selling':
+        results.sort(key=lambda p: p.get('specifications', {}).get('sold', 0), reverse=True)
+
+    return results, REFINEMENT_MESSAGES[kind]
+
+
+class SessionStore:
+    """
+    State percakapan per session_id (LRU + TTL): intent terakhir, id kandidat produk,
+    id produk yang ditampilkan, dan ringkasan beberapa giliran terakhir (bukan transkrip penuh).
+    """
+
+    def __init__(self, max_sessions: int = 10000, ttl_seconds: float = 1800, max_turns: int = 3):
+        self.max_turns = max_turns
+        self._sessions = TTLCache(max_size=max_sessions, ttl_seconds=ttl_seconds)
+
+    def get(self, session_id: str) -> Optional[Dict]:
+        return self._sessions.get(session_id)
+
+    def record_retrieval(self, session_id: str, question: str, intent: Dict, candidates: List[Dict], shown: List[Dict]):
+        session = self._sessions.get(session_id) or {"history": []}
+        session["intent"] = intent
+        session["candidate_ids"] = [p.get('id') for p in candidates if p.get('id')]
+        session["shown_ids"] = [p.get('id') for p in shown if p.get('id')]
+        session["history"] = (session["history"] + [{
+            "question": question,
+            "products": [p.get('name', '') for p in shown[:3]],
+            "summary": "",
+        }])[-self.max_turns:]
+        self._sessions.set(session_id, session)
+
+    def record_answer(self, session_id: str, answer: str):
+        session = self._sessions.get(session_id)
+        if session and session["history"]:
+            session["history"][-1]["summary"] = summarize_answer(answer)
+            self._sessions.set(session_id, session)
+
+    def history_lines(self, session_id: str) -> List[str]:
+        """Ringkasan giliran sebelumnya untuk prompt (tanpa giliran yang sedang berjalan)"""
+        session = self._sessions.get(session_id)
+        if not session:
+            return []
+        lines = []
+        for turn in session["history"]:
+            if not turn["summary"]:
+                continue
+            products = ", ".join(name for name in turn["products"] if name)
+            lines.append(f"User: {turn['question']} | Shown: {products or '-'} | Answer: {turn['summary']}")
+        return lines
+
+    def __len__(self) -> int:
+        return len(self._sessions)
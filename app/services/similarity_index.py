@@ -0,0 +1,60 @@
+import logging
+from typing import Dict, List
+
+import numpy as np
+
+from app.services.semantic_search_service import SemanticSearchIndex
+
+logger = logging.getLogger(__name__)
+
+# Bobot komponen kemiripan
+CATEGORY_WEIGHT = 1.0
+BRAND_WEIGHT = 0.3
+PRICE_WEIGHT = 0.5
+TEXT_WEIGHT = 1.0
+
+
+class SimilarProductsIndex:
+    """
+    Daftar tetangga "produk serupa" yang dihitung offline saat katalog dimuat.
+    Skor = kategori sama + brand sama + kedekatan harga (skala log) + kemiripan teks TF-IDF.
+    Disimpan ringkas sebagai matriks int32 (n x k) berisi posisi produk, sehingga lookup O(1).
+    """
+
+    def __init__(self, products: List[Dict], text_index: SemanticSearchIndex, neighbors: int = 10, block_size: int = 512):
+        self.neighbors = neighbors
+        self.table = np.zeros((0, 0), dtype=np.int32)
+        self._build(products, text_index, block_size)
+
+    def _build(self, products: List[Dict], text_index: SemanticSearchIndex, block_size: int):
+        n = len(products)
+        k = min(self.neighbors, max(n - 1, 0))
+        self.table = np.full((n, k), -1, dtype=np.int32)
+        if k == 0:
+            return
+
+        _, categories = np.unique([p.get('category', '') or '' for p in products], return_inverse=True)
+        _, brands = np.unique([p.get('brand', '') or '' for p in products], return_inverse=True)
+        log_prices = np.log1p(np.array([max(p.get('price', 0) or 0, 0) for p in products], dtype=np.float64))
+
+        # Dihitung per blok baris agar memori tetap O(block x n), bukan O(n^2)
+        for start in range(0, n, block_size):
+            rows = slice(start, min(start + block_size, n))
+            scores = TEXT_WEIGHT * np.stack([text_index.similarity(i) for i in range(start, rows.stop)]).astype(np.float64)
+            scores = scores + CATEGORY_WEIGHT * (categories[rows, None] == categories[None, :])
+            scores = scores + BRAND_WEIGHT * (brands[rows, None] == brands[None, :])
+            # Selisih harga 2x lipat -> kedekatan ~0.3, 10x lipat -> 0
+            price_gap = np.abs(log_prices[rows, None] - log_prices[None, :])
+            scores = scores + PRICE_WEIGHT * np.clip(1 - price_gap / np.log(10), 0, 1)
+            scores[np.arange(rows.stop - start), np.arange(start, rows.stop)] = -np.inf
+
+            top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+            top_scores = np.take_along_axis(scores, top, axis=1)
+            order = np.argsort(-top_scores, axis=1, kind='stable')
+            self.table[rows] = np.take_along_axis(top, order, axis=1)
+
+        logger.info(f"Built similar-products index: {n} products x {k} neighbors")
+
+    def neighbors_of(self, position: int, limit: int = 5) -> List[int]:
+        """Posisi produk serupa untuk produk pada posisi tertentu"""
+        return [int(i) for i in self.table[position, :limit] if i >= 0]
@@ -0,0 +1,106 @@
+import logging
+from typing import Callable, Dict, Iterator, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+SORT_KEYS: Dict[str, Callable[[Dict], object]] = {
+    'price': lambda p: p.get('price', 0) or 0,
+    'rating': lambda p: p.get('specifications', {}).get('rating', 0) or 0,
+    'sold': lambda p: p.get('specifications', {}).get('sold', 0) or 0,
+    'reviews': lambda p: p.get('reviews_count', 0) or 0,
+    'name': lambda p: (p.get('name', '') or '').lower(),
+}
+
+# Contoh: "price", "-rating", "-sold,price" (prefix "-" = descending)
+_KEY_ALTERNATION = '|'.join(SORT_KEYS)
+SORT_PATTERN = rf"^-?({_KEY_ALTERNATION})(,-?({_KEY_ALTERNATION}))*$"
+
+SortSpec = List[Tuple[str, bool]]
+
+
+def parse_sort_spec(sort: str) -> SortSpec:
+    """'-rating,price' -> [('rating', True), ('price', False)]"""
+    spec = []
+    for part in sort.split(','):
+        part = part.strip()
+        descending = part.startswith('-')
+        key = part.lstrip('-')
+        if key not in SORT_KEYS:
+            raise ValueError(f"Unknown sort key: {key}")
+        spec.append((key, descending))
+    return spec
+
+
+class SortIndex:
+    """
+    Permutasi terurut per key yang dihitung sekali saat katalog dimuat.
+    Listing terurut cukup berjalan di permutasi sambil menerapkan filter,
+    tanpa sort O(n log n) per request. Key sekunder hanya dipakai untuk
+    mengurutkan grup yang nilainya sama pada key utama.
+    """
+
+    def __init__(self, products: List[Dict]):
+        self.size = len(products)
+        self._ascending: Dict[str, List[int]] = {}
+        self._descending: Dict[str, List[int]] = {}
+        self._rank: Dict[str, List[int]] = {}
+        self._positions = {id(product): i for i, product in enumerate(products)}
+        self._build(products)
+
+    def _build(self, products: List[Dict]):
+        for key, getter in SORT_KEYS.items():
+            values = [getter(p) for p in products]
+            ascending = sorted(range(self.size), key=lambda i: values[i])
+            # Dense rank: nilai sama -> rank sama, dipakai untuk tie-break dan grouping
+            rank = [0] * self.size
+            current = -1
+            previous = object()
+            for i in ascending:
+                if values[i] != previous:
+                    current += 1
+                    previous = values[i]
+                rank[i] = current
+            self._ascending[key] = ascending
+            # Descending tetap stabil terhadap urutan katalog untuk nilai yang sama
+            self._descending[key] = sorted(range(self.size), key=lambda i: -rank[i])
+            self._rank[key] = rank
+        logger.info(f"Built sort permutations for {len(SORT_KEYS)} keys over {self.size} products")
+
+    def iter_sorted(self, sort: str, allowed: Optional[Set[int]] = None) -> Iterator[int]:
+        """Yield posisi produk terurut sesuai spec, hanya untuk posisi di `allowed` (None = semua)"""
+        spec = parse_sort_spec(sort)
+        primary, descending = spec[0]
+        permutation = self._descending[primary] if descending else self._ascending[primary]
+        primary_rank = self._rank[primary]
+        secondary = spec[1:]
+
+        def secondary_key(position):
+            return tuple(-self._rank[k][position] if desc else self._rank[k][position] for k, desc in secondary)
+
+        # Subset kecil: lebih murah mengurutkan subset langsung dengan rank yang sudah ada
+        if allowed is not None and len(allowed) * 8 < self.size:
+            signed_primary = (lambda i: -primary_rank[i]) if descending else (lambda i: primary_rank[i])
+            yield from sorted(allowed, key=lambda i: (signed_primary(i), secondary_key(i), i))
+            return
+
+        group: List[int] = []
+        group_rank = None
+        for position in permutation:
+            if allowed is not None and position not in allowed:
+                continue
+            if not secondary:
+                yield position
+                continue
+            if primary_rank[position] != group_rank and group:
+                yield from sorted(group, key=secondary_key)
+                group = []
+            group_rank = primary_rank[position]
+            group.append(position)
+        if group:
+            yield from sorted(group, key=secondary_key)
+
+    def sort_products(self, products: List[Dict], sort: str) -> List[Dict]:
+        """Urutkan subset produk katalog (misal hasil pencarian) memakai permutasi yang sudah ada"""
+        allowed = {self._positions[id(p)] for p in products if id(p) in self._positions}
+        by_position = {self._positions[id(p)]: p for p in products if id(p) in self._positions}
+        return [by_position[i] for i in self.iter_sorted(sort, allowed)]
@@ -0,0 +1,130 @@
+import logging
+import re
+from bisect import bisect_left, bisect_right
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+CAPACITY_PATTERN = re.compile(r"(\d+(?:\.\d+)?)\s*(tb|gb)\b")
+BATTERY_PATTERN = re.compile(r"(\d+(?:\.\d+)?)\s*mah\b")
+SCREEN_PATTERN = re.compile(r"(\d+(?:\.\d+)?)\s*(?:inch|in\b|\")")
+WEIGHT_PATTERN = re.compile(r"(\d+(?:\.\d+)?)\s*(kg|g)\b")
+
+Range = Tuple[float, float]
+
+
+def _to_range(values: List[float]) -> Optional[Range]:
+    return (min(values), max(values)) if values else None
+
+
+def parse_capacity_gb(text: str) -> Optional[Range]:
+    """'256GB, 512GB, 1TB' -> (256, 1024)"""
+    values = [float(n) * (1024 if unit == 'tb' else 1) for n, unit in CAPACITY_PATTERN.findall(text.lower())]
+    return _to_range(values)
+
+
+def parse_battery_mah(text: str) -> Optional[Range]:
+    """'4441 mAh' -> (4441, 4441); kapasitas dalam Wh/jam diabaikan"""
+    return _to_range([float(n) for n in BATTERY_PATTERN.findall(text.lower())])
+
+
+def parse_screen_inch(text: str) -> Optional[Range]:
+    """'6.7 inch Super Retina XDR' -> (6.7, 6.7)"""
+    return _to_range([float(n) for n in SCREEN_PATTERN.findall(text.lower())])
+
+
+def parse_weight_g(text: str) -> Optional[Range]:
+    """'0.5kg' -> (500, 500), '249g' -> (249, 249)"""
+    values = [float(n) * (1000 if unit == 'kg' else 1) for n, unit in WEIGHT_PATTERN.findall(text.lower())]
+    return _to_range(values)
+
+
+# Atribut numerik -> (key spesifikasi sumber, parser)
+ATTRIBUTES: Dict[str, Tuple[Tuple[str, ...], Callable[[str], Optional[Range]]]] = {
+    'storage_gb': (('storage',), parse_capacity_gb),
+    'ram_gb': (('ram', 'memory'), parse_capacity_gb),
+    'battery_mah': (('battery',), parse_battery_mah),
+    'screen_inch': (('screen', 'display'), parse_screen_inch),
+    'weight_g': (('weight',), parse_weight_g),
+}
+
+
+class SpecIndex:
+    """
+    Kolom atribut numerik hasil parsing spesifikasi teks, plus index terurut per atribut.
+    Produk dengan beberapa varian (misal storage 256GB-1TB) disimpan sebagai rentang:
+    filter min_* memakai nilai tertinggi, filter max_* memakai nilai terendah.
+    """
+
+    def __init__(self, products: List[Dict]):
+        self.columns: Dict[str, List[Optional[Range]]] = {name: [] for name in ATTRIBUTES}
+        self._by_high: Dict[str, Tuple[List[float], List[int]]] = {}
+        self._by_low: Dict[str, Tuple[List[float], List[int]]] = {}
+        self._build(products)
+
+    def _build(self, products: List[Dict]):
+        for product in products:
+            specifications = product.get('specifications', {}) or {}
+            for name, (keys, parser) in ATTRIBUTES.items():
+                parsed = None
+                for key in keys:
+                    value = specifications.get(key)
+                    if isinstance(value, str):
+                        parsed = parser(value)
+                        if parsed:
+                            break
+                self.columns[name].append(parsed)
+
+        for name, column in self.columns.items():
+            present = [(i, r) for i, r in enumerate(column) if r is not None]
+            by_high = sorted(present, key=lambda item: item[1][1])
+            by_low = sorted(present, key=lambda item: item[1][0])
+            self._by_high[name] = ([r[1] for _, r in by_high], [i for i, _ in by_high])
+            self._by_low[name] = ([r[0] for _, r in by_low], [i for i, _ in by_low])
+
+        parsed_counts = {name: len(self._by_high[name][0]) for name in ATTRIBUTES}
+        logger.info(f"Built spec index: {parsed_counts}")
+
+    def get_attributes(self, position: int) -> Dict[str, Range]:
+        """Atribut ter-parse untuk produk pada posisi tertentu"""
+        return {name: column[position] for name, column in self.columns.items() if column[position] is not None}
+
+    def range_filter(self, name: str, minimum: Optional[float] = None, maximum: Optional[float] = None) -> Set[int]:
+        """Posisi produk yang atributnya masuk rentang [minimum, maximum]"""
+        if name not in ATTRIBUTES:
+            raise ValueError(f"Unknown spec attribute: {name}")
+        result = None
+        if minimum is not None:
+            values, positions = self._by_high[name]
+            result = set(positions[bisect_left(values, minimum):])
+        if maximum is not None:
+            values, positions = self._by_low[name]
+            matches = set(positions[:bisect_right(values, maximum)])
+            result = matches if result is None else result & matches
+        if result is None:
+            result = set(self._by_high[name][1])
+        return result
+
+    def matching_positions(self, filters: Optional[Dict]) -> Optional[Set[int]]:
+        """
+        Terapkan filter seperti {'min_storage_gb': 512, 'max_weight_g': 1500}.
+        Return None jika tidak ada filter aktif (semua produk lolos).
+        """
+        if not filters:
+            return None
+        bounds: Dict[str, List[Optional[float]]] = {}
+        for key, value in filters.items():
+            if value is None:
+                continue
+            bound, _, name = key.partition('_')
+            if bound not in ('min', 'max') or name not in ATTRIBUTES:
+                raise ValueError(f"Unknown spec filter: {key}")
+            bounds.setdefault(name, [None, None])[0 if bound == 'min' else 1] = value
+        if not bounds:
+            return None
+
+        result = None
+        for name, (minimum, maximum) in bounds.items():
+            matches = self.range_filter(name, minimum, maximum)
+            result = matches if result is None else result & matches
+        return result
@@ -0,0 +1,126 @@
+import asyncio
+import heapq
+import logging
+import threading
+import time
+from typing import Dict, Hashable, List, Optional
+
+from app.services.rate_limiter import BACKGROUND
+
+logger = logging.getLogger(__name__)
+
+
+class QueryStats:
+    """
+    Penghitung frekuensi pertanyaan (per key ter-normalisasi) dengan jumlah entri terbatas.
+    Jika penuh, 10% entri dengan hitungan terendah dibuang.
+    """
+
+    def __init__(self, max_entries: int = 1000):
+        self.max_entries = max_entries
+        self._counts: Dict[Hashable, int] = {}
+        self._questions: Dict[Hashable, str] = {}
+        self._lock = threading.Lock()
+
+    def record(self, key: Hashable, question: str):
+        with self._lock:
+            self._counts[key] = self._counts.get(key, 0) + 1
+            self._questions[key] = question
+            if len(self._counts) > self.max_entries:
+                drop = max(self.max_entries // 10, 1)
+                for stale in heapq.nsmallest(drop, self._counts, key=self._counts.get):
+                    del self._counts[stale]
+                    del self._questions[stale]
+
+    def top(self, n: int) -> List[str]:
+        """Pertanyaan (teks terakhir yang dipakai) dengan frekuensi tertinggi"""
+        with self._lock:
+            return [self._questions[key] for key in heapq.nlargest(n, self._counts, key=self._counts.get)]
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._counts)
+
+
+class WarmupService:
+    """
+    Isi cache jawaban AI untuk pertanyaan saran dan top-N pertanyaan terbanyak,
+    saat startup lalu berkala. Jumlah panggilan paralel dibatasi, memakai prioritas
+    background agar tidak mengalahkan request pengguna, dan pertanyaan yang jawabannya
+    masih ada di cache dilewati.
+    """
+
+    def __init__(
+        self,
+        ai_service,
+        questions: List[str],
+        top_n: int = 20,
+        concurrency: int = 2,
+        interval_seconds: float = 300,
+    ):
+        self.ai_service = ai_service
+        self.questions = list(questions)
+        self.top_n = top_n
+        self.concurrency = concurrency
+        self.interval_seconds = interval_seconds
+        self.ready = False
+        self.last_run: Optional[Dict] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def candidates(self) -> List[str]:
+        """Pertanyaan saran + top-N pertanyaan, tanpa duplikat (per key ter-normalisasi)"""
+        seen = set()
+        result = []
+        for question in self.questions + self.ai_service.query_stats.top(self.top_n):
+            key = self.ai_service.question_key(question)
+            if key not in seen:
+                seen.add(key)
+                result.append(question)
+        return result
+
+    async def warm_once(self) -> Dict:
+        started = time.monotonic()
+        semaphore = asyncio.Semaphore(self.concurrency)
+        counts = {"warmed": 0, "skipped": 0, "failed": 0}
+
+        async def warm(question: str):
+            key = self.ai_service.question_key(question)
+            if key in self.ai_service.answer_cache:
+                counts["skipped"] += 1
+                return
+            async with semaphore:
+                try:
+                    await self.ai_service.get_response(question, priority=BACKGROUND, record=False)
+                except Exception as e:
+                    logger.error(f"Warm-up failed for question: {str(e)}")
+                counts["warmed" if key in self.ai_service.answer_cache else "failed"] += 1
+
+        await asyncio.gather(*(warm(question) for question in self.candidates()))
+        self.ready = True
+        self.last_run = {**counts, "duration_seconds": round(time.monotonic() - started, 3)}
+        logger.info(f"Answer cache warm-up finished: {self.last_run}")
+        return self.last_run
+
+    async def _run(self):
+        while True:
+            try:
+                await self.warm_once()
+            except Exception as e:
+                logger.error(f"Error during warm-up: {str(e)}")
+                self.ready = True
+            if self.interval_seconds <= 0:
+                return
+            await asyncio.sleep(self.interval_seconds)
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.ensure_future(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
@@ -0,0 +1,201 @@
+import gzip
+import logging
+import threading
+import zlib
+from typing import Dict, Iterable, Optional
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.utils.cache import TTLCache
+from app.utils.http_cache import encoded_etag
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - brotli opsional
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+COMPRESSIBLE_TYPES = ("application/json", "text/", "application/javascript", "image/svg+xml")
+
+
+def choose_encoding(accept_encoding: str) -> Optional[str]:
+    """Pilih "br" (jika brotli terpasang) atau "gzip" dari header Accept-Encoding, hormati q=0"""
+    accepted = {}
+    for part in (accept_encoding or "").lower().split(","):
+        name, _, params = part.strip().partition(";")
+        quality = 1.0
+        if params.strip().startswith("q="):
+            try:
+                quality = float(params.strip()[2:])
+            except ValueError:
+                quality = 0.0
+        if name:
+            accepted[name] = quality
+    for encoding in (("br", "gzip") if brotli is not None else ("gzip",)):
+        if accepted.get(encoding, accepted.get("*", 0)) > 0:
+            return encoding
+    return None
+
+
+class _StreamEncoder:
+    """Kompresi bertahap untuk respons streaming; setiap potongan di-flush agar tidak tertahan"""
+
+    def __init__(self, encoding: str, gzip_level: int, brotli_quality: int):
+        if encoding == "br":
+            self._compressor = brotli.Compressor(quality=brotli_quality)
+            self._process, self._flush, self._finish = (
+                self._compressor.process, self._compressor.flush, self._compressor.finish
+            )
+        else:
+            self._compressor = zlib.compressobj(gzip_level, zlib.DEFLATED, 31)
+            self._process = self._compressor.compress
+            self._flush = lambda: self._compressor.flush(zlib.Z_SYNC_FLUSH)
+            self._finish = self._compressor.flush
+
+    def chunk(self, data: bytes, final: bool) -> bytes:
+        return self._process(data) + (self._finish() if final else self._flush())
+
+
+class CompressionMiddleware:
+    """
+    Middleware ASGI gzip/brotli dengan ambang ukuran minimum.
+    - Path di exclude_paths dan respons text/event-stream tidak pernah dikompresi
+    - Respons yang sudah punya Content-Encoding dibiarkan
+    - Body respons ber-ETag (endpoint katalog) disimpan dalam bentuk terkompresi per
+      (ETag, encoding), sehingga request berikutnya tidak mengompresi ulang; ETag
+      diberi akhiran encoding agar tetap strong per representasi
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        minimum_size: int = 1000,
+        gzip_level: int = 6,
+        brotli_quality: int = 5,
+        exclude_paths: Iterable[str] = (),
+        cache_size: int = 256,
+    ):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+        self.exclude_paths = tuple(exclude_paths)
+        self.cache = TTLCache(max_size=cache_size, ttl_seconds=24 * 3600)
+        self._lock = threading.Lock()
+        self.compressed = 0
+        self.cache_hits = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or scope["path"].startswith(self.exclude_paths):
+            await self.app(scope, receive, send)
+            return
+        headers = Headers(scope=scope)
+        encoding = choose_encoding(headers.get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+        responder = _CompressionResponder(self, send, encoding, headers.get("if-none-match", ""))
+        await self.app(scope, receive, responder.send)
+
+    def compress(self, body: bytes, encoding: str, etag: Optional[str]) -> bytes:
+        key = (etag, encoding)
+        cached = self.cache.get(key) if etag else None
+        if cached is not None:
+            with self._lock:
+                self.cache_hits += 1
+            return cached
+        if encoding == "br":
+            compressed = brotli.compress(body, quality=self.brotli_quality)
+        else:
+            compressed = gzip.compress(body, compresslevel=self.gzip_level, mtime=0)
+        if etag:
+            self.cache.set(key, compressed)
+        with self._lock:
+            self.compressed += 1
+            self.bytes_in += len(body)
+            self.bytes_out += len(compressed)
+        return compressed
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "compressed": self.compressed,
+                "cache_hits": self.cache_hits,
+                "cached_bodies": len(self.cache),
+                "ratio": round(self.bytes_out / self.bytes_in, 3) if self.bytes_in else 0.0,
+            }
+
+
+class _CompressionResponder:
+    """State satu respons: menahan http.response.start sampai body pertama diketahui"""
+
+    def __init__(self, middleware: CompressionMiddleware, send: Send, encoding: str, if_none_match: str):
+        self.middleware = middleware
+        self._send = send
+        self.encoding = encoding
+        self.if_none_match = if_none_match
+        self.start: Optional[Message] = None
+        self.passthrough = False
+        self.encoder: Optional[_StreamEncoder] = None
+
+    async def send(self, message: Message):
+        if message["type"] == "http.response.start":
+            self.start = message
+            return
+        if message["type"] != "http.response.body" or self.passthrough:
+            await self._send(message)
+            return
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+        if self.encoder is not None:
+            await self._send({"type": "http.response.body", "body": self.encoder.chunk(body, not more_body), "more_body": more_body})
+            return
+
+        headers = MutableHeaders(raw=self.start["headers"])
+        if self.start["status"] == 304:
+            # 304 harus membawa ETag representasi yang disimpan klien (dengan akhiran encoding)
+            etag = headers.get("etag")
+            variant = encoded_etag(etag, self.encoding) if etag else None
+            if variant and variant in self.if_none_match:
+                headers["ETag"] = variant
+            await self._forward(message)
+            return
+        content_type = headers.get("content-type", "")
+        if (
+            "content-encoding" in headers
+            or content_type.startswith("text/event-stream")
+            or not content_type.startswith(COMPRESSIBLE_TYPES)
+        ):
+            await self._forward(message)
+            return
+        headers.add_vary_header("Accept-Encoding")
+        if not more_body and len(body) < self.middleware.minimum_size:
+            await self._forward(message)
+            return
+
+        etag = headers.get("etag")
+        if etag and not etag.startswith("W/"):
+            headers["ETag"] = encoded_etag(etag, self.encoding)
+        else:
+            etag = None
+        headers["Content-Encoding"] = self.encoding
+        if not more_body:
+            compressed = self.middleware.compress(body, self.encoding, etag)
+            headers["Content-Length"] = str(len(compressed))
+            await self._send(self.start)
+            await self._send({"type": "http.response.body", "body": compressed})
+            return
+
+        del headers["Content-Length"]
+        self.encoder = _StreamEncoder(self.encoding, self.middleware.gzip_level, self.middleware.brotli_quality)
+        await self._send(self.start)
+        await self._send({"type": "http.response.body", "body": self.encoder.chunk(body, False), "more_body": True})
+
+    async def _forward(self, message: Message):
+        self.passthrough = True
+        await self._send(self.start)
+        await self._send(message)
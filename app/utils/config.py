@@ -1,5 +1,6 @@
 from pydantic_settings import BaseSettings
 from functools import lru_cache
+from typing import Dict, List, Literal, Optional
 import logging
 
 # Setup logging
@@ -14,6 +15,109 @@ class Settings(BaseSettings):
     FRONTEND_PORT: int = 8501
     DEBUG: bool = True
 
+    # LLM provider: "gemini" atau "fake" (simulasi lokal untuk load test)
+    LLM_PROVIDER: Literal["gemini", "fake"] = "gemini"
+    FAKE_LLM_LATENCY_DISTRIBUTION: Literal["fixed", "uniform", "normal", "lognormal"] = "lognormal"
+    FAKE_LLM_LATENCY_MEAN_SECONDS: float = 0.8
+    FAKE_LLM_LATENCY_STDDEV_SECONDS: float = 0.3
+    FAKE_LLM_ERROR_RATE: float = 0.0
+    FAKE_LLM_RATE_LIMIT_RATE: float = 0.0
+    FAKE_LLM_STREAM_CHUNK_DELAY_SECONDS: float = 0.02
+    FAKE_LLM_SEED: Optional[int] = None
+
+    # Model routing: lookup sederhana -> model cepat, perbandingan/pertanyaan terbuka -> model kuat
+    LLM_FAST_MODEL: str = "gemini-2.0-flash"
+    LLM_STRONG_MODEL: str = "gemini-2.5-flash"
+    MODEL_ROUTING_ENABLED: bool = True
+    MODEL_ROUTING_MAX_SIMPLE_WORDS: int = 12
+
+    # Retry bersama untuk panggilan LLM: backoff + jitter, retry budget, hedging opsional
+    LLM_RETRY_MAX_ATTEMPTS: int = 3
+    LLM_RETRY_BASE_DELAY_SECONDS: float = 0.2
+    LLM_RETRY_MAX_DELAY_SECONDS: float = 2.0
+    LLM_RETRY_BUDGET_RATIO: float = 0.1
+    LLM_RETRY_BUDGET_MIN_TOKENS: float = 5.0
+    LLM_HEDGE_ENABLED: bool = False
+    LLM_HEDGE_PERCENTILE: float = 0.95
+    LLM_HEDGE_MIN_SAMPLES: int = 20
+
+    # Transport HTTP genai.Client (satu client per proses, pool koneksi keep-alive)
+    LLM_HTTP_MAX_CONNECTIONS: int = 64
+    LLM_HTTP_MAX_KEEPALIVE_CONNECTIONS: int = 16
+    LLM_HTTP_KEEPALIVE_EXPIRY_SECONDS: float = 60.0
+    LLM_HTTP_TIMEOUT_SECONDS: float = 30.0
+    LLM_HTTP2_ENABLED: bool = True
+
+    # Pool khusus untuk scan/filter katalog: "thread" atau "process" (LocalProductService per worker)
+    CATALOG_EXECUTOR_MODE: Literal["thread", "process"] = "thread"
+    CATALOG_EXECUTOR_WORKERS: int = 4
+
+    # LLM prompt configuration
+    PROMPT_TOKEN_BUDGET: int = 1200
+    PROMPT_DESCRIPTION_CHARS: int = 200
+
+    # LLM latency and answer cache
+    LLM_DEADLINE_SECONDS: float = 8.0
+    ANSWER_CACHE_SIZE: int = 1024
+    ANSWER_CACHE_TTL_SECONDS: int = 600
+
+    # Warm-up cache jawaban untuk pertanyaan saran + top-N pertanyaan terbanyak
+    WARMUP_ENABLED: bool = True
+    WARMUP_TOP_N: int = 20
+    WARMUP_CONCURRENCY: int = 2
+    WARMUP_INTERVAL_SECONDS: float = 300
+    WARMUP_GATE_READINESS: bool = False
+    QUERY_STATS_MAX_ENTRIES: int = 1000
+
+    # Memori percakapan per session_id (LRU + TTL)
+    SESSION_MAX_SESSIONS: int = 10000
+    SESSION_TTL_SECONDS: int = 1800
+    SESSION_MAX_TURNS: int = 3
+    SESSION_CANDIDATES: int = 20
+
+    # Ask asinkron (job id + polling)
+    ASK_JOB_WORKERS: int = 4
+    ASK_JOB_MAX_PENDING: int = 100
+    ASK_JOB_RESULT_TTL_SECONDS: int = 600
+
+    # LLM circuit breaker and adaptive concurrency
+    CIRCUIT_FAILURE_RATE_THRESHOLD: float = 0.5
+    CIRCUIT_SLOW_CALL_SECONDS: float = 10.0
+    CIRCUIT_SLOW_CALL_RATE_THRESHOLD: float = 0.8
+    CIRCUIT_WINDOW_SIZE: int = 20
+    CIRCUIT_MIN_CALLS: int = 5
+    CIRCUIT_OPEN_SECONDS: float = 30.0
+    CIRCUIT_HALF_OPEN_PROBES: int = 2
+    LLM_CONCURRENCY_INITIAL: int = 8
+    LLM_CONCURRENCY_MIN: int = 1
+    LLM_CONCURRENCY_MAX: int = 64
+    LLM_LATENCY_TARGET_SECONDS: float = 5.0
+
+    # Client-side rate limit (token bucket) untuk kuota Gemini
+    LLM_RATE_LIMIT_PER_SECOND: float = 5.0
+    LLM_RATE_LIMIT_BURST: int = 10
+    LLM_RATE_LIMIT_MAX_QUEUE: int = 50
+    LLM_RATE_LIMIT_MAX_WAIT_SECONDS: float = 2.0
+
+    # HTTP caching endpoint katalog: ETag dari versi katalog, Cache-Control per route
+    HTTP_CACHE_CONTROL: Dict[str, str] = {
+        "products": "public, max-age=60",
+        "categories": "public, max-age=300",
+        "brands": "public, max-age=300",
+        "top_rated": "public, max-age=60",
+        "best_selling": "public, max-age=60",
+        "product": "public, max-age=60",
+    }
+    HTTP_CACHE_CONTROL_DEFAULT: str = "no-cache"
+
+    # Kompresi respons (gzip, brotli jika terpasang)
+    COMPRESSION_ENABLED: bool = True
+    COMPRESSION_MINIMUM_SIZE: int = 1000
+    COMPRESSION_GZIP_LEVEL: int = 6
+    COMPRESSION_BROTLI_QUALITY: int = 5
+    COMPRESSION_EXCLUDE_PATHS: List[str] = ["/api/queries/ask/stream"]
+    COMPRESSION_CACHE_SIZE: int = 256
+
     class Config:
         env_file = ".env"
 
@@ -0,0 +1,114 @@
+import json
+import logging
+import threading
+from typing import Any, Dict, Hashable, Iterable, Optional, Tuple, Type
+
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+from app.utils.projection import PRODUCT_VIEWS, project
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - fallback ke json standar
+    orjson = None
+
+logger = logging.getLogger(__name__)
+
+
+def dumps(content: Any) -> bytes:
+    """Serialisasi JSON ringkas (UTF-8); orjson jika terpasang, json standar jika tidak"""
+    if orjson is not None:
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse dengan encoder cepat; dipakai sebagai default response class aplikasi"""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+class ProductJSONCache:
+    """
+    Fragmen JSON per produk yang sudah diserialisasi, disimpan per versi katalog.
+    Body respons disusun dengan menggabungkan bytes fragmen, sehingga produk
+    tidak divalidasi/diserialisasi ulang di setiap request. Dengan model, fragmen
+    berisi field model (sama seperti response_model); tanpa model, dict apa adanya.
+    fields (proyeksi) diterapkan sebelum serialisasi. Hanya fragmen lengkap dan view tetap
+    (PRODUCT_VIEWS) yang disimpan, sehingga ukuran cache dibatasi produk x view; proyeksi
+    bebas dari klien diserialisasi per request tanpa disimpan.
+    Cache dikosongkan otomatis saat versi katalog berubah.
+    """
+
+    def __init__(self, cached_views: Iterable[Tuple[str, ...]] = PRODUCT_VIEWS.values()):
+        self._cached_fields = {None, *cached_views}
+        self._version: Optional[Hashable] = None
+        self._fragments: Dict[tuple, bytes] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.uncached = 0
+
+    def fragment(
+        self,
+        product: Dict,
+        version: Hashable,
+        model: Optional[Type[BaseModel]] = None,
+        fields: Optional[Tuple[str, ...]] = None
+    ) -> bytes:
+        if fields not in self._cached_fields:
+            with self._lock:
+                self.uncached += 1
+            data = model.model_validate(product).model_dump(mode="json") if model is not None else product
+            return dumps(project(data, fields))
+        key = (product.get("id"), model, fields)
+        with self._lock:
+            if version != self._version:
+                self._version = version
+                self._fragments = {}
+            cached = self._fragments.get(key)
+            if cached is not None:
+                self.hits += 1
+                return cached
+            self.misses += 1
+        data = model.model_validate(product).model_dump(mode="json") if model is not None else product
+        encoded = dumps(project(data, fields))
+        if key[0] is not None:
+            with self._lock:
+                if version == self._version:
+                    self._fragments[key] = encoded
+        return encoded
+
+    def array(
+        self,
+        products: Iterable[Dict],
+        version: Hashable,
+        model: Optional[Type[BaseModel]] = None,
+        fields: Optional[Tuple[str, ...]] = None
+    ) -> bytes:
+        return b"[" + b",".join(self.fragment(p, version, model, fields) for p in products) + b"]"
+
+    def precompute(self, products: Iterable[Dict], version: Hashable, views: Iterable[Tuple[str, ...]]) -> int:
+        """Siapkan fragmen view ringkas untuk semua produk (mis. saat startup); return jumlah fragmen"""
+        count = 0
+        for fields in views:
+            for product in products:
+                self.fragment(product, version, fields=fields)
+                count += 1
+        return count
+
+    def envelope(self, key: str, value: bytes, **fields) -> bytes:
+        """Objek JSON {key: value(bytes siap pakai), **fields} dengan key pertama"""
+        rest = dumps(fields)
+        return b"{" + dumps(key) + b":" + value + (b"," + rest[1:] if fields else b"}")
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "fragments": len(self._fragments),
+                "hits": self.hits,
+                "misses": self.misses,
+                "uncached": self.uncached,
+            }
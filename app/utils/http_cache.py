@@ -0,0 +1,83 @@
+import hashlib
+import logging
+from typing import Callable, Hashable, Optional
+
+from fastapi import Request, Response
+
+from app.utils.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+# Akhiran ETag yang ditambahkan CompressionMiddleware per content-coding
+ETAG_ENCODINGS = ("gzip", "br")
+
+
+def catalog_etag(version: Hashable, request: Request) -> str:
+    """Strong ETag dari versi katalog + path + query string (urutan parameter diabaikan)"""
+    query = "&".join(f"{key}={value}" for key, value in sorted(request.query_params.multi_items()))
+    digest = hashlib.sha1(f"{version}|{request.url.path}|{query}".encode("utf-8")).hexdigest()[:20]
+    return f'"{digest}"'
+
+
+def encoded_etag(etag: str, encoding: str) -> str:
+    """ETag representasi terkompresi: "abc" -> "abc-gzip" (tetap strong per content-coding)"""
+    return f'{etag[:-1]}-{encoding}"' if etag.endswith('"') else etag
+
+
+def _base_etag(tag: str) -> str:
+    tag = tag.removeprefix("W/")
+    for encoding in ETAG_ENCODINGS:
+        suffix = f'-{encoding}"'
+        if tag.endswith(suffix):
+            return tag[:-len(suffix)] + '"'
+    return tag
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """
+    Perbandingan weak If-None-Match (RFC 9110): W/ diabaikan, "*" cocok dengan apa pun.
+    Varian terkompresi ("abc-gzip") dianggap sama dengan ETag dasarnya.
+    """
+    if not if_none_match:
+        return False
+    tags = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in tags or any(_base_etag(tag) == etag for tag in tags)
+
+
+def cache_control_for(route: str) -> str:
+    settings = get_settings()
+    return settings.HTTP_CACHE_CONTROL.get(route, settings.HTTP_CACHE_CONTROL_DEFAULT)
+
+
+class ConditionalGet:
+    """
+    State conditional GET untuk satu request: ETag dan Cache-Control route.
+    Route mengecek not_modified sebelum menghitung respons, lalu memasang header lewat apply().
+    """
+
+    def __init__(self, etag: str, cache_control: str, not_modified: bool):
+        self.etag = etag
+        self.cache_control = cache_control
+        self.not_modified = not_modified
+
+    @property
+    def headers(self) -> dict:
+        return {"ETag": self.etag, "Cache-Control": self.cache_control}
+
+    def not_modified_response(self) -> Response:
+        return Response(status_code=304, headers=self.headers)
+
+    def apply(self, response: Response) -> Response:
+        response.headers.update(self.headers)
+        return response
+
+
+def catalog_conditional(route: str, version: Callable[[], Hashable]) -> Callable:
+    """Dependency FastAPI: ConditionalGet untuk route katalog, version() = versi katalog saat ini"""
+
+    async def dependency(request: Request) -> ConditionalGet:
+        etag = catalog_etag(version(), request)
+        not_modified = etag_matches(request.headers.get("if-none-match"), etag)
+        return ConditionalGet(etag, cache_control_for(route), not_modified)
+
+    return dependency
@@ -0,0 +1,42 @@
+from typing import Dict, Optional, Tuple
+
+# Field level atas produk; spesifikasi bisa dipilih per key dengan "specifications.<key>"
+PRODUCT_FIELDS = (
+    "id", "name", "category", "brand", "price", "currency", "description",
+    "specifications", "images", "url", "availability", "reviews_count",
+)
+# View ringkas yang sering dipakai; fragmen JSON-nya disiapkan saat startup
+PRODUCT_VIEWS: Dict[str, Tuple[str, ...]] = {
+    "list": ("id", "name", "price", "currency", "specifications.rating"),
+    "card": ("id", "name", "brand", "category", "price", "currency", "specifications.rating",
+             "specifications.sold", "images"),
+}
+
+_FIELD = rf"({'|'.join(PRODUCT_FIELDS)}|specifications\.\w+)"
+FIELDS_PATTERN = rf"^({'|'.join(PRODUCT_VIEWS)}|{_FIELD}(,{_FIELD})*)$"
+FIELDS_DESCRIPTION = f"Comma-separated product fields (e.g. id,name,price,specifications.rating) or a view: {', '.join(PRODUCT_VIEWS)}"
+
+
+def parse_fields(fields: Optional[str]) -> Optional[Tuple[str, ...]]:
+    """Nama view atau daftar field dipisah koma -> tuple field unik (urutan dipertahankan); None = semua field"""
+    if not fields:
+        return None
+    if fields in PRODUCT_VIEWS:
+        return PRODUCT_VIEWS[fields]
+    return tuple(dict.fromkeys(field.strip() for field in fields.split(",") if field.strip()))
+
+
+def project(product: Dict, fields: Optional[Tuple[str, ...]]) -> Dict:
+    """Ambil hanya field yang diminta; field yang tidak ada di produk dilewati"""
+    if fields is None:
+        return product
+    result = {}
+    for field in fields:
+        if field.startswith("specifications.") and "specifications" not in fields:
+            key = field.split(".", 1)[1]
+            specifications = product.get("specifications") or {}
+            if key in specifications:
+                result.setdefault("specifications", {})[key] = specifications[key]
+        elif "." not in field and field in product:
+            result[field] = product[field]
+    return result
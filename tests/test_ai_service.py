@@ -109,7 +109,7 @@ async def test_get_response_with_best_request(mock_client):
     mock_client_instance.models.generate_content.return_value = mock_response
     
     # Mock product service
-    with patch('app.services.ai_service.ProductDataService') as mock_product_service:
+    with patch('app.services.ai_service.get_product_service') as mock_product_service:
         mock_service_instance = MagicMock()
         mock_product_service.return_value = mock_service_instance
         mock_service_instance.smart_search_products = AsyncMock(return_value=(
@@ -137,7 +137,7 @@ async def test_get_response_with_budget_request(mock_client):
     mock_client_instance.models.generate_content.return_value = mock_response
     
     # Mock product service
-    with patch('app.services.ai_service.ProductDataService') as mock_product_service:
+    with patch('app.services.ai_service.get_product_service') as mock_product_service:
         mock_service_instance = MagicMock()
         mock_product_service.return_value = mock_service_instance
         mock_service_instance.smart_search_products = AsyncMock(return_value=(
@@ -163,7 +163,7 @@ async def test_get_response_ai_error(mock_client):
     mock_client_instance.models.generate_content.side_effect = Exception("AI Service Error")
     
     # Mock product service
-    with patch('app.services.ai_service.ProductDataService') as mock_product_service:
+    with patch('app.services.ai_service.get_product_service') as mock_product_service:
         mock_service_instance = MagicMock()
         mock_product_service.return_value = mock_service_instance
         mock_service_instance.smart_search_products = AsyncMock(return_value=([], "No products found"))
@@ -204,4 +204,456 @@ async def test_generate_response_legacy_error(mock_client):
     
     ai_service = AIService()
     with pytest.raises(Exception):
-        ai_service.generate_response("Test context") 
\ No newline at end of file
+        ai_service.generate_response("Test context")
+
+@pytest.mark.asyncio
+@patch('app.services.ai_service.genai.Client')
+async def test_stream_response(mock_client):
+    """Test stream_response yields chunk texts from the streaming API"""
+    async def fake_stream():
+        for text in ["Halo ", "", "dunia"]:
+            chunk = MagicMock()
+            chunk.text = text
+            yield chunk
+    mock_client.return_value.aio.models.generate_content_stream = AsyncMock(return_value=fake_stream())
+    
+    ai_service = AIService()
+    chunks = [c async for c in ai_service.stream_response("Test", [{"name": "A", "price": 1}], "note")]
+    assert chunks == ["Halo ", "dunia"]
+
+@pytest.mark.asyncio
+@patch('app.services.ai_service.genai.Client')
+async def test_stream_response_error(mock_client):
+    """Test stream_response falls back to the apology message on error"""
+    mock_client.return_value.aio.models.generate_content_stream = AsyncMock(side_effect=Exception("Stream Error"))
+    
+    ai_service = AIService()
+    chunks = [c async for c in ai_service.stream_response("Test", [], "note")]
+    assert len(chunks) == 1
+    assert "Maaf, saya sedang mengalami kesulitan" in chunks[0]
+
+@pytest.mark.asyncio
+@patch('app.services.ai_service.genai.Client')
+async def test_stream_response_client_disconnect_is_not_a_failure(mock_client):
+    """Test closing the stream early releases the guard without recording a breaker sample"""
+    async def endless_stream():
+        while True:
+            chunk = MagicMock()
+            chunk.text = "token "
+            yield chunk
+    mock_client.return_value.aio.models.generate_content_stream = AsyncMock(return_value=endless_stream())
+    
+    ai_service = AIService()
+    window_before = ai_service.get_metrics()["circuit_breaker"]["window_calls"]
+    stream = ai_service.stream_response("Test", [{"name": "A", "price": 1}], "note")
+    assert await stream.__anext__() == "token "
+    await stream.aclose()
+    
+    metrics = ai_service.get_metrics()
+    assert metrics["circuit_breaker"]["window_calls"] == window_before
+    assert metrics["circuit_breaker"]["failure_rate"] == 0.0
+    assert metrics["concurrency"]["in_flight"] == 0
+
+@pytest.mark.asyncio
+@patch('app.services.ai_service.genai.Client')
+async def test_stream_response_guards_each_attempt(mock_client):
+    """Test a retried stream records one breaker sample per attempt and releases every slot"""
+    from google.genai import errors
+    async def fake_stream():
+        chunk = MagicMock()
+        chunk.text = "Halo"
+        yield chunk
+    mock_client.return_value.aio.models.generate_content_stream = AsyncMock(side_effect=[
+        errors.ServerError(503, {"error": {"code": 503, "status": "UNAVAILABLE", "message": "busy"}}),
+        fake_stream(),
+    ])
+    
+    ai_service = AIService()
+    ai_service.retry_policy.base_delay_seconds = 0
+    chunks = [c async for c in ai_service.stream_response("Test", [{"name": "A", "price": 1}], "note")]
+    assert chunks == ["Halo"]
+    metrics = ai_service.get_metrics()
+    assert metrics["circuit_breaker"]["window_calls"] == 2
+    assert metrics["circuit_breaker"]["failure_rate"] == 0.5
+    assert metrics["concurrency"]["in_flight"] == 0
+    assert metrics["rate_limiter"]["granted"] == 2
+
+@pytest.mark.asyncio
+@patch('app.services.ai_service.genai.Client')
+async def test_get_response_uses_given_retrieval(mock_client):
+    """Test products retrieved by the caller are used as context without a second retrieval"""
+    mock_response = MagicMock()
+    mock_response.text = "Pilih ThinkPad"
+    mock_client.return_value.models.generate_content.return_value = mock_response
+    
+    ai_service = AIService()
+    with patch.object(ai_service, 'retrieve_products', AsyncMock()) as retrieve:
+        retrieved = ([{"id": "X1", "name": "ThinkPad X1", "brand": "Lenovo", "price": 1}], "note")
+        assert await ai_service.get_response("laptop bisnis", retrieved=retrieved) == "Pilih ThinkPad"
+    retrieve.assert_not_called()
+    assert "ThinkPad X1" in mock_client.return_value.models.generate_content.call_args.kwargs["contents"]
+
+@pytest.mark.asyncio
+@patch('app.services.ai_service.genai.Client')
+async def test_losing_hedge_holds_guard_until_generate_returns(mock_client):
+    """Test a cancelled hedge attempt keeps its concurrency slot until the blocking call finishes"""
+    import asyncio
+    import time as time_module
+    calls = []
+    
+    def generate(**kwargs):
+        calls.append(1)
+        time_module.sleep(0.3 if len(calls) == 1 else 0.0)
+        response = MagicMock()
+        response.text = f"answer {len(calls)}"
+        return response
+    mock_client.return_value.models.generate_content.side_effect = generate
+    
+    ai_service = AIService()
+    ai_service.retry_policy.hedge_enabled = True
+    ai_service.retry_policy.hedge_min_samples = 1
+    ai_service.retry_policy.record_latency(0.05)
+    response = await ai_service._call_llm("gemini-2.0-flash", "prompt")
+    assert response.text == "answer 2"
+    assert ai_service.get_metrics()["concurrency"]["in_flight"] == 1
+    
+    await asyncio.sleep(0.4)
+    metrics = ai_service.get_metrics()
+    assert metrics["concurrency"]["in_flight"] == 0
+    assert metrics["circuit_breaker"]["window_calls"] == 2
+
+def test_extract_intent():
+    """Test extract_intent detects category and budget"""
+    with patch('app.services.ai_service.genai'):
+        ai_service = AIService()
+    assert ai_service.extract_intent("laptop murah") == {"category": "laptop", "max_price": 5000000}
+    assert ai_service.extract_intent("hp di bawah 3 juta") == {"category": "smartphone", "max_price": 3000000}
+    assert ai_service.extract_intent("sesuatu") == {"category": None, "max_price": None}
+
+@pytest.mark.asyncio
+@patch('app.services.ai_service.genai.Client')
+async def test_get_response_coalesces_identical_questions(mock_client):
+    """Test concurrent identical questions share one model call"""
+    import asyncio
+    mock_response = MagicMock()
+    mock_response.text = "Shared answer"
+    mock_client.return_value.models.generate_content.return_value = mock_response
+    
+    with patch('app.services.ai_service.get_product_service') as mock_product_service:
+        mock_service_instance = MagicMock()
+        mock_product_service.return_value = mock_service_instance
+        mock_service_instance.catalog_version = "v1"
+        
+        async def slow_search(**kwargs):
+            await asyncio.sleep(0.01)
+            return [], "No products found"
+        mock_service_instance.smart_search_products = slow_search
+        
+        ai_service = AIService()
+        results = await asyncio.gather(
+            ai_service.get_response("Laptop terbaik?"),
+            ai_service.get_response("  laptop TERBAIK "),
+        )
+        assert results == ["Shared answer", "Shared answer"]
+        assert mock_client.return_value.models.generate_content.call_count == 1
+
+@pytest.mark.asyncio
+@patch('app.services.ai_service.genai.Client')
+async def test_get_response_deadline_returns_local_answer(mock_client):
+    """Test a slow model call returns the local answer and caches the late result"""
+    import asyncio
+    import time as time_module
+    
+    def slow_generate(**kwargs):
+        time_module.sleep(0.2)
+        response = MagicMock()
+        response.text = "Late AI answer"
+        return response
+    mock_client.return_value.models.generate_content.side_effect = slow_generate
+    
+    with patch('app.services.ai_service.get_product_service') as mock_product_service:
+        mock_service_instance = MagicMock()
+        mock_product_service.return_value = mock_service_instance
+        mock_service_instance.catalog_version = "v1"
+        mock_service_instance.smart_search_products = AsyncMock(return_value=(
+            [{"name": "MacBook Air", "brand": "Apple", "price": 15000000, "specifications": {"rating": 4.7}}],
+            "Berikut produk yang sesuai dengan kriteria Anda."
+        ))
+        
+        ai_service = AIService()
+        ai_service.deadline_seconds = 0.05
+        result = await ai_service.get_response("laptop kerja")
+        assert "MacBook Air (Apple) - Rp 15,000,000, rating 4.7/5" in result
+        
+        await asyncio.sleep(0.3)
+        assert await ai_service.get_response("laptop kerja") == "Late AI answer"
+
+@pytest.mark.asyncio
+@patch('app.services.ai_service.genai.Client')
+async def test_session_deadline_consumes_late_failure(mock_client):
+    """Test a session answer past the deadline still retrieves the late task's error and caches nothing"""
+    import asyncio
+    import time as time_module
+    
+    def slow_failure(**kwargs):
+        time_module.sleep(0.2)
+        raise Exception("Late API Error")
+    mock_client.return_value.models.generate_content.side_effect = slow_failure
+    
+    ai_service = AIService()
+    ai_service.deadline_seconds = 0.05
+    ai_service.retry_policy.max_attempts = 1
+    with patch.object(ai_service, '_store_late_answer', wraps=ai_service._store_late_answer) as store_late:
+        await ai_service.get_response("laptop kerja", session_id="s1")
+        await asyncio.sleep(0.3)
+    store_late.assert_called_once()
+    key, task = store_late.call_args.args[:2]
+    assert key is None
+    assert str(task.exception()) == "Late API Error"
+    assert len(ai_service.answer_cache) == 0
+    assert ai_service.get_metrics()["concurrency"]["in_flight"] == 0
+
+@pytest.mark.asyncio
+@patch('app.services.ai_service.genai.Client')
+async def test_get_response_uses_answer_cache(mock_client):
+    """Test repeated questions are answered from the answer cache"""
+    mock_response = MagicMock()
+    mock_response.text = "Cached answer"
+    mock_client.return_value.models.generate_content.return_value = mock_response
+    
+    ai_service = AIService()
+    assert await ai_service.get_response("Tablet untuk kreativitas") == "Cached answer"
+    assert await ai_service.get_response("tablet untuk kreativitas?") == "Cached answer"
+    assert mock_client.return_value.models.generate_content.call_count == 1
+
+@pytest.mark.asyncio
+@patch('app.services.ai_service.genai.Client')
+async def test_get_response_open_circuit_skips_model(mock_client):
+    """Test an open circuit breaker answers from retrieval only, without calling the model"""
+    mock_client.return_value.models.generate_content.side_effect = Exception("API Error")
+    
+    with patch('app.services.ai_service.get_product_service') as mock_product_service:
+        mock_service_instance = MagicMock()
+        mock_product_service.return_value = mock_service_instance
+        mock_service_instance.catalog_version = "v1"
+        mock_service_instance.smart_search_products = AsyncMock(return_value=(
+            [{"name": "iPad Air", "brand": "Apple", "price": 9000000, "specifications": {"rating": 4.6}}],
+            "Berikut produk yang sesuai dengan kriteria Anda."
+        ))
+        
+        ai_service = AIService()
+        ai_service.circuit_breaker.min_calls = 2
+        for question in ["tablet 1", "tablet 2"]:
+            assert "Maaf, saya sedang mengalami kesulitan" in await ai_service.get_response(question)
+        assert ai_service.get_metrics()["circuit_breaker"]["state"] == "open"
+        
+        result = await ai_service.get_response("tablet 3")
+        assert "iPad Air (Apple)" in result
+        assert mock_client.return_value.models.generate_content.call_count == 2
+
+@patch('app.services.ai_service.genai.Client')
+def test_generate_response_open_circuit_fails_fast(mock_client):
+    """Test the legacy method raises immediately while the circuit is open"""
+    from app.services.circuit_breaker import CircuitOpenError
+    ai_service = AIService()
+    ai_service.circuit_breaker.min_calls = 1
+    mock_client.return_value.models.generate_content.side_effect = Exception("API Error")
+    with pytest.raises(Exception, match="API Error"):
+        ai_service.generate_response("context")
+    with pytest.raises(CircuitOpenError):
+        ai_service.generate_response("context")
+    assert mock_client.return_value.models.generate_content.call_count == 1
+
+@pytest.mark.asyncio
+async def test_get_response_with_fake_provider():
+    """Test the ask pipeline runs offline with the fake LLM provider"""
+    from app.utils.config import get_settings
+    settings = get_settings().model_copy(update={
+        "LLM_PROVIDER": "fake", "FAKE_LLM_LATENCY_DISTRIBUTION": "fixed", "FAKE_LLM_LATENCY_MEAN_SECONDS": 0
+    })
+    with patch('app.services.ai_service.get_settings', return_value=settings), \
+         patch('app.services.ai_service.genai.Client') as mock_client:
+        ai_service = AIService()
+        assert ai_service.client is None
+        mock_client.assert_not_called()
+        response = await ai_service.get_response("Laptop untuk programming")
+    assert "simulasi" in response
+
+@pytest.mark.asyncio
+@patch('app.services.ai_service.genai.Client')
+async def test_get_response_rate_limited_returns_local_answer(mock_client):
+    """Test a saturated rate limiter fails fast to the local answer without calling the model"""
+    from app.services.rate_limiter import PriorityTokenBucket
+    with patch('app.services.ai_service.get_product_service') as mock_product_service:
+        mock_service_instance = MagicMock()
+        mock_product_service.return_value = mock_service_instance
+        mock_service_instance.catalog_version = "v1"
+        mock_service_instance.smart_search_products = AsyncMock(return_value=(
+            [{"name": "iPad Air", "brand": "Apple", "price": 9000000, "specifications": {"rating": 4.6}}], ""
+        ))
+        
+        ai_service = AIService()
+        ai_service.rate_limiter = PriorityTokenBucket(rate_per_second=0.1, burst=0, max_wait_seconds=1)
+        result = await ai_service.get_response("tablet")
+        assert "iPad Air (Apple)" in result
+        mock_client.return_value.models.generate_content.assert_not_called()
+        metrics = ai_service.get_metrics()
+        assert metrics["rate_limiter"]["rejected"] == 1
+        assert metrics["concurrency"]["in_flight"] == 0
+
+@pytest.mark.asyncio
+@patch('app.services.ai_service.genai.Client')
+async def test_rate_limit_wait_does_not_hold_concurrency_slot(mock_client):
+    """Test requests queued in the rate limiter hold no concurrency slot and the wait is not call latency"""
+    import asyncio
+    import time as time_module
+    from app.services.rate_limiter import PriorityTokenBucket
+    
+    ai_service = AIService()
+    ai_service.rate_limiter = PriorityTokenBucket(rate_per_second=10, burst=1, max_wait_seconds=1)
+    await ai_service.rate_limiter.acquire()
+    queued_at = time_module.monotonic()
+    acquire = asyncio.ensure_future(ai_service._acquire_llm())
+    await asyncio.sleep(0.02)
+    assert not acquire.done()
+    assert ai_service.get_metrics()["concurrency"]["in_flight"] == 0
+    
+    started = await acquire
+    assert started - queued_at >= 0.05
+    assert ai_service.get_metrics()["concurrency"]["in_flight"] == 1
+    ai_service._cancel_llm_guard()
+
+@pytest.mark.asyncio
+@patch('app.services.ai_service.genai.Client')
+async def test_open_circuit_fails_fast_without_waiting_for_tokens(mock_client):
+    """Test an open circuit rejects callers before they queue for (and spend) rate-limit tokens"""
+    import asyncio
+    import time as time_module
+    from app.services.circuit_breaker import CircuitOpenError
+    from app.services.rate_limiter import PriorityTokenBucket
+    
+    ai_service = AIService()
+    ai_service.rate_limiter = PriorityTokenBucket(rate_per_second=1, burst=1, max_wait_seconds=5)
+    ai_service.circuit_breaker._transition(ai_service.circuit_breaker.OPEN)
+    started = time_module.monotonic()
+    results = await asyncio.gather(*[ai_service._acquire_llm() for _ in range(3)], return_exceptions=True)
+    assert time_module.monotonic() - started < 0.5
+    assert all(isinstance(result, CircuitOpenError) for result in results)
+    assert ai_service.get_metrics()["rate_limiter"]["tokens"] == 1
+
+@pytest.mark.asyncio
+@patch('app.services.ai_service.genai.Client')
+async def test_get_response_routes_simple_lookup_to_fast_model(mock_client):
+    """Test a clear single-category lookup is answered by the cheaper model"""
+    mock_response = MagicMock()
+    mock_response.text = "Laptop answer"
+    mock_client.return_value.models.generate_content.return_value = mock_response
+    
+    with patch('app.services.ai_service.get_product_service') as mock_product_service:
+        mock_service_instance = MagicMock()
+        mock_product_service.return_value = mock_service_instance
+        mock_service_instance.catalog_version = "v1"
+        mock_service_instance.smart_search_products = AsyncMock(return_value=(
+            [{"name": "MacBook Air", "category": "laptop"}], "Berikut produk yang sesuai dengan kriteria Anda."
+        ))
+        
+        ai_service = AIService()
+        assert await ai_service.get_response("laptop untuk kuliah") == "Laptop answer"
+        assert await ai_service.get_response("bandingkan laptop untuk kuliah") == "Laptop answer"
+        models = [call.kwargs["model"] for call in mock_client.return_value.models.generate_content.call_args_list]
+        assert models == ["gemini-2.0-flash", "gemini-2.5-flash"]
+        assert ai_service.get_metrics()["models"]["gemini-2.0-flash"]["calls"] == 1
+
+@pytest.mark.asyncio
+@patch('app.services.ai_service.genai.Client')
+async def test_session_follow_up_refines_previous_candidates(mock_client):
+    """Test a follow-up question reuses the session candidates and carries history into the prompt"""
+    mock_response = MagicMock()
+    mock_response.text = "Pilih MacBook Air. Ringan dan awet."
+    mock_client.return_value.models.generate_content.return_value = mock_response
+    catalog = {
+        "1": {"id": "1", "name": "ThinkPad X1", "brand": "Lenovo", "category": "laptop", "price": 20000000, "specifications": {}},
+        "2": {"id": "2", "name": "MacBook Air", "brand": "Apple", "category": "laptop", "price": 15000000, "specifications": {}},
+    }
+    
+    with patch('app.services.ai_service.get_product_service') as mock_product_service:
+        mock_service_instance = MagicMock()
+        mock_product_service.return_value = mock_service_instance
+        mock_service_instance.catalog_version = "v1"
+        mock_service_instance.smart_search_products = AsyncMock(return_value=(
+            list(catalog.values()), "Berikut produk yang sesuai dengan kriteria Anda."
+        ))
+        mock_service_instance.get_product_details.side_effect = catalog.get
+        
+        ai_service = AIService()
+        await ai_service.get_response("laptop untuk kerja", session_id="s1")
+        products, note = await ai_service.retrieve_products("yang lebih murah?", "s1")
+        assert [p["id"] for p in products] == ["2"]
+        assert "lebih murah" in note
+        assert mock_service_instance.smart_search_products.await_count == 1
+        
+        await ai_service.get_response("yang lebih murah?", session_id="s1", retrieved=(products, note))
+        prompt = mock_client.return_value.models.generate_content.call_args.kwargs["contents"]
+        assert "User: laptop untuk kerja | Shown: ThinkPad X1, MacBook Air | Answer: Pilih MacBook Air." in prompt
+
+@pytest.mark.asyncio
+@patch('app.services.ai_service.genai.Client')
+async def test_get_structured_response_validates_product_ids(mock_client):
+    """Test structured output keeps only catalog ids and is cached as ids plus text"""
+    import json
+    mock_response = MagicMock()
+    mock_response.text = json.dumps({"answer": "Ambil MacBook Air.", "product_ids": ["2", "999", "2", "1"]})
+    mock_client.return_value.models.generate_content.return_value = mock_response
+    catalog = {
+        "1": {"id": "1", "name": "ThinkPad X1", "category": "laptop"},
+        "2": {"id": "2", "name": "MacBook Air", "category": "laptop"},
+    }
+    
+    with patch('app.services.ai_service.get_product_service') as mock_product_service:
+        mock_service_instance = MagicMock()
+        mock_product_service.return_value = mock_service_instance
+        mock_service_instance.catalog_version = "v1"
+        mock_service_instance.smart_search_products = AsyncMock(return_value=(list(catalog.values()), "Catatan"))
+        mock_service_instance.get_product_details.side_effect = catalog.get
+        
+        ai_service = AIService()
+        result = await ai_service.get_structured_response("laptop ringan")
+        assert result == {"answer": "Ambil MacBook Air.", "product_ids": ["2", "1"], "note": "Catatan"}
+        assert ai_service.answer_cache.get(ai_service.question_key("laptop ringan")) == result
+        call = mock_client.return_value.models.generate_content.call_args
+        assert call.kwargs["config"]["response_mime_type"] == "application/json"
+        assert "1. [1] ThinkPad X1" in call.kwargs["contents"]
+
+def test_parse_structured_answer_falls_back_to_raw_text():
+    """Test non-JSON output keeps the text and recommends the retrieved products"""
+    with patch('app.services.ai_service.genai'):
+        ai_service = AIService()
+    products = [{"id": "P001"}, {"id": "P002"}]
+    result = ai_service.parse_structured_answer("Jawaban biasa", products, "note")
+    assert result == {"answer": "Jawaban biasa", "product_ids": ["P001", "P002"], "note": "note"}
+    fenced = '```json\n{"answer": "Oke", "product_ids": []}\n```'
+    assert ai_service.parse_structured_answer(fenced, products, "")["answer"] == "Oke"
+
+@pytest.mark.asyncio
+@patch('app.services.ai_service.genai.Client')
+async def test_get_response_retries_transient_server_error(mock_client):
+    """Test a single Gemini 503 is retried instead of returning the apology message"""
+    from google.genai import errors
+    mock_response = MagicMock()
+    mock_response.text = "Jawaban setelah retry"
+    mock_client.return_value.models.generate_content.side_effect = [
+        errors.ServerError(503, {"error": {"code": 503, "status": "UNAVAILABLE", "message": "busy"}}),
+        mock_response,
+    ]
+    
+    with patch('app.services.ai_service.get_product_service') as mock_product_service:
+        mock_service_instance = MagicMock()
+        mock_product_service.return_value = mock_service_instance
+        mock_service_instance.smart_search_products = AsyncMock(return_value=([], ""))
+        
+        ai_service = AIService()
+        ai_service.retry_policy.base_delay_seconds = 0
+        result = await ai_service.get_response("Transient question")
+        assert result == "Jawaban setelah retry"
+        assert ai_service.get_metrics()["retry"]["retries"] == 1
+        assert ai_service.circuit_breaker.snapshot()["window_calls"] == 2
@@ -0,0 +1,62 @@
+import asyncio
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+from app.services.ask_job_service import AskJobService, JobQueueFull
+
+def _ai_service(answer_delay=0.0, error=None):
+    ai_service = MagicMock()
+    ai_service.retrieve_products = AsyncMock(return_value=([{"id": "P001"}], "Berikut produk yang sesuai dengan kriteria Anda."))
+
+    async def get_structured_response(question, session_id=None, retrieved=None):
+        assert retrieved == ([{"id": "P001"}], "Berikut produk yang sesuai dengan kriteria Anda.")
+        await asyncio.sleep(answer_delay)
+        if error:
+            raise error
+        return {"answer": f"Jawaban: {question}", "product_ids": ["P002"], "note": retrieved[1]}
+    ai_service.get_structured_response = get_structured_response
+    ai_service.product_service.get_products_by_ids.side_effect = lambda ids: [{"id": pid} for pid in ids]
+    return ai_service
+
+@pytest.mark.asyncio
+async def test_submit_returns_products_then_answer():
+    service = AskJobService(_ai_service(answer_delay=0.01), workers=2)
+    job = await service.submit("laptop kerja")
+    assert job["status"] == "pending"
+    assert job["products"] == [{"id": "P001"}]
+    assert job["answer"] is None
+    done = await service.wait(job["job_id"], timeout=1)
+    assert done["status"] == "done"
+    assert done["answer"] == "Jawaban: laptop kerja"
+    assert done["product_ids"] == ["P002"]
+    assert done["products"] == [{"id": "P002"}]
+    assert service.ai_service.retrieve_products.await_count == 1
+    await service.stop()
+
+@pytest.mark.asyncio
+async def test_wait_times_out_while_running():
+    service = AskJobService(_ai_service(answer_delay=0.2), workers=1)
+    job = await service.submit("tablet")
+    result = await service.wait(job["job_id"], timeout=0.01)
+    assert result["status"] in ("pending", "running")
+    await service.stop()
+
+@pytest.mark.asyncio
+async def test_failed_job_and_unknown_id():
+    service = AskJobService(_ai_service(error=RuntimeError("boom")), workers=1)
+    job = await service.submit("hp")
+    result = await service.wait(job["job_id"], timeout=1)
+    assert result["status"] == "failed"
+    assert result["error"] == "Error processing question"
+    assert await service.wait("missing", timeout=0) is None
+    await service.stop()
+
+@pytest.mark.asyncio
+async def test_bounded_pending_queue():
+    service = AskJobService(_ai_service(answer_delay=0.2), workers=1, max_pending=1)
+    await service.submit("a")
+    await asyncio.sleep(0)
+    await service.submit("b")
+    with pytest.raises(JobQueueFull):
+        await service.submit("c")
+    assert service.stats()["pending"] == 1
+    await service.stop()
@@ -0,0 +1,48 @@
+from app.services.autocomplete_service import CompletionIndex
+
+def build_index():
+    index = CompletionIndex()
+    index.add("iPhone 15 Pro Max", "product", 1.9)
+    index.add("iPad Air 5th Gen", "product", 1.8)
+    index.add("Samsung", "brand", 2.0)
+    index.add("smartphone", "category", 2.0)
+    index.add("Smartphone dengan kamera terbaik", "query", 3.0)
+    index.build()
+    return index
+
+def test_complete_prefix_ranked_by_weight():
+    index = build_index()
+    results = index.complete("sma", limit=5)
+    assert results[0] == {"text": "Smartphone dengan kamera terbaik", "type": "query"}
+    assert {"text": "smartphone", "type": "category"} in results
+
+def test_complete_matches_word_start():
+    index = build_index()
+    texts = [r["text"] for r in index.complete("pro")]
+    assert "iPhone 15 Pro Max" in texts
+
+def test_complete_is_case_insensitive():
+    index = build_index()
+    assert index.complete("IPH")[0]["text"] == "iPhone 15 Pro Max"
+
+def test_complete_respects_limit_and_empty_prefix():
+    index = build_index()
+    assert len(index.complete("i", limit=1)) == 1
+    assert index.complete("") == []
+    assert index.complete("zzz") == []
+
+def test_add_duplicate_keeps_highest_weight():
+    index = CompletionIndex()
+    index.add("laptop", "category", 2.0)
+    index.add("Laptop", "query", 3.0)
+    index.build()
+    assert len(index) == 1
+    assert index.complete("lap") == [{"text": "Laptop", "type": "query"}]
+
+def test_complete_ranks_whole_prefix_range():
+    index = CompletionIndex()
+    for i in range(500):
+        index.add(f"laptop aa {i:03d}", "product", 1.0)
+    index.add("laptop zz gaming", "query", 3.0)
+    index.build()
+    assert index.complete("lap", limit=1) == [{"text": "laptop zz gaming", "type": "query"}]
@@ -0,0 +1,32 @@
+import time
+from app.utils.cache import TTLCache
+
+def test_set_and_get():
+    cache = TTLCache(max_size=2, ttl_seconds=60)
+    cache.set("a", 1)
+    assert cache.get("a") == 1
+    assert "a" in cache
+    assert cache.get("missing", "default") == "default"
+
+def test_lru_eviction():
+    cache = TTLCache(max_size=2, ttl_seconds=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+    assert "b" not in cache
+    assert cache.get("a") == 1
+    assert len(cache) == 2
+
+def test_expiry():
+    cache = TTLCache(max_size=2, ttl_seconds=60)
+    cache.set("a", 1, ttl_seconds=0.01)
+    time.sleep(0.02)
+    assert cache.get("a") is None
+    assert len(cache) == 0
+
+def test_pop():
+    cache = TTLCache()
+    cache.set("a", 1)
+    assert cache.pop("a") == 1
+    assert cache.pop("a") is None
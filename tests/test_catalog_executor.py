@@ -0,0 +1,57 @@
+import pytest
+from unittest.mock import MagicMock
+from app.services.catalog_executor import CatalogExecutor, get_catalog_executor
+from app.services.product_data_service import ProductDataService
+from app.services.local_product_service import LocalProductService
+
+PRODUCTS = [
+    {"id": "P001", "name": "iPhone 15", "category": "smartphone", "brand": "Apple", "price": 15000000,
+     "description": "Ponsel Apple", "specifications": {"rating": 4.8, "sold": 100}},
+    {"id": "P002", "name": "Galaxy S24", "category": "smartphone", "brand": "Samsung", "price": 14000000,
+     "description": "Ponsel Samsung", "specifications": {"rating": 4.7, "sold": 200}},
+    {"id": "P003", "name": "MacBook Air", "category": "laptop", "brand": "Apple", "price": 18000000,
+     "description": "Laptop Apple", "specifications": {"rating": 4.9, "sold": 50}},
+]
+
+def test_rejects_unknown_mode():
+    with pytest.raises(ValueError):
+        CatalogExecutor(mode="fiber")
+
+@pytest.mark.asyncio
+async def test_thread_pool_runs_method_on_given_service():
+    executor = CatalogExecutor(max_workers=2)
+    service = MagicMock()
+    service.get_products_by_brand.return_value = [{"id": "P001"}]
+    assert await executor.run(service, "get_products_by_brand", "Apple") == [{"id": "P001"}]
+    service.get_products_by_brand.assert_called_once_with("Apple")
+    assert executor.snapshot() == {"mode": "thread", "workers": 2, "submitted": 1, "in_flight": 0}
+    executor.shutdown()
+
+@pytest.mark.asyncio
+async def test_process_pool_workers_use_catalog_snapshot():
+    service = LocalProductService(products=PRODUCTS)
+    executor = CatalogExecutor(mode="process", max_workers=1)
+    try:
+        result = await executor.run(service, "get_products_by_category", "laptop")
+        assert [p["id"] for p in result] == ["P003"]
+        assert await executor.run(service, "get_products_by_brand", "Apple") == service.get_products_by_brand("Apple")
+    finally:
+        executor.shutdown()
+
+def test_process_pool_spawns_workers_instead_of_forking():
+    executor = CatalogExecutor(mode="process", max_workers=1)
+    try:
+        pool = executor._get_pool(LocalProductService(products=PRODUCTS))
+        assert pool._mp_context.get_start_method() == "spawn"
+    finally:
+        executor.shutdown()
+
+def test_local_service_from_products_precomputes_lists():
+    service = LocalProductService(products=PRODUCTS)
+    assert service.get_brands() == ["Apple", "Samsung"]
+    assert service.get_categories() == ["laptop", "smartphone"]
+    assert service.get_product_details("P002")["name"] == "Galaxy S24"
+
+def test_product_services_share_one_executor():
+    first, second = ProductDataService(), ProductDataService()
+    assert first.executor is second.executor is get_catalog_executor()
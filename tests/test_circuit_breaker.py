@@ -0,0 +1,93 @@
+import time
+import pytest
+from app.services.circuit_breaker import (
+    AdaptiveConcurrencyLimiter,
+    CircuitBreaker,
+    CircuitOpenError,
+    ConcurrencyLimitExceeded,
+)
+
+def _fail(breaker, times):
+    for _ in range(times):
+        breaker.before_call()
+        breaker.record(False, 0.1)
+
+def test_opens_on_error_rate():
+    breaker = CircuitBreaker(failure_rate_threshold=0.5, min_calls=4, open_seconds=60)
+    breaker.before_call()
+    breaker.record(True, 0.1)
+    _fail(breaker, 3)
+    assert breaker.state == CircuitBreaker.OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+    assert breaker.snapshot()["rejected"] == 1
+
+def test_check_rejects_open_circuit_without_taking_a_permit():
+    breaker = CircuitBreaker(min_calls=1, open_seconds=0.01, half_open_probes=1)
+    breaker.check()
+    _fail(breaker, 1)
+    with pytest.raises(CircuitOpenError):
+        breaker.check()
+    time.sleep(0.02)
+    breaker.check()
+    breaker.check()
+    assert breaker.state == CircuitBreaker.OPEN
+    breaker.before_call()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.check()
+
+def test_opens_on_slow_calls():
+    breaker = CircuitBreaker(slow_call_seconds=1.0, slow_call_rate_threshold=0.5, min_calls=2)
+    for _ in range(2):
+        breaker.before_call()
+        breaker.record(True, 2.0)
+    assert breaker.state == CircuitBreaker.OPEN
+
+def test_stays_closed_below_min_calls():
+    breaker = CircuitBreaker(min_calls=5)
+    _fail(breaker, 4)
+    assert breaker.state == CircuitBreaker.CLOSED
+
+def test_half_open_probes_close_circuit():
+    breaker = CircuitBreaker(min_calls=1, open_seconds=0.01, half_open_probes=2)
+    _fail(breaker, 1)
+    time.sleep(0.02)
+    breaker.before_call()
+    breaker.before_call()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+    breaker.record(True, 0.1)
+    breaker.record(True, 0.1)
+    assert breaker.state == CircuitBreaker.CLOSED
+
+def test_half_open_probe_failure_reopens():
+    breaker = CircuitBreaker(min_calls=1, open_seconds=0.01, half_open_probes=1)
+    _fail(breaker, 1)
+    time.sleep(0.02)
+    breaker.before_call()
+    breaker.record(False, 0.1)
+    assert breaker.state == CircuitBreaker.OPEN
+
+def test_concurrency_limit_rejects_when_full():
+    limiter = AdaptiveConcurrencyLimiter(initial_limit=1)
+    limiter.acquire()
+    with pytest.raises(ConcurrencyLimitExceeded):
+        limiter.acquire()
+    limiter.release(True, 0.1)
+    limiter.acquire()
+
+def test_concurrency_limit_aimd():
+    limiter = AdaptiveConcurrencyLimiter(initial_limit=4, min_limit=1, max_limit=5, latency_target_seconds=1.0)
+    for _ in range(20):
+        limiter.acquire()
+        limiter.release(True, 0.1)
+    assert limiter.snapshot()["limit"] == 5
+    limiter.acquire()
+    limiter.release(True, 3.0)
+    assert limiter.snapshot()["limit"] == 2
+    for _ in range(3):
+        limiter.acquire()
+        limiter.release(False, 0.1)
+    assert limiter.snapshot()["limit"] == 1
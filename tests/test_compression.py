@@ -0,0 +1,89 @@
+import pytest
+from fastapi import FastAPI, Response
+from fastapi.responses import StreamingResponse
+from httpx import AsyncClient, ASGITransport
+from app.utils.compression import CompressionMiddleware, choose_encoding
+
+BIG = b'{"data":"' + b"x" * 5000 + b'"}'
+
+def _app(**kwargs):
+    app = FastAPI()
+    app.add_middleware(CompressionMiddleware, minimum_size=100, **kwargs)
+
+    @app.get("/big")
+    async def big():
+        return Response(content=BIG, media_type="application/json", headers={"ETag": '"v1"'})
+
+    @app.get("/small")
+    async def small():
+        return Response(content=b'{"a":1}', media_type="application/json")
+
+    @app.get("/events")
+    async def events():
+        return StreamingResponse(iter([b"data: x\n\n"] * 200), media_type="text/event-stream")
+
+    @app.get("/chunks")
+    async def chunks():
+        return StreamingResponse(iter([b"y" * 100] * 20), media_type="text/plain")
+
+    @app.get("/skip/big")
+    async def skip():
+        return Response(content=BIG, media_type="application/json")
+
+    return app
+
+def test_choose_encoding():
+    assert choose_encoding("gzip, deflate") == "gzip"
+    assert choose_encoding("gzip;q=0, deflate") is None
+    assert choose_encoding("*") in ("br", "gzip")
+    assert choose_encoding("") is None
+
+@pytest.mark.asyncio
+async def test_compresses_large_json_and_caches_body():
+    app = _app()
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        first = await ac.get("/big", headers={"Accept-Encoding": "gzip"})
+        second = await ac.get("/big", headers={"Accept-Encoding": "gzip"})
+    assert first.headers["content-encoding"] == "gzip"
+    assert first.headers["etag"] == '"v1-gzip"'
+    assert "Accept-Encoding" in first.headers["vary"]
+    assert first.content == BIG
+    assert int(first.headers["content-length"]) < len(BIG)
+    assert second.content == BIG
+    middleware = app.middleware_stack
+    while not isinstance(middleware, CompressionMiddleware):
+        middleware = middleware.app
+    assert middleware.stats()["cache_hits"] == 1
+
+@pytest.mark.asyncio
+async def test_skips_small_event_stream_and_excluded_paths():
+    app = _app(exclude_paths=["/skip"])
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        small = await ac.get("/small", headers={"Accept-Encoding": "gzip"})
+        events = await ac.get("/events", headers={"Accept-Encoding": "gzip"})
+        skipped = await ac.get("/skip/big", headers={"Accept-Encoding": "gzip"})
+        identity = await ac.get("/big", headers={"Accept-Encoding": "identity"})
+    for response in (small, events, skipped, identity):
+        assert "content-encoding" not in response.headers
+    assert identity.headers["etag"] == '"v1"'
+
+@pytest.mark.asyncio
+async def test_streams_non_event_stream_responses_compressed():
+    app = _app()
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        response = await ac.get("/chunks", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.content == b"y" * 2000
+
+@pytest.mark.asyncio
+async def test_catalog_endpoint_conditional_get_with_compressed_etag():
+    from app.main import app
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        first = await ac.get("/api/products/?limit=50", headers={"Accept-Encoding": "gzip"})
+        assert first.headers["content-encoding"] == "gzip"
+        etag = first.headers["etag"]
+        assert etag.endswith('-gzip"')
+        second = await ac.get("/api/products/?limit=50", headers={"Accept-Encoding": "gzip", "If-None-Match": etag})
+    assert second.status_code == 304
+    assert second.headers["etag"] == etag
+    assert first.json()[0]["id"]
@@ -0,0 +1,50 @@
+import json
+from app.models.product import ProductResponse
+from app.utils.fast_json import FastJSONResponse, ProductJSONCache, dumps
+from app.utils.projection import PRODUCT_VIEWS
+
+PRODUCT = {
+    "id": "P001", "name": "iPhone 15", "category": "smartphone", "brand": "Apple", "price": 15000000,
+    "currency": "IDR", "description": "Ponsel", "specifications": {"rating": 4.8}, "availability": "in_stock",
+    "images": [], "url": ""
+}
+
+def test_dumps_is_compact_utf8():
+    assert dumps({"a": [1, 2], "b": "é"}) == '{"a":[1,2],"b":"é"}'.encode("utf-8")
+
+def test_fast_json_response_renders_content():
+    assert json.loads(FastJSONResponse({"ok": True}).body) == {"ok": True}
+
+def test_fragment_with_model_matches_response_model():
+    cache = ProductJSONCache()
+    fragment = cache.fragment(PRODUCT, "v1", ProductResponse)
+    assert json.loads(fragment) == ProductResponse.model_validate(PRODUCT).model_dump(mode="json")
+    assert "availability" not in json.loads(fragment)
+    assert "availability" in json.loads(cache.fragment(PRODUCT, "v1"))
+
+def test_fragments_are_reused_until_catalog_version_changes():
+    cache = ProductJSONCache()
+    cache.array([PRODUCT], "v1")
+    cache.array([PRODUCT], "v1")
+    assert cache.stats()["hits"] == 1
+    changed = {**PRODUCT, "price": 1}
+    assert json.loads(cache.array([changed], "v2"))[0]["price"] == 1
+    assert cache.stats()["fragments"] == 1
+
+def test_only_full_fragments_and_fixed_views_are_cached():
+    cache = ProductJSONCache()
+    for i in range(50):
+        assert json.loads(cache.fragment(PRODUCT, "v1", fields=("id", f"specifications.x{i}"))) == {"id": "P001"}
+    assert cache.stats()["fragments"] == 0
+    assert cache.stats()["uncached"] == 50
+    cache.fragment(PRODUCT, "v1")
+    cache.fragment(PRODUCT, "v1", fields=PRODUCT_VIEWS["list"])
+    assert cache.stats()["fragments"] == 2
+
+def test_envelope_puts_raw_value_first():
+    cache = ProductJSONCache()
+    body = cache.envelope("products", cache.array([PRODUCT], "v1"), query="iphone", source="local")
+    data = json.loads(body)
+    assert list(data) == ["products", "query", "source"]
+    assert data["products"][0]["id"] == "P001"
+    assert json.loads(cache.envelope("products", b"[]")) == {"products": []}
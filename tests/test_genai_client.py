@@ -0,0 +1,81 @@
+import asyncio
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+import httpx
+import pytest
+
+from app.services.genai_client import ConnectionStats, build_client_args, build_http_options, get_shared_client
+
+SETTINGS = SimpleNamespace(
+    GOOGLE_API_KEY="test-key",
+    LLM_HTTP_MAX_CONNECTIONS=8,
+    LLM_HTTP_MAX_KEEPALIVE_CONNECTIONS=4,
+    LLM_HTTP_KEEPALIVE_EXPIRY_SECONDS=60.0,
+    LLM_HTTP_TIMEOUT_SECONDS=5.0,
+    LLM_HTTP2_ENABLED=False,
+)
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        body = b"ok"
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+@pytest.fixture
+def server_url():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}/"
+    server.shutdown()
+    server.server_close()
+
+def test_http_options_carry_pool_limits_and_timeout():
+    options = build_http_options(SETTINGS, ConnectionStats())
+    assert options.timeout == 5000
+    limits = options.client_args["limits"]
+    assert limits.max_connections == 8
+    assert limits.max_keepalive_connections == 4
+    assert limits.keepalive_expiry == 60.0
+    assert options.client_args["http2"] is False
+
+def test_sync_client_reuses_connection(server_url):
+    stats = ConnectionStats()
+    with httpx.Client(**build_client_args(SETTINGS, stats)) as client:
+        for _ in range(3):
+            assert client.get(server_url).text == "ok"
+    snapshot = stats.snapshot()
+    assert snapshot["requests"] == 3
+    assert snapshot["connections_opened"] == 1
+    assert snapshot["connections_reused"] == 2
+    assert snapshot["http_versions"] == {"HTTP/1.1": 3}
+
+def test_async_client_reuses_connection(server_url):
+    stats = ConnectionStats()
+
+    async def run():
+        async with httpx.AsyncClient(**build_client_args(SETTINGS, stats, asynchronous=True)) as client:
+            for _ in range(2):
+                await client.get(server_url)
+
+    asyncio.run(run())
+    assert stats.snapshot()["connections_opened"] == 1
+    assert stats.snapshot()["reuse_ratio"] == 0.5
+
+def test_shared_client_created_once_per_process():
+    factory = MagicMock()
+    first = get_shared_client(SETTINGS, factory)
+    second = get_shared_client(SETTINGS, factory)
+    assert first is second
+    factory.assert_called_once()
+    assert factory.call_args.kwargs["api_key"] == "test-key"
@@ -0,0 +1,19 @@
+from starlette.requests import Request
+from app.utils.http_cache import catalog_etag, etag_matches
+
+def _request(path, query=""):
+    return Request({"type": "http", "method": "GET", "path": path, "query_string": query.encode(), "headers": []})
+
+def test_etag_ignores_query_parameter_order():
+    first = catalog_etag("v1", _request("/api/products/", "limit=5&category=laptop"))
+    second = catalog_etag("v1", _request("/api/products/", "category=laptop&limit=5"))
+    assert first == second
+    assert first.startswith('"') and first.endswith('"')
+    assert catalog_etag("v2", _request("/api/products/", "limit=5&category=laptop")) != first
+
+def test_etag_matches():
+    assert etag_matches('"abc"', '"abc"')
+    assert etag_matches('"x", W/"abc"', '"abc"')
+    assert etag_matches("*", '"abc"')
+    assert not etag_matches('"abd"', '"abc"')
+    assert not etag_matches(None, '"abc"')
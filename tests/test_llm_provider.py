@@ -0,0 +1,62 @@
+import pytest
+from unittest.mock import MagicMock
+from google.genai import errors
+from app.services.llm_provider import FakeLLMProvider, GeminiProvider, create_provider
+
+PROMPT = "Relevant Products:\n1. MacBook Air | Apple | laptop | Rp 15,000,000 | Rating 4.7/5\n2. ThinkPad X1 | Lenovo | laptop | Rp 20,000,000 | Rating 4.5/5\n"
+
+def test_fake_generate_mentions_prompt_products():
+    provider = FakeLLMProvider(latency_distribution="fixed", latency_mean_seconds=0)
+    response = provider.generate("gemini-2.5-flash", PROMPT)
+    assert "MacBook Air" in response.text
+    assert "ThinkPad X1" in response.text
+    assert provider.calls == 1
+
+def test_fake_structured_output_lists_prompt_ids():
+    import json
+    provider = FakeLLMProvider(latency_distribution="fixed", latency_mean_seconds=0)
+    prompt = "1. [P001] MacBook Air | Apple | laptop\n2. [P002] ThinkPad X1 | Lenovo | laptop\n"
+    data = json.loads(provider.generate("gemini-2.5-flash", prompt, response_schema=dict).text)
+    assert data["product_ids"] == ["P001", "P002"]
+    assert "MacBook Air" in data["answer"]
+
+def test_fake_latency_is_reproducible_with_seed():
+    first = FakeLLMProvider(seed=7)
+    second = FakeLLMProvider(seed=7)
+    samples = [first.sample_latency() for _ in range(5)]
+    assert samples == [second.sample_latency() for _ in range(5)]
+    assert all(sample >= 0 for sample in samples)
+
+def test_fake_errors_and_rate_limits():
+    provider = FakeLLMProvider(latency_distribution="fixed", latency_mean_seconds=0, rate_limit_rate=1.0)
+    with pytest.raises(errors.ClientError) as exc_info:
+        provider.generate("gemini-2.5-flash", PROMPT)
+    assert exc_info.value.code == 429
+    provider = FakeLLMProvider(latency_distribution="fixed", latency_mean_seconds=0, error_rate=1.0)
+    with pytest.raises(errors.ServerError) as exc_info:
+        provider.generate("gemini-2.5-flash", PROMPT)
+    assert exc_info.value.code == 503
+
+def test_fake_rejects_unknown_distribution():
+    with pytest.raises(ValueError):
+        FakeLLMProvider(latency_distribution="pareto")
+
+@pytest.mark.asyncio
+async def test_fake_stream_yields_full_answer():
+    provider = FakeLLMProvider(latency_distribution="fixed", latency_mean_seconds=0, stream_chunk_delay_seconds=0)
+    chunks = [chunk.text async for chunk in provider.generate_stream("gemini-2.5-flash", PROMPT)]
+    assert len(chunks) > 1
+    assert "".join(chunks) == provider.generate("gemini-2.5-flash", PROMPT).text
+
+def test_gemini_provider_delegates_to_client():
+    client = MagicMock()
+    client.models.generate_content.return_value.text = "ok"
+    assert GeminiProvider(client).generate("gemini-2.0-flash", "prompt").text == "ok"
+    client.models.generate_content.assert_called_once_with(model="gemini-2.0-flash", contents="prompt")
+
+def test_create_provider_from_settings():
+    settings = MagicMock(LLM_PROVIDER="fake", FAKE_LLM_LATENCY_DISTRIBUTION="fixed", FAKE_LLM_SEED=1)
+    assert isinstance(create_provider(settings), FakeLLMProvider)
+    settings.LLM_PROVIDER = "other"
+    with pytest.raises(ValueError):
+        create_provider(settings)
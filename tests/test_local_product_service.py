@@ -328,4 +328,64 @@ def test_search_products_with_price_extraction():
     
     # Test with "murah" keyword
     products = service.search_products("smartphone murah", limit=5)
-    assert len(products) > 0 
\ No newline at end of file
+    assert len(products) > 0
+
+
+def test_smart_search_products_semantic_tier():
+    """Test smart_search_products falls back to semantic retrieval for natural-language questions"""
+    service = LocalProductService()
+
+    products, message = service.smart_search_products(keyword="laptop buat kerja", category="laptop", limit=3)
+    assert len(products) > 0
+    assert all("laptop" in p["category"].lower() for p in products)
+    assert "relevan" in message.lower()
+
+def test_semantic_search_products_respects_budget():
+    """Test semantic_search_products applies max_price filter"""
+    service = LocalProductService()
+
+    products = service.semantic_search_products("headphone wireless", max_price=5000000, limit=5)
+    assert all(p["price"] <= 5000000 for p in products)
+
+def test_batch_search_matches_single_searches(service_with_mock_data):
+    """Test batch_search returns the same results as individual searches"""
+    specs = [
+        {"query": "Apple", "limit": 5},
+        {"query": "apple", "category": "laptop", "limit": 5},
+        {"category": "smartphone", "max_price": 20000000, "limit": 5},
+    ]
+    results = service_with_mock_data.batch_search(specs)
+    assert len(results) == 3
+    assert results[0] == service_with_mock_data.search_products("Apple", limit=5)
+    assert [p["id"] for p in results[1]] == ["P003"]
+    assert [p["id"] for p in results[2]] == ["P002"]
+
+def test_batch_search_empty_specs(service_with_mock_data):
+    """Test batch_search with no specs"""
+    assert service_with_mock_data.batch_search([]) == []
+
+def test_search_products_with_spec_filters(service_with_mock_data):
+    """Test search_products with spec range filters"""
+    result = service_with_mock_data.search_products("a", limit=10, spec_filters={"min_battery_mah": 4500})
+    assert [p["id"] for p in result] == ["P002"]
+
+def test_filter_products(service_with_mock_data):
+    """Test filter_products by category and spec range"""
+    result = service_with_mock_data.filter_products(spec_filters={"min_ram_gb": 16})
+    assert [p["id"] for p in result] == ["P003"]
+    result = service_with_mock_data.filter_products(category="smartphone", spec_filters={"min_screen_inch": 6.75})
+    assert [p["id"] for p in result] == ["P002"]
+
+def test_filter_products_sorted(service_with_mock_data):
+    """Test filter_products with sort spec"""
+    result = service_with_mock_data.filter_products(sort="price")
+    assert [p["id"] for p in result] == ["P002", "P001", "P003"]
+    result = service_with_mock_data.search_products("a", limit=2, sort="-price")
+    assert [p["id"] for p in result] == ["P003", "P001"]
+
+def test_get_similar_products(service_with_mock_data):
+    """Test get_similar_products returns neighbors and None for unknown ids"""
+    similar = service_with_mock_data.get_similar_products("P001", limit=2)
+    assert [p["id"] for p in similar][0] == "P002"
+    assert all(p["id"] != "P001" for p in similar)
+    assert service_with_mock_data.get_similar_products("P999") is None
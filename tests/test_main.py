@@ -16,4 +16,19 @@ async def test_health():
         response = await ac.get("/health")
     assert response.status_code == 200
     assert response.json()["status"] == "healthy"
-    assert response.json()["version"] == "1.0.0" 
\ No newline at end of file
+    assert response.json()["version"] == "1.0.0"
+
+@pytest.mark.asyncio
+async def test_ready_gated_on_warmup():
+    from unittest.mock import patch
+    from app.main import app
+    from app.api import queries
+    from app.utils.config import settings
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        with patch.object(settings, "WARMUP_GATE_READINESS", True), patch.object(queries.warmup_service, "ready", False):
+            response = await ac.get("/ready")
+            assert response.status_code == 503
+        with patch.object(settings, "WARMUP_GATE_READINESS", False):
+            response = await ac.get("/ready")
+            assert response.status_code == 200
+            assert response.json()["status"] == "ready"
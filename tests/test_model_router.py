@@ -0,0 +1,41 @@
+from app.services.model_router import ModelRouter
+
+LAPTOPS = [{"category": "laptop"}, {"category": "laptop"}]
+CLEAR = "Berikut produk yang sesuai dengan kriteria Anda."
+
+def test_simple_lookup_uses_fast_model():
+    router = ModelRouter()
+    model = router.choose("laptop di bawah 10 juta", {"category": "laptop"}, LAPTOPS, CLEAR)
+    assert model == "gemini-2.0-flash"
+
+def test_comparative_and_open_ended_use_strong_model():
+    router = ModelRouter()
+    assert router.classify("bandingkan macbook dan thinkpad", {"category": "laptop"}, LAPTOPS, CLEAR) == "comparative"
+    assert router.classify("iphone vs samsung", {"category": None}, LAPTOPS, CLEAR) == "comparative"
+    assert router.classify("bagaimana memilih laptop?", {"category": "laptop"}, LAPTOPS, CLEAR) == "open_ended"
+    assert router.choose("kenapa laptop mahal", {"category": "laptop"}, LAPTOPS, CLEAR) == "gemini-2.5-flash"
+
+def test_weak_matches_use_strong_model():
+    router = ModelRouter()
+    assert router.classify("laptop murah", {"category": None}, LAPTOPS, CLEAR) == "no_category"
+    assert router.classify("laptop murah", {"category": "laptop"}, [], CLEAR) == "weak_match"
+    weak = "Tidak ada produk di bawah budget, berikut produk termurah di kategori tersebut."
+    assert router.classify("laptop 1 juta", {"category": "laptop"}, LAPTOPS, weak) == "weak_match"
+    mixed = [{"category": "laptop"}, {"category": "tablet"}]
+    assert router.classify("laptop kerja", {"category": "laptop"}, mixed, CLEAR) == "multi_category"
+
+def test_routing_disabled_always_strong():
+    router = ModelRouter(enabled=False)
+    assert router.choose("laptop kerja", {"category": "laptop"}, LAPTOPS, CLEAR) == "gemini-2.5-flash"
+
+def test_records_decisions_latency_and_cost():
+    router = ModelRouter()
+    router.choose("laptop kerja", {"category": "laptop"}, LAPTOPS, CLEAR)
+    router.record("gemini-2.0-flash", 0.4, 1000, 200, True)
+    router.record("gemini-2.0-flash", 0.6, 1000, 0, False)
+    stats = router.snapshot()["gemini-2.0-flash"]
+    assert stats["decisions"] == {"simple_lookup": 1}
+    assert stats["calls"] == 2
+    assert stats["errors"] == 1
+    assert stats["avg_latency_seconds"] == 0.5
+    assert stats["estimated_cost_usd"] == round((2000 * 0.10 + 200 * 0.40) / 1_000_000, 6)
@@ -33,7 +33,7 @@ class TestProductDataService:
         assert isinstance(result, list)
         assert len(result) > 0
         assert all("id" in p and "name" in p for p in result)
-        mock_local_service.search_products.assert_called_once_with("iPhone", 5)
+        mock_local_service.search_products.assert_called_once_with("iPhone", 5, None, None)
     
     @pytest.mark.asyncio
     async def test_search_products_error(self, product_service, mock_local_service):
@@ -55,7 +55,7 @@ class TestProductDataService:
         assert isinstance(result, list)
         assert len(result) > 0
         assert all("id" in p and "name" in p for p in result)
-        mock_local_service.search_products.assert_called_once_with("iPhone", 5)
+        mock_local_service.search_products.assert_called_once_with("iPhone", 5, None, None)
     
     @pytest.mark.asyncio
     async def test_get_products_with_category(self, product_service, mock_local_service):
@@ -129,12 +129,13 @@ class TestProductDataService:
         assert all("specifications" in p and "sold" in p["specifications"] for p in result)
         mock_local_service.get_best_selling_products.assert_called_once_with(5)
     
-    def test_get_products_by_category(self, product_service, mock_local_service):
+    @pytest.mark.asyncio
+    async def test_get_products_by_category(self, product_service, mock_local_service):
         """Test getting products by category"""
         mock_products = [{"id": "P001", "name": "iPhone 15 Pro Max", "category": "smartphone"}]
         mock_local_service.get_products_by_category.return_value = mock_products
         
-        result = product_service.get_products_by_category("smartphone", 5)
+        result = await product_service.get_products_by_category("smartphone", 5)
         
         assert isinstance(result, list)
         assert len(result) > 0
@@ -178,12 +179,13 @@ class TestProductDataService:
         assert set(["Apple", "Samsung", "Sony"]).issubset(set(result))
         mock_local_service.get_brands.assert_called_once()
     
-    def test_get_products_by_brand(self, product_service, mock_local_service):
+    @pytest.mark.asyncio
+    async def test_get_products_by_brand(self, product_service, mock_local_service):
         """Test getting products by brand"""
         mock_products = [{"id": "P001", "name": "iPhone 15 Pro Max", "brand": "Apple"}]
         mock_local_service.get_products_by_brand.return_value = mock_products
         
-        result = product_service.get_products_by_brand("Apple", 5)
+        result = await product_service.get_products_by_brand("Apple", 5)
         
         assert isinstance(result, list)
         assert len(result) > 0
@@ -255,4 +257,43 @@ class TestProductDataService:
             limit=3
         )
         assert len(products) > 0  # Should fallback to popular products
-        assert "terpopuler" in message.lower() 
\ No newline at end of file
+        assert "terpopuler" in message.lower()
+
+    @pytest.mark.asyncio
+    async def test_batch_search(self, product_service, mock_local_service):
+        """Test batch_search delegates all specs in a single call"""
+        mock_local_service.batch_search.return_value = [[{"id": "P001"}], []]
+        specs = [{"query": "iphone", "limit": 5}, {"category": "tv", "limit": 5}]
+        
+        results = await product_service.batch_search(specs)
+        assert results == [[{"id": "P001"}], []]
+        mock_local_service.batch_search.assert_called_once_with(specs)
+
+    @pytest.mark.asyncio
+    async def test_batch_search_error(self, product_service, mock_local_service):
+        """Test batch_search returns empty results on error"""
+        mock_local_service.batch_search.side_effect = Exception("boom")
+        
+        results = await product_service.batch_search([{"query": "a"}, {"query": "b"}])
+        assert results == [[], []]
+
+def test_shared_product_service_used_by_routers_and_ai_service():
+    """Routers and AIService share one ProductDataService (one catalog per process)"""
+    from app.api import products, queries
+    from app.services.product_data_service import get_product_service
+    shared = get_product_service()
+    assert products.product_service is shared
+    assert queries.product_service is shared
+    assert queries.ai_service.product_service is shared
+
+def test_catalog_version_is_stable_across_loads():
+    """Sold counts are derived from product ids, so reloading yields the same catalog"""
+    first, second = LocalProductService(), LocalProductService()
+    assert first.products == second.products
+    assert first.catalog_version == second.catalog_version
+
+def test_get_products_by_ids_keeps_order_and_skips_unknown():
+    service = ProductDataService()
+    ids = [p["id"] for p in service.get_all_products(3)]
+    products = service.get_products_by_ids([ids[2], "missing", ids[0]])
+    assert [p["id"] for p in products] == [ids[2], ids[0]]
@@ -155,4 +155,156 @@ async def test_get_best_selling_products_error(mock_service):
     from app.main import app
     async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
         resp = await ac.get("/api/products/best-selling")
-    assert resp.status_code == 500 
\ No newline at end of file
+    assert resp.status_code == 500
+
+
+@pytest.mark.asyncio
+@patch("app.api.products.product_service")
+async def test_batch_search_products(mock_service):
+    mock_service.batch_search = AsyncMock(return_value=[
+        [{"id": "P001", "name": "iPhone 15 Pro Max"}],
+        []
+    ])
+    from app.main import app
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        resp = await ac.post("/api/products/search/batch", json={"searches": [
+            {"id": "phones", "query": "iPhone", "limit": 5},
+            {"id": "tv", "category": "tv"}
+        ]})
+    assert resp.status_code == 200
+    data = resp.json()
+    assert data["source"] == "local"
+    assert [r["id"] for r in data["results"]] == ["phones", "tv"]
+    assert data["results"][0]["count"] == 1
+    assert data["results"][1]["products"] == []
+    mock_service.batch_search.assert_awaited_once()
+
+@pytest.mark.asyncio
+async def test_batch_search_products_validation():
+    from app.main import app
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        resp = await ac.post("/api/products/search/batch", json={"searches": []})
+    assert resp.status_code == 422
+
+@pytest.mark.asyncio
+@patch("app.api.products.product_service")
+async def test_search_products_with_spec_filters(mock_service):
+    mock_service.search_products = AsyncMock(return_value=[{"id": "P001", "name": "iPhone 15 Pro Max"}])
+    from app.main import app
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        resp = await ac.get("/api/products/search?query=iPhone&min_storage_gb=512&max_screen_inch=7")
+    assert resp.status_code == 200
+    mock_service.search_products.assert_awaited_once_with(
+        "iPhone", 10, {"min_storage_gb": 512, "max_screen_inch": 7}, None
+    )
+
+@pytest.mark.asyncio
+async def test_get_products_invalid_sort():
+    from app.main import app
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        resp = await ac.get("/api/products/?sort=color")
+    assert resp.status_code == 422
+
+@pytest.mark.asyncio
+@patch("app.api.products.product_service")
+async def test_get_similar_products(mock_service):
+    mock_service.get_similar_products.return_value = [{"id": "P002", "name": "iPhone 15 Pro"}]
+    from app.main import app
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        resp = await ac.get("/api/products/P001/similar?limit=3")
+    assert resp.status_code == 200
+    data = resp.json()
+    assert data["product_id"] == "P001"
+    assert data["products"][0]["id"] == "P002"
+    mock_service.get_similar_products.assert_called_once_with("P001", 3)
+
+@pytest.mark.asyncio
+@patch("app.api.products.product_service")
+async def test_get_similar_products_not_found(mock_service):
+    mock_service.get_similar_products.return_value = None
+    from app.main import app
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        resp = await ac.get("/api/products/P999/similar")
+    assert resp.status_code == 404
+
+@pytest.mark.asyncio
+async def test_get_products_body_matches_response_model():
+    from app.main import app
+    from app.api.products import product_service
+    from app.models.product import ProductResponse
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        resp = await ac.get("/api/products/?limit=5")
+    assert resp.status_code == 200
+    assert resp.headers["content-type"] == "application/json"
+    expected = [ProductResponse.model_validate(p).model_dump(mode="json") for p in product_service.get_all_products(5)]
+    assert resp.json() == expected
+
+def test_get_products_openapi_documents_projected_items():
+    from app.main import app
+    openapi = app.openapi()
+    operation = openapi["paths"]["/api/products/"]["get"]
+    schema = operation["responses"]["200"]["content"]["application/json"]["schema"]
+    assert schema["items"] == {"$ref": "#/components/schemas/ProductResponse"}
+    assert "ProductResponse" in openapi["components"]["schemas"]
+    fields = next(param for param in operation["parameters"] if param["name"] == "fields")
+    assert "only contains the requested fields" in fields["description"]
+
+@pytest.mark.asyncio
+@patch("app.api.products.product_service")
+async def test_categories_conditional_get(mock_service):
+    mock_service.catalog_version = "v1"
+    mock_service.get_categories = AsyncMock(return_value=["laptop", "smartphone"])
+    from app.main import app
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        first = await ac.get("/api/products/categories")
+        etag = first.headers["etag"]
+        assert first.headers["cache-control"] == "public, max-age=300"
+        second = await ac.get("/api/products/categories", headers={"If-None-Match": etag})
+        assert second.status_code == 304
+        assert second.content == b""
+        assert second.headers["etag"] == etag
+        assert mock_service.get_categories.await_count == 1
+
+        mock_service.catalog_version = "v2"
+        third = await ac.get("/api/products/categories", headers={"If-None-Match": etag})
+        assert third.status_code == 200
+        assert third.headers["etag"] != etag
+
+@pytest.mark.asyncio
+@patch("app.api.products.product_service")
+async def test_product_etag_depends_on_query(mock_service):
+    mock_service.catalog_version = "v1"
+    mock_service.get_top_rated_products = AsyncMock(return_value=[])
+    from app.main import app
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        five = await ac.get("/api/products/top-rated?limit=5")
+        ten = await ac.get("/api/products/top-rated?limit=10")
+        again = await ac.get("/api/products/top-rated?limit=5", headers={"If-None-Match": f'W/{five.headers["etag"]}'})
+    assert five.headers["etag"] != ten.headers["etag"]
+    assert again.status_code == 304
+
+@pytest.mark.asyncio
+@patch("app.api.products.product_service")
+async def test_top_rated_fields_projection(mock_service):
+    mock_service.catalog_version = "v1"
+    mock_service.get_top_rated_products = AsyncMock(return_value=[{
+        "id": "P001", "name": "iPhone 15 Pro Max", "price": 21999000, "description": "Panjang",
+        "specifications": {"rating": 4.8, "sold": 100, "stock": 25}, "images": ["a.jpg"]
+    }])
+    from app.main import app
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        resp = await ac.get("/api/products/top-rated?fields=id,name,specifications.rating")
+        invalid = await ac.get("/api/products/top-rated?fields=id,password")
+    assert resp.json()["products"] == [{"id": "P001", "name": "iPhone 15 Pro Max", "specifications": {"rating": 4.8}}]
+    assert invalid.status_code == 422
+
+@pytest.mark.asyncio
+async def test_products_list_view_uses_precomputed_fragments():
+    from app.main import app
+    from app.api.products import product_json, warm_product_views
+    warm_product_views()
+    hits = product_json.stats()["hits"]
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        resp = await ac.get("/api/products/?limit=3&fields=list")
+    assert product_json.stats()["hits"] == hits + 3
+    assert set(resp.json()[0]) == {"id", "name", "price", "currency", "specifications"}
@@ -0,0 +1,24 @@
+import re
+from app.utils.projection import FIELDS_PATTERN, PRODUCT_VIEWS, parse_fields, project
+
+PRODUCT = {"id": "P001", "name": "iPhone", "price": 1, "specifications": {"rating": 4.8, "sold": 10}}
+
+def test_parse_fields_views_and_lists():
+    assert parse_fields(None) is None
+    assert parse_fields("list") == PRODUCT_VIEWS["list"]
+    assert parse_fields("id,name,id") == ("id", "name")
+
+def test_fields_pattern():
+    assert re.match(FIELDS_PATTERN, "card")
+    assert re.match(FIELDS_PATTERN, "id,price,specifications.rating")
+    assert not re.match(FIELDS_PATTERN, "id,secret")
+    assert not re.match(FIELDS_PATTERN, "id,")
+
+def test_project_selects_nested_specifications():
+    assert project(PRODUCT, ("id", "specifications.rating", "url")) == {"id": "P001", "specifications": {"rating": 4.8}}
+    assert project(PRODUCT, None) is PRODUCT
+
+def test_project_does_not_mutate_product():
+    result = project(PRODUCT, ("specifications", "specifications.rating"))
+    assert result["specifications"] == {"rating": 4.8, "sold": 10}
+    assert PRODUCT["specifications"] == {"rating": 4.8, "sold": 10}
@@ -0,0 +1,60 @@
+import random
+import pytest
+from app.services.prompt_builder import PromptBuilder, estimate_tokens
+
+PRODUCTS = [
+    {
+        "name": f"Phone {i}", "brand": "Brand", "category": "smartphone", "price": 1000000 * (i + 1),
+        "description": "Deskripsi produk yang cukup panjang " * 5,
+        "specifications": {"rating": 4.5, "camera": "48MP main", "battery": "5000 mAh"}
+    }
+    for i in range(5)
+]
+
+def test_estimate_tokens():
+    assert estimate_tokens("") == 0
+    assert estimate_tokens("abcd") == 1
+    assert estimate_tokens("abcde") == 2
+
+def test_build_includes_core_fields_and_relevant_specs():
+    prompt = PromptBuilder(token_budget=2000).build("hp kamera bagus", PRODUCTS, "Berikut produk")
+    assert "Question: hp kamera bagus" in prompt
+    assert "Berikut produk" in prompt
+    assert "1. Phone 0 | Brand | smartphone | Rp 1,000,000 | Rating 4.5/5" in prompt
+    assert "Camera: 48MP main" in prompt
+    assert "Battery" not in prompt
+
+def test_build_without_products():
+    prompt = PromptBuilder().build("apa saja?", [], "")
+    assert "No specific products found" in prompt
+
+def test_small_budget_drops_low_priority_fields():
+    builder = PromptBuilder(token_budget=150)
+    prompt = builder.build("hp kamera", PRODUCTS, "Berikut produk")
+    assert estimate_tokens(prompt) <= 150
+    assert "1. Phone 0" in prompt
+    assert "Description" not in prompt
+
+@pytest.mark.parametrize("budget", [120, 200, 400, 1200])
+def test_budget_respected_for_random_inputs(budget):
+    rng = random.Random(budget)
+    builder = PromptBuilder(token_budget=budget)
+    for _ in range(50):
+        question = "x" * rng.randint(0, 6000)
+        note = "n" * rng.randint(0, 800)
+        products = PRODUCTS[:rng.randint(0, 5)]
+        assert estimate_tokens(builder.build(question, products, note)) <= budget
+
+def test_budget_below_minimum_rejected():
+    with pytest.raises(ValueError):
+        PromptBuilder(token_budget=10)
+
+def test_history_keeps_newest_turns_within_budget():
+    history = [f"User: pertanyaan {i} | Shown: Phone {i} | Answer: " + "jawaban " * 20 for i in range(10)]
+    builder = PromptBuilder(token_budget=400)
+    prompt = builder.build("yang lebih murah?", PRODUCTS, "", history)
+    assert "Previous conversation (summary):" in prompt
+    assert "pertanyaan 9" in prompt
+    assert "pertanyaan 0" not in prompt
+    assert prompt.index("pertanyaan 9") < prompt.index("Relevant Products:")
+    assert estimate_tokens(prompt) <= 400
@@ -1,3 +1,4 @@
+import json
 import pytest
 from httpx import AsyncClient, ASGITransport
 from unittest.mock import patch, AsyncMock
@@ -6,11 +7,12 @@ from unittest.mock import patch, AsyncMock
 @patch("app.api.queries.product_service")
 @patch("app.api.queries.ai_service")
 async def test_ask_question(mock_ai, mock_product):
-    mock_ai.get_response = AsyncMock(return_value="Jawaban AI")
-    mock_product.smart_search_products = AsyncMock(return_value=(
-        [{"id": "P001", "name": "iPhone 15 Pro Max"}], 
-        "Berikut produk yang sesuai dengan kriteria Anda."
-    ))
+    mock_ai.get_structured_response = AsyncMock(return_value={
+        "answer": "Jawaban AI",
+        "product_ids": ["P001"],
+        "note": "Berikut produk yang sesuai dengan kriteria Anda."
+    })
+    mock_product.get_products_by_ids.return_value = [{"id": "P001", "name": "iPhone 15 Pro Max"}]
     from app.main import app
     async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
         resp = await ac.post("/api/queries/ask", json={"question": "Apa laptop terbaik?"})
@@ -19,8 +21,11 @@ async def test_ask_question(mock_ai, mock_product):
     assert data["answer"] == "Jawaban AI"
     assert isinstance(data["products"], list)
     assert len(data["products"]) > 0
+    assert data["products"][0]["name"] == "iPhone 15 Pro Max"
+    assert data["product_ids"] == ["P001"]
     assert "note" in data
     assert data["note"] == "Berikut produk yang sesuai dengan kriteria Anda."
+    mock_product.smart_search_products.assert_not_called()
 
 @pytest.mark.asyncio
 async def test_get_suggestions():
@@ -32,6 +37,24 @@ async def test_get_suggestions():
     assert "suggestions" in data
     assert isinstance(data["suggestions"], list)
 
+@pytest.mark.asyncio
+async def test_autocomplete():
+    from app.main import app
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        resp = await ac.get("/api/queries/autocomplete?q=rekom&limit=3")
+    assert resp.status_code == 200
+    data = resp.json()
+    assert data["query"] == "rekom"
+    assert len(data["completions"]) <= 3
+    assert data["completions"][0]["type"] == "query"
+
+@pytest.mark.asyncio
+async def test_autocomplete_limit_is_bounded():
+    from app.main import app
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        resp = await ac.get("/api/queries/autocomplete?q=rekom&limit=1000")
+    assert resp.status_code == 422
+
 @pytest.mark.asyncio
 @patch("app.api.queries.product_service")
 async def test_get_categories(mock_service):
@@ -75,10 +98,10 @@ async def test_search_products(mock_service):
 @pytest.mark.asyncio
 @patch("app.api.queries.product_service")
 async def test_get_products_by_category(mock_service):
-    mock_service.get_products_by_category.return_value = [
+    mock_service.get_products_by_category = AsyncMock(return_value=[
         {"id": "P001", "name": "iPhone 15 Pro Max", "category": "smartphone"},
         {"id": "P002", "name": "iPhone 15 Pro", "category": "smartphone"}
-    ]
+    ])
     from app.main import app
     async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
         resp = await ac.get("/api/queries/products/category/smartphone")
@@ -94,10 +117,10 @@ async def test_get_products_by_category(mock_service):
 @pytest.mark.asyncio
 @patch("app.api.queries.product_service")
 async def test_get_products_by_brand(mock_service):
-    mock_service.get_products_by_brand.return_value = [
+    mock_service.get_products_by_brand = AsyncMock(return_value=[
         {"id": "P001", "name": "iPhone 15 Pro Max", "brand": "Apple"},
         {"id": "P002", "name": "iPhone 15 Pro", "brand": "Apple"}
-    ]
+    ])
     from app.main import app
     async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
         resp = await ac.get("/api/queries/products/brand/Apple")
@@ -215,7 +238,7 @@ async def test_search_products_error(mock_service):
 @pytest.mark.asyncio
 @patch("app.api.queries.product_service")
 async def test_get_products_by_category_error(mock_service):
-    mock_service.get_products_by_category.side_effect = Exception("Category error")
+    mock_service.get_products_by_category = AsyncMock(side_effect=Exception("Category error"))
     from app.main import app
     async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
         resp = await ac.get("/api/queries/products/category/smartphone")
@@ -224,7 +247,7 @@ async def test_get_products_by_category_error(mock_service):
 @pytest.mark.asyncio
 @patch("app.api.queries.product_service")
 async def test_get_products_by_brand_error(mock_service):
-    mock_service.get_products_by_brand.side_effect = Exception("Brand error")
+    mock_service.get_products_by_brand = AsyncMock(side_effect=Exception("Brand error"))
     from app.main import app
     async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
         resp = await ac.get("/api/queries/products/brand/Apple")
@@ -253,7 +276,7 @@ async def test_get_best_selling_products_error(mock_service):
 @patch("app.api.queries.ai_service")
 async def test_ask_question_error(mock_ai, mock_product):
     """Test error handling in ask_question endpoint"""
-    mock_ai.get_response = AsyncMock(side_effect=Exception("AI Service Error"))
+    mock_ai.get_structured_response = AsyncMock(side_effect=Exception("AI Service Error"))
     from app.main import app
     async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
         resp = await ac.post("/api/queries/ask", json={"question": "Test question"})
@@ -264,11 +287,12 @@ async def test_ask_question_error(mock_ai, mock_product):
 @patch("app.api.queries.ai_service")
 async def test_ask_question_with_budget(mock_ai, mock_product):
     """Test ask_question with budget detection"""
-    mock_ai.get_response = AsyncMock(return_value="Jawaban AI dengan budget")
-    mock_product.smart_search_products = AsyncMock(return_value=(
-        [{"id": "P001", "name": "iPhone 15", "price": 14999000}], 
-        "Berikut produk yang sesuai budget 5 juta"
-    ))
+    mock_ai.get_structured_response = AsyncMock(return_value={
+        "answer": "Jawaban AI dengan budget",
+        "product_ids": ["P001"],
+        "note": "Berikut produk yang sesuai budget 5 juta"
+    })
+    mock_product.get_products_by_ids.return_value = [{"id": "P001", "name": "iPhone 15", "price": 14999000}]
     from app.main import app
     async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
         resp = await ac.post("/api/queries/ask", json={"question": "Saya ingin smartphone budget 5 juta"})
@@ -282,15 +306,105 @@ async def test_ask_question_with_budget(mock_ai, mock_product):
 @patch("app.api.queries.ai_service")
 async def test_ask_question_with_category(mock_ai, mock_product):
     """Test ask_question with category detection"""
-    mock_ai.get_response = AsyncMock(return_value="Jawaban AI dengan kategori")
-    mock_product.smart_search_products = AsyncMock(return_value=(
-        [{"id": "P001", "name": "MacBook Pro", "category": "laptop"}], 
-        "Berikut laptop terbaik"
-    ))
+    mock_ai.get_structured_response = AsyncMock(return_value={
+        "answer": "Jawaban AI dengan kategori",
+        "product_ids": ["P001"],
+        "note": "Berikut laptop terbaik"
+    })
+    mock_product.get_products_by_ids.return_value = [{"id": "P001", "name": "MacBook Pro", "category": "laptop"}]
     from app.main import app
     async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
         resp = await ac.post("/api/queries/ask", json={"question": "Saya ingin laptop terbaik"})
     assert resp.status_code == 200
     data = resp.json()
     assert data["answer"] == "Jawaban AI dengan kategori"
-    assert "note" in data 
\ No newline at end of file
+    assert "note" in data
+
+@pytest.mark.asyncio
+@patch("app.api.queries.ai_service")
+async def test_ask_question_stream(mock_ai):
+    async def fake_stream(question, products, note, session_id=None):
+        for text in ["Laptop ", "terbaik"]:
+            yield text
+    mock_ai.retrieve_products = AsyncMock(return_value=(
+        [{"id": "P008", "name": "MacBook Pro"}], "Berikut produk yang sesuai dengan kriteria Anda."
+    ))
+    mock_ai.stream_response = fake_stream
+    from app.main import app
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        resp = await ac.post("/api/queries/ask/stream", json={"question": "Apa laptop terbaik?"})
+    assert resp.status_code == 200
+    assert resp.headers["content-type"].startswith("text/event-stream")
+    events = [block.split("\n") for block in resp.text.strip().split("\n\n")]
+    names = [lines[0].removeprefix("event: ") for lines in events]
+    assert names == ["products", "token", "token", "done"]
+    products = json.loads(events[0][1].removeprefix("data: "))
+    assert products["products"][0]["id"] == "P008"
+    assert "".join(json.loads(e[1].removeprefix("data: "))["text"] for e in events[1:3]) == "Laptop terbaik"
+
+@pytest.mark.asyncio
+@patch("app.api.queries.ai_service")
+async def test_ask_question_stream_retrieval_error(mock_ai):
+    mock_ai.retrieve_products = AsyncMock(side_effect=Exception("boom"))
+    from app.main import app
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        resp = await ac.post("/api/queries/ask/stream", json={"question": "Apa laptop terbaik?"})
+    assert resp.status_code == 200
+    assert resp.text.startswith("event: error")
+
+@pytest.mark.asyncio
+@patch("app.api.queries.ai_service")
+async def test_ai_metrics(mock_ai):
+    mock_ai.get_metrics.return_value = {"circuit_breaker": {"state": "closed"}}
+    from app.main import app
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        resp = await ac.get("/api/queries/metrics")
+    assert resp.status_code == 200
+    assert resp.json()["circuit_breaker"]["state"] == "closed"
+    assert resp.json()["catalog_executor"]["mode"] == "thread"
+
+@pytest.mark.asyncio
+@patch("app.api.queries.ask_job_service")
+async def test_ask_jobs_submit_and_poll(mock_jobs):
+    job = {"job_id": "abc", "status": "pending", "question": "Laptop?", "products": [{"id": "P008"}], "note": ""}
+    mock_jobs.submit = AsyncMock(return_value=job)
+    mock_jobs.wait = AsyncMock(return_value={**job, "status": "done", "answer": "Pilih MacBook"})
+    from app.main import app
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        resp = await ac.post("/api/queries/ask/jobs", json={"question": "Laptop?"})
+        assert resp.status_code == 202
+        assert resp.json()["job_id"] == "abc"
+        assert resp.json()["products"][0]["id"] == "P008"
+        resp = await ac.get("/api/queries/ask/jobs/abc?wait=5")
+    assert resp.status_code == 200
+    assert resp.json()["answer"] == "Pilih MacBook"
+    mock_jobs.wait.assert_awaited_once_with("abc", 5)
+
+@pytest.mark.asyncio
+@patch("app.api.queries.ask_job_service")
+async def test_ask_jobs_errors(mock_jobs):
+    from app.services.ask_job_service import JobQueueFull
+    mock_jobs.submit = AsyncMock(side_effect=JobQueueFull("full"))
+    mock_jobs.wait = AsyncMock(return_value=None)
+    from app.main import app
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        assert (await ac.post("/api/queries/ask/jobs", json={"question": "Laptop?"})).status_code == 503
+        assert (await ac.get("/api/queries/ask/jobs/missing")).status_code == 404
+        assert (await ac.get("/api/queries/ask/jobs/missing?wait=31")).status_code == 422
+
+@pytest.mark.asyncio
+@patch("app.api.queries.product_service")
+@patch("app.api.queries.ai_service")
+async def test_ask_question_with_session(mock_ai, mock_product):
+    mock_ai.get_structured_response = AsyncMock(return_value={
+        "answer": "MacBook Air lebih murah.",
+        "product_ids": ["P002"],
+        "note": "Berikut pilihan yang lebih murah dari rekomendasi sebelumnya."
+    })
+    mock_product.get_products_by_ids.return_value = [{"id": "P002", "name": "MacBook Air"}]
+    from app.main import app
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        resp = await ac.post("/api/queries/ask", json={"question": "yang lebih murah?", "session_id": "s1"})
+    assert resp.status_code == 200
+    assert resp.json()["products"][0]["id"] == "P002"
+    mock_ai.get_structured_response.assert_awaited_once_with("yang lebih murah?", session_id="s1")
@@ -0,0 +1,70 @@
+import asyncio
+import time
+import pytest
+from app.services.rate_limiter import BACKGROUND, INTERACTIVE, PriorityTokenBucket, RateLimitExceeded
+
+@pytest.mark.asyncio
+async def test_burst_is_granted_immediately():
+    bucket = PriorityTokenBucket(rate_per_second=1, burst=3)
+    started = time.monotonic()
+    for _ in range(3):
+        await bucket.acquire()
+    assert time.monotonic() - started < 0.05
+    assert bucket.snapshot()["granted"] == 3
+
+@pytest.mark.asyncio
+async def test_fail_fast_when_wait_too_long():
+    bucket = PriorityTokenBucket(rate_per_second=1, burst=1, max_wait_seconds=0.5)
+    await bucket.acquire()
+    started = time.monotonic()
+    with pytest.raises(RateLimitExceeded):
+        await bucket.acquire()
+    assert time.monotonic() - started < 0.05
+    assert bucket.snapshot()["rejected"] == 1
+
+@pytest.mark.asyncio
+async def test_fail_fast_when_queue_full():
+    bucket = PriorityTokenBucket(rate_per_second=20, burst=1, max_queue=1, max_wait_seconds=1)
+    await bucket.acquire()
+    waiter = asyncio.ensure_future(bucket.acquire())
+    await asyncio.sleep(0)
+    with pytest.raises(RateLimitExceeded):
+        await bucket.acquire()
+    await waiter
+
+@pytest.mark.asyncio
+async def test_interactive_served_before_background():
+    bucket = PriorityTokenBucket(rate_per_second=20, burst=1, max_wait_seconds=1)
+    await bucket.acquire()
+    order = []
+
+    async def take(priority, name):
+        await bucket.acquire(priority)
+        order.append(name)
+
+    background = asyncio.ensure_future(take(BACKGROUND, "background"))
+    await asyncio.sleep(0)
+    interactive = asyncio.ensure_future(take(INTERACTIVE, "interactive"))
+    await asyncio.sleep(0)
+    assert bucket.snapshot()["queue_depth"] == {"interactive": 1, "background": 1}
+    await asyncio.gather(background, interactive)
+    assert order == ["interactive", "background"]
+    assert bucket.snapshot()["max_wait_seconds"] > 0
+
+@pytest.mark.asyncio
+async def test_cancelled_waiter_leaves_queue():
+    bucket = PriorityTokenBucket(rate_per_second=5, burst=1, max_wait_seconds=1)
+    await bucket.acquire()
+    waiter = asyncio.ensure_future(bucket.acquire())
+    await asyncio.sleep(0.01)
+    waiter.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await waiter
+    assert bucket.snapshot()["queue_depth"]["interactive"] == 0
+
+def test_acquire_blocking_waits_for_refill():
+    bucket = PriorityTokenBucket(rate_per_second=20, burst=1, max_wait_seconds=1)
+    bucket.acquire_blocking()
+    started = time.monotonic()
+    bucket.acquire_blocking()
+    assert time.monotonic() - started >= 0.03
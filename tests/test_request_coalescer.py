@@ -0,0 +1,83 @@
+import asyncio
+import pytest
+from app.services.request_coalescer import SingleFlight
+
+@pytest.mark.asyncio
+async def test_identical_calls_share_one_execution():
+    flight = SingleFlight()
+    calls = 0
+
+    async def work():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return "answer"
+
+    results = await asyncio.gather(*[flight.do("q", work) for _ in range(5)])
+    assert results == ["answer"] * 5
+    assert calls == 1
+    assert flight.coalesced == 4
+    assert flight.in_flight() == 0
+
+@pytest.mark.asyncio
+async def test_different_keys_run_separately():
+    flight = SingleFlight()
+
+    async def work(value):
+        await asyncio.sleep(0)
+        return value
+
+    results = await asyncio.gather(flight.do("a", lambda: work(1)), flight.do("b", lambda: work(2)))
+    assert results == [1, 2]
+    assert flight.calls == 2
+
+@pytest.mark.asyncio
+async def test_cancelled_waiter_does_not_cancel_others():
+    flight = SingleFlight()
+    release = asyncio.Event()
+
+    async def work():
+        await release.wait()
+        return "done"
+
+    first = asyncio.ensure_future(flight.do("q", work))
+    second = asyncio.ensure_future(flight.do("q", work))
+    await asyncio.sleep(0)
+    first.cancel()
+    await asyncio.sleep(0)
+    release.set()
+    assert await second == "done"
+    with pytest.raises(asyncio.CancelledError):
+        await first
+
+@pytest.mark.asyncio
+async def test_last_waiter_cancel_stops_work():
+    flight = SingleFlight()
+    started = asyncio.Event()
+
+    async def work():
+        started.set()
+        await asyncio.sleep(10)
+
+    waiter = asyncio.ensure_future(flight.do("q", work))
+    await started.wait()
+    waiter.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await waiter
+    assert flight.in_flight() == 0
+
+@pytest.mark.asyncio
+async def test_errors_propagate_and_are_not_cached():
+    flight = SingleFlight()
+
+    async def failing():
+        await asyncio.sleep(0)
+        raise RuntimeError("boom")
+
+    results = await asyncio.gather(flight.do("q", failing), flight.do("q", failing), return_exceptions=True)
+    assert all(isinstance(r, RuntimeError) for r in results)
+
+    async def ok():
+        return "ok"
+
+    assert await flight.do("q", ok) == "ok"
@@ -0,0 +1,116 @@
+import asyncio
+import pytest
+from google.genai import errors
+from app.services.circuit_breaker import CircuitOpenError
+from app.services.retry_policy import RetryPolicy, is_retryable
+
+def _server_error():
+    return errors.ServerError(503, {"error": {"code": 503, "status": "UNAVAILABLE", "message": "busy"}})
+
+def _client_error(code):
+    return errors.ClientError(code, {"error": {"code": code, "status": "ERR", "message": "client"}})
+
+def test_retryable_errors():
+    assert is_retryable(_server_error())
+    assert is_retryable(_client_error(429))
+    assert not is_retryable(_client_error(400))
+    assert not is_retryable(CircuitOpenError("open"))
+    assert not is_retryable(ValueError("bad"))
+
+def test_backoff_is_jittered_and_capped():
+    policy = RetryPolicy(base_delay_seconds=1.0, max_delay_seconds=3.0, seed=1)
+    delays = [policy.backoff_delay(5) for _ in range(50)]
+    assert all(0 <= delay <= 3.0 for delay in delays)
+    assert len(set(delays)) > 1
+
+@pytest.mark.asyncio
+async def test_run_retries_until_success():
+    policy = RetryPolicy(max_attempts=3, base_delay_seconds=0)
+    outcomes = [_server_error(), _server_error(), "ok"]
+
+    async def call():
+        outcome = outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+    assert await policy.run(call) == "ok"
+    assert policy.snapshot()["retries"] == 2
+
+@pytest.mark.asyncio
+async def test_run_does_not_retry_permanent_errors():
+    policy = RetryPolicy(base_delay_seconds=0)
+    calls = []
+
+    async def call():
+        calls.append(1)
+        raise _client_error(400)
+
+    with pytest.raises(errors.ClientError):
+        await policy.run(call)
+    assert len(calls) == 1
+
+@pytest.mark.asyncio
+async def test_retry_budget_limits_retries_during_outage():
+    policy = RetryPolicy(max_attempts=5, base_delay_seconds=0, budget_ratio=0.1, budget_min_tokens=2)
+    calls = []
+
+    async def call():
+        calls.append(1)
+        raise _server_error()
+
+    for _ in range(10):
+        with pytest.raises(errors.ServerError):
+            await policy.run(call)
+    # 10 panggilan + retry dari budget awal (2) dan deposit 10 x 0.1 (1)
+    assert len(calls) == 13
+    assert policy.snapshot()["budget_exhausted"] > 0
+
+@pytest.mark.asyncio
+async def test_hedge_after_latency_percentile():
+    policy = RetryPolicy(hedge_enabled=True, hedge_percentile=0.9, hedge_min_samples=5)
+    for _ in range(5):
+        policy.record_latency(0.01)
+    assert policy.hedge_delay() == 0.01
+    delays = [0.5, 0]
+
+    async def call():
+        delay = delays.pop(0)
+        await asyncio.sleep(delay)
+        return delay
+
+    assert await policy.run(call, hedge=True) == 0
+    snapshot = policy.snapshot()
+    assert snapshot["hedges"] == 1
+    assert snapshot["hedge_wins"] == 1
+
+@pytest.mark.asyncio
+async def test_stream_retries_only_before_first_chunk():
+    policy = RetryPolicy(base_delay_seconds=0)
+    attempts = []
+
+    async def open_stream():
+        attempts.append(1)
+        if len(attempts) == 1:
+            raise _server_error()
+        yield "a"
+        raise _server_error()
+
+    received = []
+    with pytest.raises(errors.ServerError):
+        async for chunk in policy.stream(open_stream):
+            received.append(chunk)
+    assert received == ["a"]
+    assert len(attempts) == 2
+
+def test_run_blocking_retries():
+    policy = RetryPolicy(base_delay_seconds=0)
+    outcomes = [_client_error(429), "ok"]
+
+    def call():
+        outcome = outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+    assert policy.run_blocking(call) == "ok"
@@ -0,0 +1,52 @@
+import numpy as np
+from app.services.semantic_search_service import SemanticSearchIndex, tokenize
+
+PRODUCTS = [
+    {"id": "P001", "name": "MacBook Air M2", "category": "laptop", "brand": "Apple",
+     "description": "Laptop tipis untuk kerja kantor dan kuliah", "specifications": {"battery": "18 hours"}},
+    {"id": "P002", "name": "ASUS ROG Strix G15", "category": "laptop", "brand": "ASUS",
+     "description": "Laptop gaming dengan RTX 4060", "specifications": {"gpu": "RTX 4060"}},
+    {"id": "P003", "name": "Sony WH-1000XM5", "category": "headphone", "brand": "Sony",
+     "description": "Headphone wireless dengan noise cancelling terbaik", "specifications": {}},
+]
+
+def test_tokenize_removes_stop_words():
+    terms = tokenize("Laptop untuk gaming")
+    assert "laptop" in terms
+    assert "gaming" in terms
+    assert "untuk" not in terms
+
+def test_search_ranks_relevant_product_first():
+    index = SemanticSearchIndex(PRODUCTS)
+    hits = index.search("laptop buat kerja kantor", top_k=2)
+    assert hits[0][0] == 0
+    assert hits[0][1] >= hits[-1][1]
+
+def test_search_matches_word_variants():
+    index = SemanticSearchIndex(PRODUCTS)
+    hits = index.search("gamer", top_k=1)
+    assert hits[0][0] == 1
+    hits = index.search("headphones wireless", top_k=1)
+    assert hits[0][0] == 2
+
+def test_search_respects_mask():
+    index = SemanticSearchIndex(PRODUCTS)
+    mask = np.array([False, True, True])
+    hits = index.search("laptop kerja", top_k=3, mask=mask)
+    assert all(i != 0 for i, _ in hits)
+
+def test_search_unknown_terms_returns_empty():
+    index = SemanticSearchIndex(PRODUCTS)
+    assert index.search("xyz qwerty", top_k=3) == []
+
+def test_search_empty_catalog():
+    index = SemanticSearchIndex([])
+    assert index.search("laptop", top_k=3) == []
+
+def test_index_is_sparse_and_normalized():
+    index = SemanticSearchIndex(PRODUCTS)
+    nonzero = sum(len(ids) for ids, _ in index.documents)
+    assert nonzero < len(PRODUCTS) * len(index.vocabulary)
+    for ids, weights in index.documents:
+        assert abs(float(np.linalg.norm(weights)) - 1) < 1e-5
+    assert abs(index.similarity(0)[0] - 1) < 1e-5
@@ -0,0 +1,45 @@
+from app.services.session_service import SessionStore, is_follow_up, refine_candidates, summarize_answer
+
+PRODUCTS = [
+    {"id": "1", "name": "ThinkPad X1", "brand": "Lenovo", "price": 20000000, "specifications": {"rating": 4.5, "sold": 100}},
+    {"id": "2", "name": "MacBook Air", "brand": "Apple", "price": 15000000, "specifications": {"rating": 4.8, "sold": 900}},
+    {"id": "3", "name": "IdeaPad Slim", "brand": "Lenovo", "price": 8000000, "specifications": {"rating": 4.2, "sold": 500}},
+]
+
+def test_summarize_answer():
+    assert summarize_answer("Pilih MacBook Air. Karena ringan.") == "Pilih MacBook Air."
+    assert len(summarize_answer("a" * 500, max_chars=50)) == 50
+
+def test_follow_up_detection():
+    session = {"intent": {"category": "laptop"}, "candidate_ids": ["1"]}
+    assert is_follow_up("yang lebih murah?", {"category": None}, session)
+    assert is_follow_up("kalau yang Apple", {"category": None}, session)
+    assert not is_follow_up("hp kamera bagus", {"category": "smartphone"}, session)
+    assert not is_follow_up("saya mau laptop untuk kuliah desain grafis dan edit video 4k", {"category": "laptop"}, session)
+    assert not is_follow_up("yang lebih murah?", {"category": None}, {"intent": {}, "candidate_ids": []})
+
+def test_refine_cheaper_and_brand():
+    results, message = refine_candidates("yang lebih murah?", PRODUCTS, PRODUCTS[:1])
+    assert [p["id"] for p in results] == ["3", "2"]
+    assert "lebih murah" in message
+    results, _ = refine_candidates("yang lenovo aja", PRODUCTS, PRODUCTS[:1])
+    assert [p["id"] for p in results] == ["1", "3"]
+    results, _ = refine_candidates("yang terlaris di bawah 16 juta", PRODUCTS, PRODUCTS[:1])
+    assert [p["id"] for p in results] == ["2", "3"]
+
+def test_session_store_history():
+    store = SessionStore(max_sessions=2, max_turns=2)
+    for i in range(3):
+        store.record_retrieval("s1", f"q{i}", {"category": "laptop"}, PRODUCTS, PRODUCTS[:2])
+        store.record_answer("s1", f"jawaban {i}. detail")
+    assert store.get("s1")["candidate_ids"] == ["1", "2", "3"]
+    assert store.get("s1")["shown_ids"] == ["1", "2"]
+    lines = store.history_lines("s1")
+    assert lines == [
+        "User: q1 | Shown: ThinkPad X1, MacBook Air | Answer: jawaban 1.",
+        "User: q2 | Shown: ThinkPad X1, MacBook Air | Answer: jawaban 2.",
+    ]
+    store.record_retrieval("s2", "q", {}, [], [])
+    store.record_retrieval("s3", "q", {}, [], [])
+    assert store.get("s1") is None
+    assert store.history_lines("missing") == []
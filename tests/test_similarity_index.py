@@ -0,0 +1,35 @@
+from app.services.semantic_search_service import SemanticSearchIndex
+from app.services.similarity_index import SimilarProductsIndex
+
+PRODUCTS = [
+    {"id": "P001", "name": "iPhone 15 Pro", "category": "smartphone", "brand": "Apple", "price": 18999000, "description": "Smartphone flagship"},
+    {"id": "P002", "name": "iPhone 15", "category": "smartphone", "brand": "Apple", "price": 14999000, "description": "Smartphone"},
+    {"id": "P003", "name": "Galaxy S24", "category": "smartphone", "brand": "Samsung", "price": 15999000, "description": "Smartphone Android"},
+    {"id": "P004", "name": "MacBook Air", "category": "laptop", "brand": "Apple", "price": 19999000, "description": "Laptop tipis"},
+    {"id": "P005", "name": "Kindle", "category": "ebook_reader", "brand": "Amazon", "price": 1999000, "description": "E-reader"},
+]
+
+def build_index(neighbors=3):
+    return SimilarProductsIndex(PRODUCTS, SemanticSearchIndex(PRODUCTS), neighbors=neighbors)
+
+def test_neighbors_prefer_same_category_and_brand():
+    index = build_index()
+    neighbors = index.neighbors_of(0, limit=3)
+    assert neighbors[0] == 1
+    assert 2 in neighbors
+    assert 0 not in neighbors
+
+def test_neighbors_limit_and_table_shape():
+    index = build_index(neighbors=2)
+    assert index.table.shape == (5, 2)
+    assert len(index.neighbors_of(4, limit=5)) == 2
+
+def test_blocked_build_matches_single_block():
+    text_index = SemanticSearchIndex(PRODUCTS)
+    full = SimilarProductsIndex(PRODUCTS, text_index, neighbors=3)
+    blocked = SimilarProductsIndex(PRODUCTS, text_index, neighbors=3, block_size=2)
+    assert (full.table == blocked.table).all()
+
+def test_single_product_has_no_neighbors():
+    index = SimilarProductsIndex(PRODUCTS[:1], SemanticSearchIndex(PRODUCTS[:1]))
+    assert index.neighbors_of(0) == []
@@ -0,0 +1,37 @@
+import pytest
+from app.services.sort_index import SortIndex, parse_sort_spec
+
+PRODUCTS = [
+    {"id": "A", "name": "Beta", "price": 300, "specifications": {"rating": 4.5, "sold": 10}},
+    {"id": "B", "name": "alpha", "price": 100, "specifications": {"rating": 4.8, "sold": 50}},
+    {"id": "C", "name": "Gamma", "price": 200, "specifications": {"rating": 4.5, "sold": 30}},
+    {"id": "D", "name": "Delta", "price": 100, "specifications": {"rating": 4.9, "sold": 30}},
+]
+
+def ids(index, sort, allowed=None):
+    return [PRODUCTS[i]["id"] for i in index.iter_sorted(sort, allowed)]
+
+def test_parse_sort_spec():
+    assert parse_sort_spec("-rating,price") == [("rating", True), ("price", False)]
+    with pytest.raises(ValueError):
+        parse_sort_spec("color")
+
+def test_single_key_sorts():
+    index = SortIndex(PRODUCTS)
+    assert ids(index, "price") == ["B", "D", "C", "A"]
+    assert ids(index, "-rating") == ["D", "B", "A", "C"]
+    assert ids(index, "name") == ["B", "A", "D", "C"]
+
+def test_multi_key_breaks_ties():
+    index = SortIndex(PRODUCTS)
+    assert ids(index, "price,-rating") == ["D", "B", "C", "A"]
+    assert ids(index, "-sold,-price") == ["B", "C", "D", "A"]
+
+def test_sorted_with_allowed_positions():
+    index = SortIndex(PRODUCTS)
+    assert ids(index, "-price", allowed={0, 1}) == ["A", "B"]
+
+def test_sort_products_subset():
+    index = SortIndex(PRODUCTS)
+    subset = [PRODUCTS[2], PRODUCTS[0], PRODUCTS[3]]
+    assert [p["id"] for p in index.sort_products(subset, "-sold,price")] == ["D", "C", "A"]
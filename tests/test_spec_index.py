@@ -0,0 +1,45 @@
+import pytest
+from app.services.spec_index import (
+    SpecIndex, parse_capacity_gb, parse_battery_mah, parse_screen_inch, parse_weight_g
+)
+
+PRODUCTS = [
+    {"id": "P001", "specifications": {"storage": "256GB, 512GB, 1TB", "battery": "4441 mAh", "screen": "6.7 inch Super Retina XDR"}},
+    {"id": "P002", "specifications": {"storage": "512GB SSD", "memory": "16GB DDR5", "battery": "70Wh", "weight": "1.6kg"}},
+    {"id": "P003", "specifications": {"storage": "64GB", "battery": "5000 mAh", "weight": "249g"}},
+    {"id": "P004", "specifications": {}},
+]
+
+def test_parsers():
+    assert parse_capacity_gb("256GB, 512GB, 1TB") == (256, 1024)
+    assert parse_capacity_gb("8GB, 16GB unified memory") == (8, 16)
+    assert parse_battery_mah("4441 mAh") == (4441, 4441)
+    assert parse_battery_mah("70Wh") is None
+    assert parse_screen_inch("6.7 inch Super Retina XDR") == (6.7, 6.7)
+    assert parse_weight_g("0.5kg") == (500, 500)
+    assert parse_weight_g("249g") == (249, 249)
+
+def test_columns_and_attributes():
+    index = SpecIndex(PRODUCTS)
+    assert index.get_attributes(0)["storage_gb"] == (256, 1024)
+    assert index.get_attributes(1)["ram_gb"] == (16, 16)
+    assert index.get_attributes(3) == {}
+
+def test_range_filter_uses_variant_ranges():
+    index = SpecIndex(PRODUCTS)
+    # P001 has a 1TB variant, so it satisfies min 1000GB
+    assert index.range_filter("storage_gb", minimum=1000) == {0}
+    # P001 also has a 256GB variant, so it satisfies max 300GB
+    assert index.range_filter("storage_gb", maximum=300) == {0, 2}
+    assert index.range_filter("storage_gb", minimum=500, maximum=600) == {0, 1}
+
+def test_matching_positions_combines_filters():
+    index = SpecIndex(PRODUCTS)
+    assert index.matching_positions(None) is None
+    assert index.matching_positions({"min_storage_gb": None}) is None
+    assert index.matching_positions({"min_battery_mah": 4000, "max_weight_g": 500}) == {2}
+
+def test_matching_positions_unknown_filter():
+    index = SpecIndex(PRODUCTS)
+    with pytest.raises(ValueError):
+        index.matching_positions({"min_pixels": 10})
@@ -0,0 +1,54 @@
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+from app.services.rate_limiter import BACKGROUND
+from app.services.warmup_service import QueryStats, WarmupService
+from app.utils.cache import TTLCache
+
+def _ai_service():
+    ai_service = MagicMock()
+    ai_service.answer_cache = TTLCache()
+    ai_service.query_stats = QueryStats()
+    ai_service.question_key = lambda question: question.lower().strip("?")
+
+    async def get_response(question, priority, record):
+        assert priority == BACKGROUND and record is False
+        if "gagal" not in question:
+            ai_service.answer_cache.set(ai_service.question_key(question), "answer")
+        return "answer"
+    ai_service.get_response = AsyncMock(side_effect=get_response)
+    return ai_service
+
+def test_query_stats_top_and_bound():
+    stats = QueryStats(max_entries=3)
+    for _ in range(3):
+        stats.record("laptop", "Laptop?")
+    stats.record("hp", "HP")
+    stats.record("hp", "hp murah")
+    stats.record("tv", "TV")
+    stats.record("drone", "Drone")
+    assert len(stats) == 3
+    assert stats.top(2) == ["Laptop?", "hp murah"]
+
+@pytest.mark.asyncio
+async def test_warm_once_fills_cache_and_skips_cached():
+    ai_service = _ai_service()
+    ai_service.answer_cache.set("tablet", "cached")
+    ai_service.query_stats.record("kamera", "Kamera?")
+    ai_service.query_stats.record("laptop", "LAPTOP")
+    warmup = WarmupService(ai_service, ["Laptop?", "Tablet", "gagal"], top_n=5, concurrency=2)
+    assert warmup.candidates() == ["Laptop?", "Tablet", "gagal", "Kamera?"]
+    assert not warmup.ready
+    result = await warmup.warm_once()
+    assert (result["warmed"], result["skipped"], result["failed"]) == (2, 1, 1)
+    assert warmup.ready
+    assert "kamera" in ai_service.answer_cache
+    assert ai_service.get_response.await_count == 3
+
+@pytest.mark.asyncio
+async def test_start_runs_once_without_interval():
+    ai_service = _ai_service()
+    warmup = WarmupService(ai_service, ["Laptop"], interval_seconds=0)
+    warmup.start()
+    await warmup._task
+    assert warmup.last_run["warmed"] == 1
+    await warmup.stop()